@@ -21,8 +21,8 @@ from services.circuit_breaker.circuit import circuit_breaker
 from services.http_exceptions.decorators import http_exceptions_handler
 from services.logs import logs
 from services.rate_limit.gcra import rate_limit_requests
-from services.request_parser import limit_type, ParserParam, get_request_params
-from services.user_history.utils import get_user_history_list
+from services.request_parser import limit_type, ParserParam, get_request_params, MAX_LIMIT
+from services.user_history.utils import get_user_devices, get_user_history_list
 from services.utils import fallback_exception_response
 
 logger = logs.get_logger()
@@ -137,21 +137,37 @@ class UserHistoryAPI(Resource):
     def get(self) -> tuple[ListResponseSchema | BaseResponseSchema, HTTPStatus]:
         """Метод предоставляет информацию о истории входов пользователя."""
         request_body = get_request_params(
-            ParserParam('limit', dict(type=limit_type, location='args')),
-            ParserParam('search_after', dict(type=str, location='args', action='append')),
+            ParserParam('limit', dict(type=limit_type, location='args', default=MAX_LIMIT)),
+            ParserParam('cursor', dict(type=str, location='args')),
         )
 
         jwt_payload = get_jwt()
 
         user_id = jwt_payload.get('sub').get('user_id')
         limit = request_body.get('limit')
-        search_after = request_body.get('search_after')
+        cursor = request_body.get('cursor')
 
-        history = get_user_history_list(user_id, limit, search_after)
+        history = get_user_history_list(user_id, limit, cursor)
 
         return history, HTTPStatus.OK
 
 
+class UserDevicesAPI(Resource):
+    """Класс позволяет получить устройства, с которых входил пользователь."""
+
+    @circuit_breaker(fallback_function=fallback_exception_response, excluded_exceptions=(PyJWTError,))
+    @jwt_required(fresh=True)
+    @http_exceptions_handler()
+    @rate_limit_requests(tat_storage=tat_storage, limit_requests=100, period=timedelta(seconds=60))
+    def get(self) -> tuple[list[dict], HTTPStatus]:
+        """Метод предоставляет устройства пользователя с временем первого и последнего входа."""
+        jwt_payload = get_jwt()
+
+        user_id = jwt_payload.get('sub').get('user_id')
+
+        return get_user_devices(user_id), HTTPStatus.OK
+
+
 class UpdateUserAuthDataAPI(Resource):
     """Класс позволяет осуществить обновления аутентификационных данных для пользователя."""
 
@@ -215,5 +231,6 @@ api.add_resource(LoginAPI, '/login')
 api.add_resource(RefreshAPI, '/refresh')
 api.add_resource(LogoutAPI, '/logout')
 api.add_resource(UserHistoryAPI, '/history-auth/')
+api.add_resource(UserDevicesAPI, '/devices/')
 api.add_resource(UpdateUserAuthDataAPI, '/update-auth-data/')
 api.add_resource(UserAgentLogoutAPI, '/logout-from-devices/')
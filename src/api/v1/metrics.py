@@ -0,0 +1,36 @@
+"""Модуль содержит в себе API для получения метрик сервиса."""
+from http import HTTPStatus
+
+from flask import Blueprint, Flask
+from flask_restful import Resource, Api
+from flask_jwt_extended import jwt_required
+from jwt import PyJWTError
+
+from services.circuit_breaker.circuit import circuit_breaker
+from services.http_exceptions.decorators import http_exceptions_handler
+from services.metrics.registry import collect_metrics
+from services.user.decorators import admin_required
+from services.utils import fallback_exception_response
+
+metrics_blueprint = Blueprint('metrics', __name__)
+api = Api(metrics_blueprint, errors=Flask.errorhandler)
+
+
+class ServiceMetricsAPI(Resource):
+    """Класс предоставляет метрики внутренних подсистем сервиса."""
+
+    @circuit_breaker(fallback_function=fallback_exception_response, excluded_exceptions=(PyJWTError,))
+    @jwt_required()
+    @http_exceptions_handler()
+    @admin_required
+    def get(self) -> tuple[dict, HTTPStatus]:
+        """
+        Метод возвращает метрики всех зарегистрированных источников.
+
+        Returns:
+            словарь метрик, статус-код.
+        """
+        return collect_metrics(), HTTPStatus.OK
+
+
+api.add_resource(ServiceMetricsAPI, '/')
@@ -1,18 +1,24 @@
 """Модуль содержит в себе API для работы с ролями."""
 
 from http import HTTPStatus
+from uuid import UUID
 
 from flask import Blueprint, Flask
 from flask_restful import Resource, Api
 from flask_jwt_extended import jwt_required, get_jwt
 from jwt.exceptions import PyJWTError
 
-from schemes import permission_response_schema, PermissionsResponseSchema
+from core.config import DB_SETTINGS
+from schemes import (
+    permission_response_schema, PermissionsResponseSchema, batch_permissions_response_schema,
+    BatchPermissionsResponseSchema,
+)
 from services.circuit_breaker.circuit import circuit_breaker
 from services.http_exceptions.decorators import http_exceptions_handler
-from services.http_exceptions.common_exceptions import MissingEntity
+from services.http_exceptions.auth_exceptions import PermissionDenied
+from services.http_exceptions.common_exceptions import MissingEntity, InvalidData
 from services.request_parser import get_request_params, ParserParam
-from services.permissions.utils import get_user_permissions_by_scope
+from services.permissions.utils import get_user_permissions_by_scope, get_users_permissions_by_scopes
 from services.utils import fallback_exception_response
 
 user_permissions_blueprint = Blueprint('permissions', __name__)
@@ -56,4 +62,53 @@ class UserPermissionsAPI(Resource):
         return permission_response_schema.dump(dict(**permissions)), HTTPStatus.OK
 
 
+class UsersPermissionsBatchAPI(Resource):
+    """Класс для пакетного запроса разрешений."""
+
+    MAX_USERS = 100
+
+    @circuit_breaker(fallback_function=fallback_exception_response, excluded_exceptions=(PyJWTError,))
+    @jwt_required(optional=True, fresh=True)
+    @http_exceptions_handler()
+    def post(self) -> tuple[BatchPermissionsResponseSchema, HTTPStatus]:
+        """
+        Метод, который получает разрешения сразу на несколько областей (scopes).
+        Без токена выдаются разрешения роли `incognito`, с токеном - разрешения пользователя из токена.
+        Администратор может передать список `user_ids` и получить разрешения этих пользователей.
+
+        Args:
+            access_token [optional]: токен доступа пользователя
+            scopes: области разрешения
+            user_ids [optional]: ID пользователей, только для администратора
+
+        Returns:
+            словарь с разрешениями по ID пользователей и областям (scopes)"""
+
+        request_body = get_request_params(
+            ParserParam('scopes', dict(type=str, location='json', action='append', required=True)),
+            ParserParam('user_ids', dict(type=list, location='json')),
+        )
+
+        token_data = get_jwt()
+        identity = token_data.get('sub') if token_data else {}
+        user_ids = request_body.get('user_ids')
+
+        if user_ids:
+            if DB_SETTINGS.admin not in identity.get('user_roles', []):
+                raise PermissionDenied('С текущими правами доступ запрещен', HTTPStatus.FORBIDDEN)
+            if len(user_ids) > self.MAX_USERS:
+                raise InvalidData(f'Можно запросить не больше {self.MAX_USERS} пользователей.', HTTPStatus.BAD_REQUEST)
+            try:
+                user_ids = [str(UUID(str(user_id))) for user_id in user_ids]
+            except ValueError:
+                raise InvalidData('Некорректный идентификатор пользователя.', HTTPStatus.BAD_REQUEST)
+        elif identity:
+            user_ids = [identity.get('user_id')]
+
+        permissions = get_users_permissions_by_scopes(request_body.get('scopes'), user_ids)
+
+        return batch_permissions_response_schema.dump(dict(result=permissions)), HTTPStatus.OK
+
+
 api.add_resource(UserPermissionsAPI, '/')
+api.add_resource(UsersPermissionsBatchAPI, '/batch')
@@ -1,22 +1,27 @@
 """Модуль содержит в себе API для работы с ролями."""
+import codecs
 from datetime import timedelta
 from http import HTTPStatus
 from uuid import UUID
 
-from flask import Blueprint, Flask
+from flask import Blueprint, Flask, Response, request, stream_with_context
 from flask_restful import Resource, Api
 from flask_jwt_extended import jwt_required
 from jwt import PyJWTError
 
+from core.config import USER_IMPORT_SETTINGS
 from db import transaction, tat_storage
-from schemes import base_schema, BaseResponseSchema, RoleSchema
+from schemes import base_schema, BaseResponseSchema, RoleSchema, import_users_schema, revoked_sessions_schema
+from services.auth.auth import revoke_user_sessions
 from services.circuit_breaker.circuit import circuit_breaker
+from services.http_exceptions.common_exceptions import InvalidData
 from services.http_exceptions.decorators import http_exceptions_handler
 from services.rate_limit.gcra import rate_limit_requests
 from services.request_parser import get_request_params, ParserParam, limit_type, page_type
 from services.role.utils import get_user_roles
 
 from services.user.decorators import admin_required
+from services.user.provisioning import CSV_FORMAT, NDJSON_FORMAT, UserImporter, read_records
 from services.user.utils import add_roles_to_user, delete_roles_from_user, InfoUsersList
 from services.utils import fallback_exception_response, SearchInfoUserParams
 
@@ -117,13 +122,98 @@ class InfoUsers(Resource):
         request_body = get_request_params(
             ParserParam(SearchInfoUserParams.USER_IDS.value, dict(type=str, location='args', action='append')),
             ParserParam(SearchInfoUserParams.USER_GROUPS.value, dict(type=str, location='args', action='append')),
-            ParserParam(SearchInfoUserParams.PAGE_NUMBER.value, dict(type=page_type, location='args', required=True)),
+            ParserParam(SearchInfoUserParams.PAGE_NUMBER.value, dict(type=page_type, location='args')),
+            ParserParam(SearchInfoUserParams.CURSOR.value, dict(type=str, location='args')),
             ParserParam(SearchInfoUserParams.LIMIT.value, dict(type=limit_type, location='args', required=True))
         )
         infos = InfoUsersList(request_body)
         return infos.get()
 
 
+class InfoUsersExport(Resource):
+    """Класс предоставляющий выгрузку персональной информации о пользователях."""
+
+    @circuit_breaker(fallback_function=fallback_exception_response, excluded_exceptions=(PyJWTError,))
+    @jwt_required()
+    @http_exceptions_handler()
+    @rate_limit_requests(tat_storage=tat_storage, limit_requests=10, period=timedelta(seconds=60))
+    @admin_required
+    def get(self) -> Response:
+        """
+        Метод выгружает всех пользователей, подходящих под параметры поиска, потоком в формате NDJSON.
+
+        Returns:
+            Потоковый ответ, по одному пользователю в строке
+        """
+
+        request_body = get_request_params(
+            ParserParam(SearchInfoUserParams.USER_IDS.value, dict(type=str, location='args', action='append')),
+            ParserParam(SearchInfoUserParams.USER_GROUPS.value, dict(type=str, location='args', action='append')),
+        )
+        infos = InfoUsersList(request_body)
+        return Response(stream_with_context(infos.export()), mimetype='application/x-ndjson')
+
+
+class UsersSessionsRevokeAPI(Resource):
+    """Класс позволяет администратору завершить все сессии выбранных пользователей."""
+
+    @circuit_breaker(fallback_function=fallback_exception_response, excluded_exceptions=(PyJWTError,))
+    @jwt_required(fresh=True)
+    @http_exceptions_handler()
+    @rate_limit_requests(tat_storage=tat_storage, limit_requests=100, period=timedelta(seconds=60))
+    @admin_required
+    def post(self) -> tuple[dict, HTTPStatus]:
+        """
+        Метод завершает все сессии пользователей из переданного списка.
+
+        Returns:
+            количество завершенных сессий, статус-код.
+        """
+        request_body = get_request_params(
+            ParserParam('user_ids', dict(type=list, location='json', required=True)),
+        )
+
+        try:
+            user_ids = [UUID(str(user_id)) for user_id in request_body.get('user_ids')]
+        except ValueError:
+            raise InvalidData('Некорректный идентификатор пользователя.', HTTPStatus.BAD_REQUEST)
+
+        revoked = revoke_user_sessions(user_ids)
+
+        return revoked_sessions_schema.dump(dict(
+            msg='Сессии пользователей были завершены',
+            revoked=revoked,
+        )), HTTPStatus.OK
+
+
+class UsersImportAPI(Resource):
+    """Класс позволяет администратору массово импортировать пользователей."""
+
+    @circuit_breaker(fallback_function=fallback_exception_response, excluded_exceptions=(PyJWTError,))
+    @jwt_required(fresh=True)
+    @http_exceptions_handler()
+    @rate_limit_requests(tat_storage=tat_storage, limit_requests=10, period=timedelta(seconds=60))
+    @admin_required
+    def post(self) -> tuple[dict, HTTPStatus]:
+        """
+        Метод импортирует пользователей из тела запроса в формате NDJSON или CSV (по заголовку Content-Type).
+
+        Пароли принимаются только хэшем в поле `password_hash` (см. services.user.provisioning).
+
+        Returns:
+            количество созданных пользователей и ошибки по строкам, статус-код.
+        """
+        data_format = CSV_FORMAT if request.mimetype == 'text/csv' else NDJSON_FORMAT
+        lines = codecs.iterdecode(request.stream, 'utf-8')
+
+        result = UserImporter(USER_IMPORT_SETTINGS.batch_size).run(read_records(lines, data_format))
+
+        return import_users_schema.dump(dict(
+            msg='Пользователи были импортированы',
+            **result,
+        )), HTTPStatus.OK
+
+
 api.add_resource(
     UserRolesListAPI,
     '/<uuid:user_id>/roles/',
@@ -131,3 +221,6 @@ api.add_resource(
     '/<uuid:user_id>/roles/delete',
 )
 api.add_resource(InfoUsers, '/user-infos')
+api.add_resource(InfoUsersExport, '/user-infos/export')
+api.add_resource(UsersSessionsRevokeAPI, '/sessions/revoke')
+api.add_resource(UsersImportAPI, '/import')
@@ -3,6 +3,10 @@ from gevent import monkey
 
 monkey.patch_all()
 
+import atexit
+import signal
+
+import gevent
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from flask_restful import Api
@@ -11,10 +15,14 @@ from api.v1.account import account_blueprint
 from api.v1.oauth import oauth_blueprint
 from api.v1.roles import role_blueprint, roles_blueprint
 from api.v1.users import users_blueprint
+from api.v1.metrics import metrics_blueprint
 from api.v1.permissions import user_permissions_blueprint
-from db import blocklist
-from core.config import JWT_SETTINGS, APP_SETTINGS
-from services.utils import create_admin_user, create_roles, exclude_for_test
+from db import db_session, engine, revocation_checker, user_roles_cache, permission_matrix
+from core.config import JWT_SETTINGS, APP_SETTINGS, AUTH_HISTORY_SETTINGS, HISTORY_PARTITION_SETTINGS
+from services.metrics.queries import count_queries
+from services.passwords.utils import password_policy
+from services.user_history.utils import auth_history_writer, history_partition_manager
+from services.utils import exclude_for_test
 
 from gevent.pywsgi import WSGIServer
 
@@ -23,27 +31,16 @@ from opentelemetry.instrumentation.flask import FlaskInstrumentor
 from services.jaeger.tracer import configure_tracer, setup_tracer
 
 
-exclude_for_test(configure_tracer)()
-app = Flask(__name__)
-
-exclude_for_test(FlaskInstrumentor().instrument_app)(app)
-
-
-@app.before_request
 def before_request():
     """Метод проверяет полученные запросы."""
     exclude_for_test(setup_tracer)()
 
 
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = JWT_SETTINGS.access_token_expires
-app.config['JWT_REFRESH_TOKEN_EXPIRES'] = JWT_SETTINGS.refresh_token_expires
-app.config['JWT_SECRET_KEY'] = JWT_SETTINGS.secret_key.encode('utf-8')
+def remove_db_session(exception: BaseException | None):
+    """Метод закрывает сессию запроса и возвращает ее соединение в пул."""
+    db_session.remove()
 
-api = Api(app, errors=Flask.errorhandler)
-jwt = JWTManager(app)
 
-
-@jwt.token_in_blocklist_loader
 def is_token_revoked(jwt_header, jwt_payload: dict) -> bool:
     """
     Функция проверяет, что токен находится в блок-листе.
@@ -54,6 +51,10 @@ def is_token_revoked(jwt_header, jwt_payload: dict) -> bool:
     рефреш токены добавляются в блоклист, соответственно все аксесс токены, которые
     на них ссылаются, тоже становятся недоступны.
 
+    Проверка идет через локальный кэш воркера (см. services.revocation.checker),
+    поэтому на большинство запросов Redis не вызывается, а оба jti, которых нет в кэше,
+    проверяются в блоклисте одним запросом.
+
     Args:
         jwt_header: заголовок токена.
         jwt_payload: тело токена.
@@ -62,30 +63,78 @@ def is_token_revoked(jwt_header, jwt_payload: dict) -> bool:
         bool: True - в блок-листе, False - токен не в блок-листе.
     """
     jti = jwt_payload.get('jti')
-    is_token_in_blocklist = blocklist.get(jti) is not None
-
     refresh_jti = jwt_payload.get('sub', {}).get('refresh_jti')
-    is_refresh_token_in_blocklist = blocklist.get(refresh_jti) is not None if refresh_jti else False
 
-    return is_token_in_blocklist or is_refresh_token_in_blocklist
+    return revocation_checker.is_any_revoked(jti, refresh_jti)
 
 
-app.register_blueprint(role_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/role')
-app.register_blueprint(roles_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/roles')
-app.register_blueprint(users_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/users')
-app.register_blueprint(account_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/account')
-app.register_blueprint(user_permissions_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/user-permissions')
-app.register_blueprint(oauth_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/oauth')
+def create_app() -> Flask:
+    """
+    Функция создает приложение: настройки JWT, обработчики запросов и ручки.
+
+    Создание приложения не обращается к БД и Redis: соединения открываются при первом запросе,
+    фоновые задачи воркера запускает init_app, а схему БД - миграции (см. migrate.py).
+
+    Returns:
+        Flask: приложение.
+    """
+    exclude_for_test(configure_tracer)()
+    app = Flask(__name__)
+
+    exclude_for_test(FlaskInstrumentor().instrument_app)(app)
+    app.before_request(before_request)
+    app.teardown_appcontext(remove_db_session)
+
+    if APP_SETTINGS.test.lower() == 'true':
+        count_queries(app, engine)
+
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = JWT_SETTINGS.access_token_expires
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = JWT_SETTINGS.refresh_token_expires
+    app.config['JWT_SECRET_KEY'] = JWT_SETTINGS.secret_key.encode('utf-8')
+
+    Api(app, errors=Flask.errorhandler)
+    jwt = JWTManager(app)
+    jwt.token_in_blocklist_loader(is_token_revoked)
+
+    app.register_blueprint(role_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/role')
+    app.register_blueprint(roles_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/roles')
+    app.register_blueprint(users_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/users')
+    app.register_blueprint(account_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/account')
+    app.register_blueprint(user_permissions_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/user-permissions')
+    app.register_blueprint(oauth_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/oauth')
+    app.register_blueprint(metrics_blueprint, url_prefix=f'{APP_SETTINGS.api_prefix_v1}/metrics')
+
+    return app
+
+
+def init_app(app: Flask):
+    """
+    Функция запускает фоновые задачи воркера, обслуживающего приложение.
+
+    Вызывается один раз в процессе воркера перед обработкой запросов: подписки на каналы Redis,
+    фоновая запись истории входов и обслуживание партиций открывают соединения уже после старта,
+    а калибровка стоимости хэширования паролей занимает процессор на время замера.
+
+    Args:
+        app: приложение.
+    """
+    revocation_checker.start()
+    user_roles_cache.start()
+    permission_matrix.start()
+    auth_history_writer.start()
+    atexit.register(auth_history_writer.stop, AUTH_HISTORY_SETTINGS.drain_timeout)
+    history_partition_manager.start(HISTORY_PARTITION_SETTINGS.check_interval)
+    password_policy.calibrate()
+    app.logger.info('Фоновые задачи воркера запущены')
 
 
 if __name__ == '__main__':
-    create_admin_user()
-    create_roles()
-    # create_scopes()
-    # create_permissions()
+    app = create_app()
+    init_app(app)
 
     if APP_SETTINGS.debug.lower() == 'true':
         app.run(host=APP_SETTINGS.host, port=APP_SETTINGS.port)
     else:
         http_server = WSGIServer((APP_SETTINGS.host, APP_SETTINGS.port), app)
+        gevent.signal_handler(signal.SIGTERM, http_server.stop)
         http_server.serve_forever()
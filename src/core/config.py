@@ -30,6 +30,11 @@ class DataBaseSettings(BaseSettings):
     oauth_redis_host: str = Field(..., env='OAUTH_REDIS_HOST')
     oauth_redis_port: int = Field(..., env='OAUTH_REDIS_PORT')
 
+    redis_db: int = Field(0, env='REDIS_DB')
+    refresh_redis_db: int = Field(0, env='REFRESH_REDIS_DB')
+    rate_limit_redis_db: int = Field(0, env='RATE_LIMIT_REDIS_DB')
+    oauth_redis_db: int = Field(0, env='OAUTH_REDIS_DB')
+
     jaeger_host: str = Field(..., env='JAEGER_HOST')
     jaeger_port: int = Field(..., env='JAEGER_PORT')
     jaeger_telemetry_sdk_language: str = Field(..., env='JAEGER_TELEMETRY_SDK_LANGUAGE')
@@ -57,6 +62,8 @@ class JWTSettings(BaseSettings):
     secret_key: str = Field(..., env='JWT_SECRET_KEY')
     hidden_access_token_expires: int = Field(..., env='JWT_ACCESS_TOKEN_EXPIRES')
     hidden_refresh_token_expires: int = Field(..., env='JWT_REFRESH_TOKEN_EXPIRES')
+    embed_permissions: bool = Field(False, env='JWT_EMBED_PERMISSIONS')
+    access_token_max_bytes: int = Field(2048, env='JWT_ACCESS_TOKEN_MAX_BYTES')
 
     @cached_property
     def access_token_expires(self) -> timedelta:
@@ -73,6 +80,170 @@ class JWTSettings(BaseSettings):
         env_file = project_env
 
 
+class RevocationSettings(BaseSettings):
+    """Класс настроек для проверки отозванных токенов"""
+
+    channel: str = Field('blocklist:revoked', env='REVOCATION_CHANNEL')
+    cache_max_size: int = Field(100_000, env='REVOCATION_CACHE_MAX_SIZE')
+    hidden_cache_staleness: int = Field(5000, env='REVOCATION_CACHE_STALENESS_MS')
+
+    prefilter_enabled: bool = Field(True, env='REVOCATION_PREFILTER_ENABLED')
+    prefilter_buckets: int = Field(8, env='REVOCATION_PREFILTER_BUCKETS')
+    prefilter_bucket_capacity: int = Field(100_000, env='REVOCATION_PREFILTER_BUCKET_CAPACITY')
+    prefilter_error_rate: float = Field(0.01, env='REVOCATION_PREFILTER_ERROR_RATE')
+
+    @cached_property
+    def cache_staleness(self) -> timedelta:
+        """Метод определяет, сколько можно доверять закэшированному ответу "токен не отозван"."""
+        return timedelta(milliseconds=self.hidden_cache_staleness)
+
+    class Config:
+        keep_untouched = (cached_property,)
+        env_file = project_env
+
+
+class RedisPoolSettings(BaseSettings):
+    """Класс настроек для пулов соединений с Redis"""
+
+    max_connections: int = Field(50, env='REDIS_POOL_MAX_CONNECTIONS')
+    timeout: float = Field(5.0, env='REDIS_POOL_TIMEOUT')
+    socket_timeout: float = Field(2.0, env='REDIS_SOCKET_TIMEOUT')
+    socket_connect_timeout: float = Field(1.0, env='REDIS_SOCKET_CONNECT_TIMEOUT')
+    socket_keepalive: bool = Field(True, env='REDIS_SOCKET_KEEPALIVE')
+    health_check_interval: int = Field(30, env='REDIS_HEALTH_CHECK_INTERVAL')
+    retries: int = Field(3, env='REDIS_RETRIES')
+    retry_backoff_base: float = Field(0.05, env='REDIS_RETRY_BACKOFF_BASE')
+    retry_backoff_cap: float = Field(1.0, env='REDIS_RETRY_BACKOFF_CAP')
+
+    class Config:
+        env_file = project_env
+
+
+class DataBaseEngineSettings(BaseSettings):
+    """Класс настроек для пула соединений с Postgres"""
+
+    pool_size: int = Field(20, env='PG_POOL_SIZE')
+    max_overflow: int = Field(10, env='PG_POOL_MAX_OVERFLOW')
+    pool_timeout: float = Field(5.0, env='PG_POOL_TIMEOUT')
+    pool_recycle: int = Field(1800, env='PG_POOL_RECYCLE')
+    pool_pre_ping: bool = Field(True, env='PG_POOL_PRE_PING')
+    statement_timeout_ms: int = Field(30_000, env='PG_STATEMENT_TIMEOUT_MS')
+    application_name: str = Field('auth', env='PG_APPLICATION_NAME')
+
+    class Config:
+        env_file = project_env
+
+
+class PasswordHashingSettings(BaseSettings):
+    """Класс настроек для хэширования паролей"""
+
+    workers: int = Field(os.cpu_count() or 1, env='PASSWORD_HASHING_WORKERS')
+    max_queue: int = Field(32, env='PASSWORD_HASHING_MAX_QUEUE')
+
+    algorithm: str = Field('bcrypt', env='PASSWORD_HASH_ALGORITHM')
+    cost: int | None = Field(None, env='PASSWORD_HASH_COST')
+    target_ms: float = Field(250, env='PASSWORD_HASH_TARGET_MS')
+
+    class Config:
+        env_file = project_env
+
+
+class RolesCacheSettings(BaseSettings):
+    """Класс настроек для кэша ролей пользователей"""
+
+    enabled: bool = Field(True, env='ROLES_CACHE_ENABLED')
+    channel: str = Field('roles:invalidated', env='ROLES_CACHE_CHANNEL')
+    max_size: int = Field(100_000, env='ROLES_CACHE_MAX_SIZE')
+    hidden_local_ttl: int = Field(30, env='ROLES_CACHE_LOCAL_TTL_SEC')
+    hidden_shared_ttl: int = Field(600, env='ROLES_CACHE_SHARED_TTL_SEC')
+
+    @cached_property
+    def local_ttl(self) -> timedelta:
+        """Метод определяет, сколько хранить роли в кэше воркера."""
+        return timedelta(seconds=self.hidden_local_ttl)
+
+    @cached_property
+    def shared_ttl(self) -> timedelta:
+        """Метод определяет, сколько хранить роли в общем кэше в Redis."""
+        return timedelta(seconds=self.hidden_shared_ttl)
+
+    class Config:
+        keep_untouched = (cached_property,)
+        env_file = project_env
+
+
+class PermissionMatrixSettings(BaseSettings):
+    """Класс настроек для матрицы разрешений"""
+
+    channel: str = Field('permissions:invalidated', env='PERMISSION_MATRIX_CHANNEL')
+    hidden_max_age: int = Field(300, env='PERMISSION_MATRIX_MAX_AGE_SEC')
+
+    @cached_property
+    def max_age(self) -> timedelta:
+        """Метод определяет, как часто перечитывать матрицу разрешений без событий об изменениях."""
+        return timedelta(seconds=self.hidden_max_age)
+
+    class Config:
+        keep_untouched = (cached_property,)
+        env_file = project_env
+
+
+class AuthHistorySettings(BaseSettings):
+    """Класс настроек для записи истории входов"""
+
+    async_enabled: bool = Field(True, env='AUTH_HISTORY_ASYNC')
+    batch_size: int = Field(500, env='AUTH_HISTORY_BATCH_SIZE')
+    max_queue: int = Field(10_000, env='AUTH_HISTORY_MAX_QUEUE')
+    hidden_flush_interval: int = Field(1000, env='AUTH_HISTORY_FLUSH_INTERVAL_MS')
+    hidden_retry_delay: int = Field(1000, env='AUTH_HISTORY_RETRY_DELAY_MS')
+    hidden_drain_timeout: int = Field(10, env='AUTH_HISTORY_DRAIN_TIMEOUT_SEC')
+
+    @cached_property
+    def flush_interval(self) -> timedelta:
+        """Метод определяет, как долго копить события истории входов перед записью неполной пачки."""
+        return timedelta(milliseconds=self.hidden_flush_interval)
+
+    @cached_property
+    def retry_delay(self) -> timedelta:
+        """Метод определяет паузу перед повторной записью пачки после ошибки."""
+        return timedelta(milliseconds=self.hidden_retry_delay)
+
+    @cached_property
+    def drain_timeout(self) -> timedelta:
+        """Метод определяет, сколько ждать записи оставшихся событий при остановке сервиса."""
+        return timedelta(seconds=self.hidden_drain_timeout)
+
+    class Config:
+        keep_untouched = (cached_property,)
+        env_file = project_env
+
+
+class UserAgentSettings(BaseSettings):
+    """Класс настроек для определения устройства по user agent"""
+
+    cache_max_size: int = Field(10_000, env='USER_AGENT_CACHE_MAX_SIZE')
+    hidden_cache_ttl: int = Field(86_400, env='USER_AGENT_CACHE_TTL_SEC')
+
+    @cached_property
+    def cache_ttl(self) -> timedelta:
+        """Метод определяет, сколько хранить результат разбора user agent."""
+        return timedelta(seconds=self.hidden_cache_ttl)
+
+    class Config:
+        keep_untouched = (cached_property,)
+        env_file = project_env
+
+
+class UserImportSettings(BaseSettings):
+    """Класс настроек для массового импорта пользователей"""
+
+    batch_size: int = Field(10_000, env='USER_IMPORT_BATCH_SIZE')
+    hashing_processes: int = Field(os.cpu_count() or 1, env='USER_IMPORT_HASHING_PROCESSES')
+
+    class Config:
+        env_file = project_env
+
+
 class AppSettings(BaseSettings):
     """Класс настроек для приложения"""
 
@@ -142,6 +313,24 @@ class YandexParamsCode(BaseParamsCode):
         env_file = project_env
 
 
+class HistoryPartitionSettings(BaseSettings):
+    """Класс настроек для партиций истории входов по месяцам"""
+
+    premake_months: int = Field(3, env='HISTORY_PARTITIONS_PREMAKE_MONTHS')
+    retention_months: int = Field(0, env='HISTORY_PARTITIONS_RETENTION_MONTHS')
+    retention_action: str = Field('detach', env='HISTORY_PARTITIONS_RETENTION_ACTION')
+    hidden_check_interval: int = Field(3600, env='HISTORY_PARTITIONS_CHECK_INTERVAL_SEC')
+
+    @cached_property
+    def check_interval(self) -> timedelta:
+        """Метод определяет интервал между проверками партиций истории входов."""
+        return timedelta(seconds=self.hidden_check_interval)
+
+    class Config:
+        keep_untouched = (cached_property,)
+        env_file = project_env
+
+
 class BaseParamsToken(BaseSettings):
     """Базовый класс с обязательными атрибутами для получения токена."""
 
@@ -154,6 +343,16 @@ class BaseParamsToken(BaseSettings):
 
 DB_SETTINGS = DataBaseSettings()
 JWT_SETTINGS = JWTSettings()
+REVOCATION_SETTINGS = RevocationSettings()
+REDIS_POOL_SETTINGS = RedisPoolSettings()
+DB_ENGINE_SETTINGS = DataBaseEngineSettings()
+PASSWORD_HASHING_SETTINGS = PasswordHashingSettings()
+ROLES_CACHE_SETTINGS = RolesCacheSettings()
+PERMISSION_MATRIX_SETTINGS = PermissionMatrixSettings()
+USER_IMPORT_SETTINGS = UserImportSettings()
+AUTH_HISTORY_SETTINGS = AuthHistorySettings()
+USER_AGENT_SETTINGS = UserAgentSettings()
+HISTORY_PARTITION_SETTINGS = HistoryPartitionSettings()
 APP_SETTINGS = AppSettings()
 
 VK_CONFIG = dict(VKParams())
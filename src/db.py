@@ -1,42 +1,90 @@
-"""Модуль инициализирует подключение к БД."""
+"""
+Модуль инициализирует подключение к БД.
+
+Импорт модуля не обращается к БД и Redis: соединения открываются пулами при первом запросе.
+Схема и таблицы создаются миграциями (см. migrate.py), а не при импорте.
+"""
+
+from functools import partial
 
 from redis import Redis
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy.schema import CreateSchema
 
-from core.config import DB_SETTINGS
+from core.config import (
+    DB_SETTINGS, DB_ENGINE_SETTINGS, JWT_SETTINGS, REVOCATION_SETTINGS, REDIS_POOL_SETTINGS, ROLES_CACHE_SETTINGS,
+    PERMISSION_MATRIX_SETTINGS,
+)
+from services.metrics.registry import register_metrics_source
+from services.permissions.matrix import PermissionMatrix
+from services.revocation.bloom import TimeBucketedBloomFilter
+from services.revocation.checker import RevocationChecker
+from services.role.cache import UserRolesCache
+from services.sessions.index import SessionIndex
+from services.storages.key_value.connections import RedisConnectionManager
 from services.storages.key_value.redis_storage import RedisStorage
 from services.storages.key_value.utils import get_key_value_storage_by_client
+from services.storages.relational.connections import create_db_engine
 
 Base = declarative_base()
 
-engine = create_engine(DB_SETTINGS.pg_dsn)
-schema = DB_SETTINGS.pg_schema
-
-if not engine.dialect.has_schema(connect := engine.connect(), schema):
-    with connect as connection:
-        connection.execute(CreateSchema(schema))
-        connection.commit()
+engine = create_db_engine(DB_SETTINGS.pg_dsn, DB_ENGINE_SETTINGS)
+register_metrics_source('db_pool', lambda: engine.pool.stats())
 
-Base.metadata.create_all(engine)
+redis_connections = RedisConnectionManager(REDIS_POOL_SETTINGS)
+register_metrics_source('redis_pools', redis_connections.stats)
 
-
-blocklist_client = Redis(host=DB_SETTINGS.redis_host, port=DB_SETTINGS.redis_port, decode_responses=True)
-refresh_list_client = Redis(
-    host=DB_SETTINGS.refresh_redis_host, port=DB_SETTINGS.refresh_redis_port, decode_responses=True
+blocklist_client = redis_connections.client(
+    'blocklist', DB_SETTINGS.redis_host, DB_SETTINGS.redis_port, DB_SETTINGS.redis_db
+)
+refresh_list_client = redis_connections.client(
+    'refresh_list', DB_SETTINGS.refresh_redis_host, DB_SETTINGS.refresh_redis_port, DB_SETTINGS.refresh_redis_db
 )
-oauth_client = Redis(
-    host=DB_SETTINGS.oauth_redis_host, port=DB_SETTINGS.oauth_redis_port, decode_responses=True
+oauth_client = redis_connections.client(
+    'oauth', DB_SETTINGS.oauth_redis_host, DB_SETTINGS.oauth_redis_port, DB_SETTINGS.oauth_redis_db
 )
 
 blocklist: RedisStorage = get_key_value_storage_by_client(blocklist_client)
 refresh_list: RedisStorage = get_key_value_storage_by_client(refresh_list_client)
 oauth_tokens_storage: RedisStorage = get_key_value_storage_by_client(oauth_client)
 
-tat_storage: Redis = Redis(
-    host=DB_SETTINGS.rate_limit_redis_host, port=DB_SETTINGS.rate_limit_redis_port, decode_responses=True
+session_index = SessionIndex(refresh_list_client, lifetime=JWT_SETTINGS.refresh_token_expires)
+
+revocation_checker = RevocationChecker(
+    blocklist=blocklist,
+    client=blocklist_client,
+    channel=REVOCATION_SETTINGS.channel,
+    max_size=REVOCATION_SETTINGS.cache_max_size,
+    staleness=REVOCATION_SETTINGS.cache_staleness,
+    revoked_ttl=JWT_SETTINGS.refresh_token_expires,
+    prefilter_factory=partial(
+        TimeBucketedBloomFilter,
+        lifetime=JWT_SETTINGS.refresh_token_expires,
+        buckets=REVOCATION_SETTINGS.prefilter_buckets,
+        capacity=REVOCATION_SETTINGS.prefilter_bucket_capacity,
+        error_rate=REVOCATION_SETTINGS.prefilter_error_rate,
+    ) if REVOCATION_SETTINGS.prefilter_enabled else None,
+)
+register_metrics_source('revocation', revocation_checker.stats)
+
+user_roles_cache = UserRolesCache(
+    client=refresh_list_client,
+    channel=ROLES_CACHE_SETTINGS.channel,
+    max_size=ROLES_CACHE_SETTINGS.max_size,
+    local_ttl=ROLES_CACHE_SETTINGS.local_ttl,
+    shared_ttl=ROLES_CACHE_SETTINGS.shared_ttl,
+)
+register_metrics_source('roles_cache', user_roles_cache.stats)
+
+permission_matrix = PermissionMatrix(
+    client=refresh_list_client,
+    channel=PERMISSION_MATRIX_SETTINGS.channel,
+    max_age=PERMISSION_MATRIX_SETTINGS.max_age,
+)
+register_metrics_source('permission_matrix', permission_matrix.stats)
+
+tat_storage: Redis = redis_connections.client(
+    'rate_limit', DB_SETTINGS.rate_limit_redis_host, DB_SETTINGS.rate_limit_redis_port, DB_SETTINGS.rate_limit_redis_db
 )
 
 db_session = scoped_session(sessionmaker(
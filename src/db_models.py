@@ -6,7 +6,7 @@ from datetime import datetime
 
 from sqlalchemy import (
     Column, String, DateTime, MetaData, Table,
-    ForeignKey, UniqueConstraint, Index, SmallInteger,
+    ForeignKey, UniqueConstraint, Index, SmallInteger, BigInteger,
     Enum as sql_enum
 )
 from sqlalchemy.dialects.postgresql import UUID
@@ -63,13 +63,16 @@ class User(Base, UUIDMixin, CreatedAtMixin, UpdatedAtMixin):
     patronymic = Column(String(200))
     phone = Column(String(100))
 
-    roles = relationship('Role', secondary=user_role, back_populates='users', collection_class=set, lazy='subquery')
+    roles = relationship('Role', secondary=user_role, back_populates='users', collection_class=set, lazy='raise')
     history = relationship('UserAuthHistory')
 
     def __repr__(self):
         return f'<User {self.email}>'
 
 
+Index('idx_user_created_at_id', User.created_at, User.id)
+
+
 class Role(Base, UUIDMixin, CreatedAtMixin, UpdatedAtMixin):
     """Модель данных для таблицы role"""
 
@@ -81,7 +84,7 @@ class Role(Base, UUIDMixin, CreatedAtMixin, UpdatedAtMixin):
     name = Column(String(200), unique=True, nullable=False)
     description = Column(String(500))
 
-    users = relationship('User', secondary=user_role, back_populates='roles', collection_class=set, lazy='subquery')
+    users = relationship('User', secondary=user_role, back_populates='roles', collection_class=set, lazy='raise')
 
     def __repr__(self):
         return f'<Role {self.name}>'
@@ -101,6 +104,7 @@ class UserAuthHistoryMixin(Base, CreatedAtMixin):
     )
     user_agent = Column(String(1000), nullable=False)
     device_type = Column(String(50), nullable=False, primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, primary_key=True)
 
 
 class UserAuthHistory(UserAuthHistoryMixin):
@@ -119,33 +123,74 @@ class UserAuthHistory(UserAuthHistoryMixin):
 class UserAuthHistoryPC(UserAuthHistoryMixin):
     """
         Модель данных описывает партицию таблицы user_auth_history.
-        Партицирование по столбцу device_type.
+        Партицирование по столбцу device_type, партиции устройств разбиты по месяцам по столбцу created_at
+        (см. services.user_history.partitions).
     """
 
     __tablename__ = 'user_auth_history_pc'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (created_at)'}
     partition_field = 'pc'
 
 
 class UserAuthHistoryMobile(UserAuthHistoryMixin):
     """
         Модель данных описывает партицию таблицы user_auth_history.
-        Партицирование по столбцу device_type.
+        Партицирование по столбцу device_type, партиции устройств разбиты по месяцам по столбцу created_at
+        (см. services.user_history.partitions).
     """
 
     __tablename__ = 'user_auth_history_mobile'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (created_at)'}
     partition_field = 'mobile'
 
 
 class UserAuthHistoryOther(UserAuthHistoryMixin):
     """
         Модель данных описывает партицию таблицы user_auth_history.
-        Партицирование по столбцу device_type.
+        Партицирование по столбцу device_type, партиции устройств разбиты по месяцам по столбцу created_at
+        (см. services.user_history.partitions).
     """
 
     __tablename__ = 'user_auth_history_other'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (created_at)'}
     partition_field = 'other'
 
-Index('idx_user_is_created_at', UserAuthHistory.user_id, UserAuthHistory.created_at, UserAuthHistory.id)
+Index(
+    'idx_user_auth_history_page',
+    UserAuthHistory.user_id,
+    UserAuthHistory.created_at.desc(),
+    UserAuthHistory.id.desc(),
+    postgresql_include=['device_type'],
+)
+
+
+class UserDevice(Base, UUIDMixin):
+    """
+        Модель данных описывает таблицу user_device - сводку истории входов по устройствам пользователя.
+        Обновляется вместе с записью истории входов (см. services.user_history.rollup).
+    """
+
+    __tablename__ = 'user_device'
+    __table_args__ = (
+        UniqueConstraint(
+            'user_id', 'device_type', 'device_family', 'browser_family', 'os_family',
+            name='uc_user_device_unique',
+        ),
+        {'schema': DB_SETTINGS.pg_schema}
+    )
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey(f'{DB_SETTINGS.pg_schema}.user.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    device_type = Column(String(50), nullable=False)
+    device_family = Column(String(255), nullable=False)
+    browser_family = Column(String(255), nullable=False)
+    os_family = Column(String(255), nullable=False)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    logins = Column(BigInteger, nullable=False)
 
 
 class Scope(Base, UUIDMixin, CreatedAtMixin):
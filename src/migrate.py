@@ -0,0 +1,42 @@
+"""
+Модуль подготавливает БД перед запуском сервиса.
+
+Применяет миграции Alembic (схема, таблицы, партиции) и создает админа и роли.
+Запускается один раз перед стартом воркеров: сами воркеры при импорте и запуске DDL не выполняют.
+
+Запуск из папки src:
+    python migrate.py
+"""
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+from services.logs import logs
+from services.utils import create_admin_user, create_roles
+
+logger = logs.get_logger()
+
+ALEMBIC_CONFIG = Path(__file__).parent / 'alembic.ini'
+
+
+def migrate(revision: str = 'head'):
+    """
+    Функция применяет миграции и создает записи, без которых сервис не работает.
+
+    Args:
+        revision: до какой ревизии применить миграции.
+    """
+    config = Config(str(ALEMBIC_CONFIG))
+    config.set_main_option('script_location', str(ALEMBIC_CONFIG.parent / 'migrations'))
+    command.upgrade(config, revision)
+    logger.info('Миграции применены до ревизии %s', revision)
+
+    create_admin_user()
+    create_roles()
+    # create_scopes()
+    # create_permissions()
+
+
+if __name__ == '__main__':
+    migrate()
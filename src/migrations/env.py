@@ -50,6 +50,7 @@ def run_migrations_offline() -> None:
     )
 
     with context.begin_transaction():
+        create_schema()
         context.run_migrations()
 
 
@@ -72,11 +73,18 @@ def run_migrations_online() -> None:
         )
 
         with context.begin_transaction():
+            create_schema()
             context.run_migrations()
 
 
+def create_schema():
+    # Схема сервиса создается до первой миграции: при импорте модулей сервиса к БД не обращаются.
+    context.execute(f'CREATE SCHEMA IF NOT EXISTS {DB_SETTINGS.pg_schema}')
+
+
 def include_object(object, name, type_, reflected, compare_to):
-    if name in ('user_auth_history_pc', 'user_auth_history_mobile', 'user_auth_history_other'):
+    # Партиции истории входов (по устройствам и по месяцам) создаются миграциями и менеджером партиций.
+    if type_ == 'table' and name.startswith('user_auth_history_'):
         return False
 
     return True
@@ -0,0 +1,57 @@
+"""user_auth_history_page_index
+
+Revision ID: 5f0b8e3d7c14
+Revises: d41e7a9c2b05
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import text
+
+from services.user_history.partitions import DEVICE_TYPES, device_partition_name
+
+# revision identifiers, used by Alembic.
+revision = '5f0b8e3d7c14'
+down_revision = 'd41e7a9c2b05'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'auth'
+TABLE = 'user_auth_history'
+INDEX = 'idx_user_auth_history_page'
+COLUMNS = '(user_id, created_at DESC, id DESC) INCLUDE (device_type)'
+
+
+def upgrade() -> None:
+    # Покрывающий индекс для страниц истории входов по курсору (created_at, id).
+    # Индекс партицированной таблицы нельзя построить CONCURRENTLY, поэтому индексы создаются пустыми
+    # на партицированных таблицах (ON ONLY), строятся без блокировки записи на каждой партиции месяца
+    # и присоединяются к родительским. Новые партиции получают индекс автоматически при присоединении.
+    op.execute(f'CREATE INDEX IF NOT EXISTS {INDEX} ON ONLY {SCHEMA}.{TABLE} {COLUMNS}')
+
+    leaves = {}
+    for device_type in DEVICE_TYPES:
+        partition = device_partition_name(TABLE, device_type)
+        op.execute(f'CREATE INDEX IF NOT EXISTS {partition}_page ON ONLY {SCHEMA}.{partition} {COLUMNS}')
+        op.execute(f'ALTER INDEX {SCHEMA}.{INDEX} ATTACH PARTITION {SCHEMA}.{partition}_page')
+
+        leaves[partition] = op.get_bind().execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(:parent)
+        """), {'parent': f'{SCHEMA}.{partition}'}).scalars().all()
+
+    with op.get_context().autocommit_block():
+        for partition, names in leaves.items():
+            for name in names:
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}_page ON {SCHEMA}.{name} {COLUMNS}')
+                op.execute(f'ALTER INDEX {SCHEMA}.{partition}_page ATTACH PARTITION {SCHEMA}.{name}_page')
+
+    # Прежний индекс (user_id, created_at, id) полностью заменяется новым.
+    op.execute(f'DROP INDEX IF EXISTS {SCHEMA}.idx_user_is_created_at')
+
+
+def downgrade() -> None:
+    op.execute(f'CREATE INDEX IF NOT EXISTS idx_user_is_created_at ON {SCHEMA}.{TABLE} (user_id, created_at, id)')
+    op.execute(f'DROP INDEX IF EXISTS {SCHEMA}.{INDEX}')
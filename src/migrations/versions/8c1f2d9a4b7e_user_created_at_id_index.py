@@ -0,0 +1,26 @@
+"""user_created_at_id_index
+
+Revision ID: 8c1f2d9a4b7e
+Revises: 3b4e68223536
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8c1f2d9a4b7e'
+down_revision = '3b4e68223536'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Индекс для постраничной выдачи пользователей по курсору (created_at, id).
+    # Строится без блокировки записи в таблицу, поэтому вне транзакции.
+    with op.get_context().autocommit_block():
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_created_at_id ON auth."user" (created_at, id)')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS auth.idx_user_created_at_id')
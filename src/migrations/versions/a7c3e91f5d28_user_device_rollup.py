@@ -0,0 +1,41 @@
+"""user_device_rollup
+
+Revision ID: a7c3e91f5d28
+Revises: 5f0b8e3d7c14
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e91f5d28'
+down_revision = '5f0b8e3d7c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Сводка истории входов по устройствам. Для истории до этой миграции заполняется командой
+    # python -m services.user_history.rollup
+    op.create_table('user_device',
+                    sa.Column('id', sa.UUID(), nullable=False),
+                    sa.Column('user_id', sa.UUID(), nullable=False),
+                    sa.Column('device_type', sa.String(length=50), nullable=False),
+                    sa.Column('device_family', sa.String(length=255), nullable=False),
+                    sa.Column('browser_family', sa.String(length=255), nullable=False),
+                    sa.Column('os_family', sa.String(length=255), nullable=False),
+                    sa.Column('first_seen', sa.DateTime(), nullable=False),
+                    sa.Column('last_seen', sa.DateTime(), nullable=False),
+                    sa.Column('logins', sa.BigInteger(), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['auth.user.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('id'),
+                    sa.UniqueConstraint('user_id', 'device_type', 'device_family', 'browser_family', 'os_family',
+                                        name='uc_user_device_unique'),
+                    schema='auth'
+                    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_device', schema='auth')
@@ -0,0 +1,89 @@
+"""user_auth_history_monthly_partitions
+
+Revision ID: d41e7a9c2b05
+Revises: 8c1f2d9a4b7e
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+
+from services.user_history.partitions import (
+    DEVICE_TYPES,
+    create_month_partition,
+    default_partition_name,
+    device_partition_name,
+    month_start,
+)
+
+# revision identifiers, used by Alembic.
+revision = 'd41e7a9c2b05'
+down_revision = '8c1f2d9a4b7e'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'auth'
+TABLE = 'user_auth_history'
+# Партиции на месяцы после следующего создаст менеджер партиций при запуске сервиса.
+PREMAKE_MONTHS = 1
+
+
+def upgrade() -> None:
+    # Ключ партиции должен входить в первичный ключ, поэтому created_at становится обязательным.
+    op.execute(f"UPDATE {SCHEMA}.{TABLE} SET created_at = '1970-01-01' WHERE created_at IS NULL")
+    op.execute(f'ALTER TABLE {SCHEMA}.{TABLE} ALTER COLUMN created_at SET NOT NULL')
+    op.execute(f'ALTER TABLE {SCHEMA}.{TABLE} DROP CONSTRAINT {TABLE}_pkey')
+    op.execute(f'ALTER TABLE {SCHEMA}.{TABLE} ADD PRIMARY KEY (id, device_type, created_at)')
+
+    now = datetime.utcnow()
+    boundary = month_start(now)
+
+    for device_type in DEVICE_TYPES:
+        partition = device_partition_name(TABLE, device_type)
+        legacy = f'{partition}_legacy'
+        default = default_partition_name(TABLE, device_type)
+
+        # Существующая партиция устройства становится партицией всей истории до текущего месяца.
+        op.execute(f'ALTER TABLE {SCHEMA}.{TABLE} DETACH PARTITION {SCHEMA}.{partition}')
+        op.execute(f'ALTER TABLE {SCHEMA}.{partition} RENAME TO {legacy}')
+        op.execute(f'ALTER INDEX IF EXISTS {SCHEMA}.{partition}_pkey RENAME TO {legacy}_pkey')
+
+        op.execute(f"""
+            CREATE TABLE {SCHEMA}.{partition} PARTITION OF {SCHEMA}.{TABLE}
+            FOR VALUES IN ('{device_type}') PARTITION BY RANGE (created_at)
+        """)
+        op.execute(f'CREATE TABLE {SCHEMA}.{default} PARTITION OF {SCHEMA}.{partition} DEFAULT')
+
+        # Входы текущего месяца переносятся в партицию по умолчанию, а из нее - в партицию месяца.
+        op.execute(f"""
+            WITH moved AS (
+                DELETE FROM {SCHEMA}.{legacy} WHERE created_at >= '{boundary:%Y-%m-%d}' RETURNING *
+            )
+            INSERT INTO {SCHEMA}.{default} SELECT * FROM moved
+        """)
+        op.execute(f"""
+            ALTER TABLE {SCHEMA}.{partition} ATTACH PARTITION {SCHEMA}.{legacy}
+            FOR VALUES FROM (MINVALUE) TO ('{boundary:%Y-%m-%d}')
+        """)
+
+        for months in range(PREMAKE_MONTHS + 1):
+            create_month_partition(op.get_bind(), SCHEMA, TABLE, device_type, month_start(now, months))
+
+
+def downgrade() -> None:
+    for device_type in DEVICE_TYPES:
+        partition = device_partition_name(TABLE, device_type)
+        op.execute(f'ALTER TABLE {SCHEMA}.{TABLE} DETACH PARTITION {SCHEMA}.{partition}')
+        op.execute(f'ALTER TABLE {SCHEMA}.{partition} RENAME TO {partition}_ranged')
+
+    op.execute(f'ALTER TABLE {SCHEMA}.{TABLE} DROP CONSTRAINT {TABLE}_pkey')
+    op.execute(f'ALTER TABLE {SCHEMA}.{TABLE} ADD PRIMARY KEY (id, device_type)')
+    op.execute(f'ALTER TABLE {SCHEMA}.{TABLE} ALTER COLUMN created_at DROP NOT NULL')
+
+    for device_type in DEVICE_TYPES:
+        partition = device_partition_name(TABLE, device_type)
+        op.execute(f"CREATE TABLE {SCHEMA}.{partition} PARTITION OF {SCHEMA}.{TABLE} FOR VALUES IN ('{device_type}')")
+        op.execute(f'INSERT INTO {SCHEMA}.{partition} SELECT * FROM {SCHEMA}.{partition}_ranged')
+        # Удаление партицированной таблицы удаляет и все ее партиции по месяцам.
+        op.execute(f'DROP TABLE {SCHEMA}.{partition}_ranged')
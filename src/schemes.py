@@ -1,6 +1,6 @@
 from marshmallow import Schema
 
-from db_models import User, Role, UserAuthHistory, Scope, Permissions
+from db_models import User, Role, UserAuthHistory, UserDevice, Scope, Permissions
 
 
 class UserSchema(Schema):
@@ -36,6 +36,14 @@ class UserAuthHistorySchema(Schema):
         model = UserAuthHistory
 
 
+class UserDeviceSchema(Schema):
+    """Класс сериализующий модель `UserDevice`."""
+
+    class Meta:
+        fields = ('device_type', 'device_family', 'browser_family', 'os_family', 'first_seen', 'last_seen', 'logins')
+        model = UserDevice
+
+
 class ScopeSchema(Schema):
     """Класс сериализующий модель `Scope`."""
 
@@ -59,6 +67,13 @@ class PermissionsResponseSchema(Schema):
         fields = ('admin', 'write', 'read')
 
 
+class BatchPermissionsResponseSchema(Schema):
+    """Класс сериализует ответ сервиса на пакетный запрос разрешений."""
+
+    class Meta:
+        fields = ('result',)
+
+
 class TokensSchema(Schema):
     """Класс сериализуюет Токены."""
 
@@ -80,6 +95,20 @@ class BaseResponseSchema(Schema):
         fields = ('msg',)
 
 
+class RevokedSessionsResponseSchema(Schema):
+    """Класс сериализует ответ сервиса на отзыв сессий"""
+
+    class Meta:
+        fields = ('msg', 'revoked')
+
+
+class ImportUsersResponseSchema(Schema):
+    """Класс сериализует ответ сервиса на массовый импорт пользователей"""
+
+    class Meta:
+        fields = ('msg', 'created', 'errors')
+
+
 class ListResponseSchema(Schema):
 
     class Meta:
@@ -95,12 +124,16 @@ class OAuthTokensSchema(Schema):
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
 auth_histories_schema = UserAuthHistorySchema(many=True)
+user_devices_schema = UserDeviceSchema(many=True)
 scope_schema = ScopeSchema()
 permission_schema = PermissionsSchema()
 permission_response_schema = PermissionsResponseSchema()
+batch_permissions_response_schema = BatchPermissionsResponseSchema()
 tokens_schema = TokensSchema()
 access_token_schema = AccessTokenSchema()
 base_schema = BaseResponseSchema()
+revoked_sessions_schema = RevokedSessionsResponseSchema()
+import_users_schema = ImportUsersResponseSchema()
 
 role_schema = RoleSchema()
 roles_schema = RoleSchema(many=True)
@@ -2,59 +2,66 @@
 import uuid
 from http import HTTPStatus
 
+import jwt
 from flask_jwt_extended import create_refresh_token, decode_token, create_access_token
 from sqlalchemy.exc import IntegrityError
 
 from core.config import JWT_SETTINGS, DB_SETTINGS
-from db import refresh_list, blocklist, db_session
+from db import refresh_list, revocation_checker, session_index
 from db_models import User
-from services.storages.key_value.utils import generate_key
-from services.user.utils import is_user_exists, create_user, get_user_by_login, update_user, add_roles_to_user
+from services.auth.token_size import TokenSizeBudget
+from services.metrics.registry import register_metrics_source
+from services.storages.key_value.keys import session_key, legacy_session_keys
+from services.user.utils import is_user_exists, create_user_with_roles, get_user_by_login, update_user
 from services.role.utils import get_user_roles
+from services.permissions.bitmask import pack_permissions
 from services.permissions.config import RoleName
-from services.passwords.utils import get_hash_password, is_correct_password
+from services.permissions.utils import get_access_levels_by_role_names
+from services.passwords.utils import get_hash_password, is_correct_password, is_password_rehash_needed
 from services.http_exceptions.auth_exceptions import IncorrectPassword
-from services.http_exceptions.common_exceptions import MissingUpdatedData, MissingEntity, DuplicatedEntity
+from services.http_exceptions.common_exceptions import (
+    MissingUpdatedData, MissingEntity, DuplicatedEntity, ServiceOverloaded
+)
 from services.user_history.utils import create_user_history
 from services.logs import logs
 
 logger = logs.get_logger()
 
+access_token_budget = TokenSizeBudget(JWT_SETTINGS.access_token_max_bytes)
+register_metrics_source('access_tokens', access_token_budget.stats)
+
 
 def sign_up(user: User):
     """
     Функция отвечает за регистрацию пользователя в системе.
 
-    В случае отсутствия пользователя в системе функция создает пользователя и сохраняет с захэшированным паролем.
+    Пользователь с ролью `user` создается одним запросом (см. create_user_with_roles).
+    Если логин или email заняты, запрос ничего не вставляет, и только тогда проверяется,
+    что именно занято, чтобы вернуть понятную ошибку.
     ВНИМАНИЕ: пароль переданного пользователя в этой функции будет хэшироваться.
 
     Args:
         user: модель пользователя.
-        unhashed_password: пароль пользователя.
 
     Raises:
-        DuplicateAuthData
+        DuplicatedEntity
     """
     logger.info('Регистрация пользователя login: %s, email: %s', user.login, user.email)
 
+    user.password = get_hash_password(user.password)
+
+    if create_user_with_roles(user, [RoleName.USER.value]):
+        return
+
     is_email_exists, is_login_exists = is_user_exists(email=user.email, login=user.login)
 
     err_msg = {
         (True, True): f'Пользователь с {user.email=} и {user.login=} уже существует!',
         (True, False): f'Пользователь с {user.email=} уже существует!',
         (False, True): f'Пользователь с {user.login=} уже существует!'
-    }.get((is_email_exists, is_login_exists))
-
-    if err_msg:
-        raise DuplicatedEntity(err_msg, HTTPStatus.CONFLICT)
-
-    user.password = get_hash_password(user.password)
-    user.id = uuid.uuid4()
-
-    create_user(user)
-    db_session.commit()
+    }.get((is_email_exists, is_login_exists), 'Такой пользователь уже существует!')
 
-    add_roles_to_user(user.id, [RoleName.USER.value])
+    raise DuplicatedEntity(err_msg, HTTPStatus.CONFLICT)
 
 
 def login(user_login: str, user_password: str, user_agent: str) -> tuple[str, str]:
@@ -83,6 +90,9 @@ def login(user_login: str, user_password: str, user_agent: str) -> tuple[str, st
     if not is_correct_password(user_password, user.password):
         raise IncorrectPassword('Введен некорректный пароль!', HTTPStatus.UNAUTHORIZED)
 
+    if is_password_rehash_needed(user.password):
+        _rehash_password(user, user_password)
+
     create_user_history(user, user_agent)
 
     user_roles = [user_role.get('name') for user_role in get_user_roles(user.id)]
@@ -92,6 +102,27 @@ def login(user_login: str, user_password: str, user_agent: str) -> tuple[str, st
     return access_token, refresh_token
 
 
+def _rehash_password(user: User, user_password: str):
+    """
+    Служебная функция. Пересчитывает хэш пароля пользователя по текущей политике хэширования.
+
+    Вызывается после успешной проверки пароля, поэтому открытый пароль известен.
+    Если пул хэширования перегружен, пересчет откладывается до следующего входа.
+
+    Args:
+        user: модель пользователя.
+        user_password: пароль пользователя.
+    """
+    try:
+        new_password_hash = get_hash_password(user_password)
+    except ServiceOverloaded:
+        logger.info('Пересчет хэша пароля пользователя user_id: %s отложен', user.id)
+        return
+
+    update_user(user.id, {'password': new_password_hash})
+    logger.info('Хэш пароля пользователя user_id: %s пересчитан по текущей политике', user.id)
+
+
 def create_tokens(user_id: uuid.UUID, user_agent: str, user_roles: list, user_email: str):
     """
     Функция создаёт access и refresh токены с параметрами и возвращает их.
@@ -113,8 +144,7 @@ def create_tokens(user_id: uuid.UUID, user_agent: str, user_roles: list, user_em
     refresh_token = create_refresh_token(identity=refresh_identity)
     decoded_refresh_token = decode_token(refresh_token)
 
-    refresh_list_key = generate_key(user_id, user_agent)
-    refresh_list.put(refresh_list_key, refresh_token, expire=JWT_SETTINGS.refresh_token_expires)
+    session_index.put(user_id, session_key(user_id, user_agent), refresh_token)
 
     access_identity = dict(
         user_id=user_id,
@@ -128,11 +158,49 @@ def create_tokens(user_id: uuid.UUID, user_agent: str, user_roles: list, user_em
         fresh=True,
         expires_delta=False if DB_SETTINGS.admin in user_roles else None
     )
-    access_token = create_access_token(**access_token_params)
+    access_token = _create_access_token(**access_token_params)
 
     return access_token, refresh_token
 
 
+def _create_access_token(identity: dict, **params) -> str:
+    """
+    Служебная функция. Создает access токен и проверяет его размер.
+
+    Если включен профиль с разрешениями (JWT_EMBED_PERMISSIONS), в токен добавляются упакованные
+    уровни доступа ролей пользователя по всем областям (см. services.permissions.bitmask).
+    Если токен с разрешениями не укладывается в бюджет размера, он выпускается без них:
+    сервисы, не нашедшие разрешений в токене, запрашивают `/user-permissions`.
+
+    Args:
+        identity: данные пользователя для токена, должны содержать `user_roles`.
+        params: остальные параметры create_access_token.
+
+    Returns:
+        str: access токен.
+    """
+    if JWT_SETTINGS.embed_permissions:
+        identity = dict(
+            identity,
+            permissions=pack_permissions(get_access_levels_by_role_names(identity.get('user_roles'))),
+        )
+
+    access_token = create_access_token(identity, **params)
+    if access_token_budget.fits(access_token):
+        return access_token
+
+    logger.warning(
+        'Access токен пользователя user_id: %s превышает бюджет размера: %s байт',
+        identity.get('user_id'),
+        len(access_token),
+    )
+    if 'permissions' in identity:
+        identity = {key: value for key, value in identity.items() if key != 'permissions'}
+        access_token = create_access_token(identity, **params)
+
+    return access_token
+
+
 def logout(access_token_payload: dict):
     """
     Функция добавляет в блоклист акксесс и рефреш токены при логауте.
@@ -143,8 +211,8 @@ def logout(access_token_payload: dict):
     access_jti = access_token_payload.get('jti')
     refresh_jti = access_token_payload.get('sub', {}).get('refresh_jti')
 
-    blocklist.put(access_jti, '', expire=JWT_SETTINGS.access_token_expires)
-    blocklist.put(refresh_jti, '', expire=JWT_SETTINGS.refresh_token_expires)
+    revocation_checker.revoke(access_jti, expire=JWT_SETTINGS.access_token_expires)
+    revocation_checker.revoke(refresh_jti, expire=JWT_SETTINGS.refresh_token_expires)
 
 
 def refresh(refresh_token_payload: dict, refresh_identity: dict) -> str:
@@ -169,7 +237,7 @@ def refresh(refresh_token_payload: dict, refresh_identity: dict) -> str:
             user_roles=user_roles
         )
     )
-    access_token = create_access_token(access_identity, fresh=True)
+    access_token = _create_access_token(access_identity, fresh=True)
     return access_token
 
 
@@ -207,17 +275,20 @@ def update_auth_data(user_id: uuid, new_login: str | None = None, new_password:
         raise DuplicatedEntity('Пользователь с таким логином уже существует.', HTTPStatus.CONFLICT)
 
 
-def logout_user_for_user_agents(user_id: uuid, user_agents: list[str]):
+def logout_user_for_user_agents(user_id: uuid, user_agents: list[str]) -> int:
     """
     Функция осуществляет логаут для указанных устройств.
 
     Если в параметре 'user_agents' будет передано значение ['all'],
-    то произойдет логаут всех активных сессий. Иначе пройдем по списку сессий и выйдем только из тех, которые
-    в нем указаны.
+    то произойдет логаут всех активных сессий: они берутся из индекса сессий пользователя за одно обращение к Redis.
+    Иначе пройдем по списку сессий и выйдем только из тех, которые в нем указаны.
 
     Args:
         user_id: ID пользователя.
         user_agents: устройства юзера для отключения.
+
+    Returns:
+        int: количество завершенных сессий.
     """
     logger.info(
         'Логаут пользователя user_id: %s с устройств %s',
@@ -226,27 +297,61 @@ def logout_user_for_user_agents(user_id: uuid, user_agents: list[str]):
     )
 
     if len(user_agents) == 1 and 'all' in user_agents:
-        for refresh_list_id, refresh_token in refresh_list.get_by_template(f'*{user_id}*'):
-            if refresh_token:
-                _logout_by_refresh_token(refresh_list_id, refresh_token)
-    else:
-        for user_agent in user_agents:
-            refresh_list_id = generate_key(user_id, user_agent)
-            refresh_token = refresh_list.get(refresh_list_id)
-            if refresh_token:
-                _logout_by_refresh_token(refresh_list_id, refresh_token)
+        return revoke_user_sessions([user_id])
 
+    # До завершения миграции ключей сессия могла быть сохранена и под ключом в старом формате.
+    refresh_list_ids = []
+    for user_agent in user_agents:
+        refresh_list_ids += [session_key(user_id, user_agent), *legacy_session_keys(user_id, user_agent)]
 
-def _logout_by_refresh_token(refresh_list_id: str, refresh_token):
+    sessions = [
+        (refresh_list_id, refresh_token)
+        for refresh_list_id, refresh_token in zip(refresh_list_ids, refresh_list.get_many(refresh_list_ids))
+        if refresh_token
+    ]
+
+    revoked = _revoke_refresh_tokens([refresh_token for _, refresh_token in sessions])
+    session_index.delete(user_id, *[refresh_list_id for refresh_list_id, _ in sessions])
+
+    return revoked
+
+
+def revoke_user_sessions(user_ids: list[uuid.UUID | str]) -> int:
     """
-    Служебная функция. Осуществляет логаут для пользователя по его рефреш токену.
+    Функция завершает все сессии указанных пользователей.
+
+    Сессии всех пользователей забираются из хранилища рефреш токенов одним скриптом,
+    а их рефреш токены добавляются в блоклист одной транзакцией.
 
-    Добавляет рефреш токен в блоклист и удаляет его из доступных рефреш токенов.
     Args:
-        refresh_list_id: ID токена в списке рефреш токенов (refresh_list)
-        refresh_token: закодированный токен
+        user_ids: ID пользователей.
+
+    Returns:
+        int: количество завершенных сессий.
     """
-    decoded_refresh_token = decode_token(refresh_token)
-    refresh_jti = decoded_refresh_token.get('jti')
-    blocklist.put(refresh_jti, '', expire=JWT_SETTINGS.refresh_token_expires)
-    refresh_list.delete(refresh_list_id)
+    logger.info('Отзыв всех сессий пользователей %s', user_ids)
+
+    sessions = session_index.pop_all(*user_ids)
+
+    return _revoke_refresh_tokens([refresh_token for _, refresh_token in sessions])
+
+
+def _revoke_refresh_tokens(refresh_tokens: list[str]) -> int:
+    """
+    Служебная функция. Добавляет рефреш токены в блоклист одной транзакцией.
+
+    Подпись токенов не проверяется: они берутся из собственного хранилища рефреш токенов сервиса,
+    а нужен из них только jti.
+
+    Args:
+        refresh_tokens: закодированные токены.
+
+    Returns:
+        int: количество отозванных токенов.
+    """
+    refresh_jtis = [
+        jwt.decode(refresh_token, options={'verify_signature': False}).get('jti')
+        for refresh_token in refresh_tokens
+    ]
+
+    return revocation_checker.revoke_many(refresh_jtis, expire=JWT_SETTINGS.refresh_token_expires)
@@ -0,0 +1,58 @@
+"""
+Модуль содержит проверку размера access токенов.
+
+Access токен передается в заголовке Authorization каждого запроса ко всем сервисам, поэтому его размер
+ограничен бюджетом: прокси и серверы отклоняют слишком большие заголовки, а каждый лишний байт
+умножается на количество запросов. Токены сверх бюджета считаются в метриках.
+"""
+
+
+class TokenSizeBudget:
+    """Класс проверяет размер выпускаемых токенов и собирает статистику."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Инициализирующий метод.
+
+        Args:
+            max_bytes: максимальный размер закодированного токена в байтах.
+        """
+        self._max_bytes = max_bytes
+
+        self._issued = 0
+        self._over_budget = 0
+        self._max_size = 0
+
+    def fits(self, token: str) -> bool:
+        """
+        Метод проверяет, укладывается ли токен в бюджет, и учитывает его размер в статистике.
+
+        Args:
+            token: закодированный токен.
+
+        Returns:
+            bool: True - токен укладывается в бюджет, False - превышает его.
+        """
+        size = len(token)
+        self._issued += 1
+        self._max_size = max(self._max_size, size)
+
+        if size > self._max_bytes:
+            self._over_budget += 1
+            return False
+
+        return True
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает статистику размеров токенов.
+
+        Returns:
+            dict: бюджет, количество выпущенных токенов и токенов сверх бюджета, максимальный размер.
+        """
+        return {
+            'max_bytes': self._max_bytes,
+            'issued': self._issued,
+            'over_budget': self._over_budget,
+            'max_size': self._max_size,
+        }
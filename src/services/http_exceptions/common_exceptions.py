@@ -36,3 +36,11 @@ class MissingRealization(Exception):
 
 class MissingSearchData(HTTPException):
     """Отсутствуют данные для поиска."""
+
+
+class ServiceOverloaded(HTTPException):
+    """Сервис перегружен и временно не принимает запросы."""
+
+
+class UnsupportedPasswordHash(HTTPException):
+    """Хэш пароля построен алгоритмом, который недоступен в сервисе."""
@@ -1,6 +0,0 @@
-"""Модуль содержит исключения связанные с ошибками навигации."""
-from .base import HTTPException
-
-
-class WrongSearchAfter(HTTPException):
-    """Дублирующиеся значения аутентификационных данных."""
@@ -0,0 +1 @@
+"""Инициализирующий модуль пакета для сбора метрик сервиса."""
@@ -0,0 +1,35 @@
+"""
+Модуль содержит подсчет запросов в БД на один HTTP запрос.
+
+Используется в тестовом режиме: количество выполненных запросов возвращается в заголовке ответа,
+и функциональные тесты проверяют, что ручка не делает лишних запросов (например, неявной подгрузки связей).
+"""
+from flask import Flask, Response, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_HEADER = 'X-DB-Query-Count'
+
+
+def count_queries(app: Flask, engine: Engine):
+    """
+    Функция включает подсчет запросов в БД для каждого запроса к приложению.
+
+    Args:
+        app: приложение.
+        engine: подключение к БД, запросы которого считаются.
+    """
+    event.listen(engine, 'before_cursor_execute', _on_cursor_execute)
+    app.after_request(_set_query_count_header)
+
+
+def _on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Служебная функция. Учитывает запрос в БД, выполненный при обработке HTTP запроса."""
+    if has_request_context():
+        g.db_query_count = g.get('db_query_count', 0) + 1
+
+
+def _set_query_count_header(response: Response) -> Response:
+    """Служебная функция. Добавляет в ответ количество запросов в БД."""
+    response.headers[QUERY_COUNT_HEADER] = str(g.get('db_query_count', 0))
+    return response
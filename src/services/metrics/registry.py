@@ -0,0 +1,43 @@
+"""
+Модуль содержит реестр источников метрик сервиса.
+
+Подсистемы регистрируют функции, которые возвращают словарь со своими текущими показателями,
+а ручка метрик собирает их в один ответ.
+"""
+from typing import Callable
+
+from services.logs import logs
+
+logger = logs.get_logger()
+
+_sources: dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics_source(name: str, source: Callable[[], dict]):
+    """
+    Функция регистрирует источник метрик.
+
+    Args:
+        name: название источника, под которым метрики попадут в ответ.
+        source: функция без аргументов, возвращающая словарь метрик.
+    """
+    _sources[name] = source
+
+
+def collect_metrics() -> dict:
+    """
+    Функция собирает метрики со всех зарегистрированных источников.
+
+    Returns:
+        dict: метрики, сгруппированные по названиям источников.
+    """
+    metrics = {}
+
+    for name, source in _sources.items():
+        try:
+            metrics[name] = source()
+        except Exception:
+            logger.warning('Не удалось собрать метрики источника %s', name, exc_info=True)
+            metrics[name] = None
+
+    return metrics
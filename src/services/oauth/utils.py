@@ -3,16 +3,17 @@ from sqlalchemy import select
 
 from db import db_session
 from db_models import User, OAuthUser
+from services.storages.key_value.keys import oauth_token_key
 
 
 def generate_access_token_key_to_oauth_user(provider: str, client_id_user: str) -> str:
     """Метод генерирует ключ для `access` токена для `client_id` конкретного провайдера"""
-    return f'{provider}_{client_id_user}_access'
+    return oauth_token_key(provider, client_id_user, 'access')
 
 
 def generate_refresh_token_key_to_oauth_user(provider: str, client_id_user: str) -> str:
     """Метод генерирует ключ для `refresh` токена для `client_id` конкретного провайдера"""
-    return f'{provider}_{client_id_user}_refresh'
+    return oauth_token_key(provider, client_id_user, 'refresh')
 
 
 def get_user_by_oauth_user(client_id: str) -> User | None:
@@ -0,0 +1,50 @@
+"""
+Модуль содержит курсоры для постраничной выдачи по ключу (keyset pagination).
+
+Вместо номера страницы клиент получает непрозрачный курсор - закодированную пару `(created_at, id)`
+последней записи страницы, и следующая страница выбирается условием `(created_at, id) > курсор`.
+Такой запрос идет по составному индексу и не зависит от глубины страницы, в отличие от OFFSET,
+а `id` делает порядок однозначным для записей с одинаковым временем создания.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from http import HTTPStatus
+from uuid import UUID
+
+from services.http_exceptions.common_exceptions import InvalidData
+
+
+def encode_cursor(created_at: datetime, record_id: UUID) -> str:
+    """
+    Функция кодирует позицию записи в курсор.
+
+    Args:
+        created_at: время создания записи.
+        record_id: ID записи.
+
+    Returns:
+        str: курсор.
+    """
+    value = json.dumps([created_at.isoformat(), str(record_id)], separators=(',', ':'))
+    return urlsafe_b64encode(value.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Функция раскодирует курсор в позицию записи.
+
+    Args:
+        cursor: курсор.
+
+    Returns:
+        tuple[datetime, UUID]: время создания и ID последней записи предыдущей страницы.
+
+    Raises:
+        InvalidData
+    """
+    try:
+        created_at, record_id = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), UUID(record_id)
+    except (ValueError, TypeError):
+        raise InvalidData('Некорректный курсор.', HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,87 @@
+"""
+Модуль содержит пул для хэширования и проверки паролей вне цикла событий gevent.
+
+bcrypt занимает процессор на всё время вычисления хэша, и вызов в гринлете останавливает все остальные запросы воркера.
+bcrypt отпускает GIL на время вычисления, поэтому вычисления выносятся в пул системных потоков gevent:
+цикл событий продолжает обслуживать другие запросы, а хэши считаются параллельно на нескольких ядрах.
+Очередь пула ограничена: если все потоки заняты и очередь заполнена, запрос сразу получает 503,
+а не копится в очереди, увеличивая задержку всех следующих входов.
+"""
+from http import HTTPStatus
+from time import perf_counter
+from typing import Callable
+
+from gevent.threadpool import ThreadPool
+
+from services.http_exceptions.common_exceptions import ServiceOverloaded
+
+
+class PasswordHashingExecutor:
+    """Класс выполняет хэширование паролей в ограниченном пуле потоков."""
+
+    def __init__(self, workers: int, max_queue: int):
+        """
+        Инициализирующий метод.
+
+        Args:
+            workers: количество потоков (обычно равно количеству ядер).
+            max_queue: сколько задач может ждать свободного потока, прежде чем запросы начнут отклоняться.
+        """
+        self._workers = workers
+        self._max_queue = max_queue
+        self._pool: ThreadPool | None = None
+
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_duration = 0.0
+
+    def run(self, func: Callable, *args):
+        """
+        Метод выполняет функцию в пуле и ждет результата, не блокируя остальные гринлеты.
+
+        Args:
+            func: функция хэширования или проверки пароля.
+            args: аргументы функции.
+
+        Returns:
+            результат функции.
+
+        Raises:
+            ServiceOverloaded
+        """
+        if self._pending >= self._workers + self._max_queue:
+            self._rejected += 1
+            raise ServiceOverloaded(
+                'Сервис перегружен, попробуйте позже.',
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                'Очередь проверки паролей заполнена.',
+            )
+
+        if self._pool is None:
+            self._pool = ThreadPool(self._workers)
+
+        self._pending += 1
+        start = perf_counter()
+        try:
+            return self._pool.apply(func, args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+            self._max_duration = max(self._max_duration, perf_counter() - start)
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает загрузку пула.
+
+        Returns:
+            dict: размер пула и очереди, количество задач в работе, выполненных и отклоненных.
+        """
+        return {
+            'workers': self._workers,
+            'max_queue': self._max_queue,
+            'pending': self._pending,
+            'completed': self._completed,
+            'rejected': self._rejected,
+            'max_duration_ms': self._max_duration * 1000,
+        }
@@ -0,0 +1,327 @@
+"""
+Модуль содержит политику хэширования паролей.
+
+Политика определяет алгоритм и стоимость (work factor) хэширования новых паролей. Стоимость может быть задана явно
+или подобрана при старте под целевое время проверки пароля на текущем железе. Алгоритм и стоимость хранятся
+в самом хэше, поэтому пароли, захэшированные по старой политике, продолжают проверяться, а при успешном входе
+хэш ниже текущей политики пересчитывается.
+
+Поддерживаются bcrypt и argon2id. argon2id - опциональная зависимость (пакет argon2-cffi): без нее хэши argon2id
+не принимаются при импорте пользователей, а вход с таким хэшем завершается понятной ошибкой.
+Калибровка берет медиану нескольких замеров на каждую стоимость, чтобы случайная пауза при старте
+не занизила стоимость на все время работы процесса.
+"""
+from abc import ABC, abstractmethod
+from http import HTTPStatus
+from statistics import median
+from time import perf_counter
+
+import bcrypt
+
+from services.http_exceptions.common_exceptions import UnsupportedPasswordHash
+from services.logs import logs
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+logger = logs.get_logger()
+
+
+class PasswordHashBackend(ABC):
+    """Интерфейс алгоритма хэширования паролей с настраиваемой стоимостью."""
+
+    NAME: str
+    MIN_COST: int
+    MAX_COST: int
+    DEFAULT_COST: int
+
+    def __init__(self, cost: int):
+        """
+        Инициализирующий метод.
+
+        Args:
+            cost: стоимость хэширования.
+        """
+        self.cost = cost
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Метод проверяет, что зависимости алгоритма установлены."""
+        return True
+
+    @classmethod
+    @abstractmethod
+    def identify(cls, password_hash: str) -> bool:
+        """
+        Абстрактный метод проверяет, что хэш построен этим алгоритмом.
+
+        Args:
+            password_hash: хэш пароля.
+        """
+        pass
+
+    @abstractmethod
+    def hash(self, password: str) -> str:
+        """
+        Абстрактный метод хэширует пароль с текущей стоимостью.
+
+        Args:
+            password: пароль.
+        """
+        pass
+
+    @abstractmethod
+    def verify(self, password: str, password_hash: str) -> bool:
+        """
+        Абстрактный метод проверяет пароль по хэшу, построенному с любой стоимостью.
+
+        Args:
+            password: пароль.
+            password_hash: хэш пароля.
+        """
+        pass
+
+    @abstractmethod
+    def needs_rehash(self, password_hash: str) -> bool:
+        """
+        Абстрактный метод проверяет, что хэш построен с меньшей стоимостью, чем текущая.
+
+        Args:
+            password_hash: хэш пароля этого алгоритма.
+        """
+        pass
+
+
+class BcryptBackend(PasswordHashBackend):
+    """Алгоритм bcrypt, стоимость - log2 количества раундов."""
+
+    NAME = 'bcrypt'
+    MIN_COST = 10
+    MAX_COST = 16
+    DEFAULT_COST = 12
+
+    @classmethod
+    def identify(cls, password_hash: str) -> bool:
+        return password_hash.startswith(('$2a$', '$2b$', '$2y$'))
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.cost)).decode('utf-8')
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return int(password_hash.split('$')[2]) < self.cost
+
+
+class Argon2Backend(PasswordHashBackend):
+    """Алгоритм argon2id, стоимость - количество проходов (time_cost) при фиксированном объеме памяти."""
+
+    NAME = 'argon2id'
+    MIN_COST = 2
+    MAX_COST = 10
+    DEFAULT_COST = 3
+
+    def __init__(self, cost: int):
+        if argon2 is None:
+            raise RuntimeError('Для хэширования паролей argon2id установите пакет argon2-cffi.')
+
+        super().__init__(cost)
+        self._hasher = argon2.PasswordHasher(time_cost=cost, type=argon2.Type.ID)
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return argon2 is not None
+
+    @classmethod
+    def identify(cls, password_hash: str) -> bool:
+        return password_hash.startswith('$argon2id$')
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        try:
+            return self._hasher.verify(password_hash, password)
+        except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+            return False
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return argon2.extract_parameters(password_hash).time_cost < self.cost
+
+
+BACKENDS: dict[str, type[PasswordHashBackend]] = {
+    BcryptBackend.NAME: BcryptBackend,
+    Argon2Backend.NAME: Argon2Backend,
+}
+
+CALIBRATION_PASSWORD = 'calibration-password'
+CALIBRATION_SAMPLES = 5
+
+
+def measure_verify_time(backend: PasswordHashBackend, samples: int = 1) -> float:
+    """
+    Функция замеряет среднее время проверки пароля в секундах.
+
+    Args:
+        backend: алгоритм с заданной стоимостью.
+        samples: количество замеров.
+    """
+    password_hash = backend.hash(CALIBRATION_PASSWORD)
+
+    start = perf_counter()
+    for _ in range(samples):
+        backend.verify(CALIBRATION_PASSWORD, password_hash)
+
+    return (perf_counter() - start) / samples
+
+
+def measure_median_verify_time(backend: PasswordHashBackend, samples: int = CALIBRATION_SAMPLES) -> float:
+    """
+    Функция замеряет медиану времени проверки пароля в секундах.
+
+    В отличие от среднего, медиана не меняется от одиночной паузы (сборка мусора, соседний процесс).
+
+    Args:
+        backend: алгоритм с заданной стоимостью.
+        samples: количество замеров.
+    """
+    password_hash = backend.hash(CALIBRATION_PASSWORD)
+
+    durations = []
+    for _ in range(samples):
+        start = perf_counter()
+        backend.verify(CALIBRATION_PASSWORD, password_hash)
+        durations.append(perf_counter() - start)
+
+    return median(durations)
+
+
+class PasswordPolicy:
+    """Класс политики хэширования паролей."""
+
+    def __init__(self, algorithm: str, cost: int | None, target_ms: float):
+        """
+        Инициализирующий метод.
+
+        Args:
+            algorithm: алгоритм хэширования новых паролей (bcrypt или argon2id).
+            cost: стоимость хэширования. Если не задана, до калибровки используется стоимость алгоритма по умолчанию.
+            target_ms: целевое время проверки пароля для калибровки.
+        """
+        self._backend_class = BACKENDS[algorithm]
+        self._is_cost_fixed = cost is not None
+        self._target_ms = target_ms
+        self._backend = self._backend_class(cost if cost is not None else self._backend_class.DEFAULT_COST)
+
+    @property
+    def algorithm(self) -> str:
+        """Алгоритм хэширования новых паролей."""
+        return self._backend.NAME
+
+    @property
+    def cost(self) -> int:
+        """Стоимость хэширования новых паролей."""
+        return self._backend.cost
+
+    def calibrate(self) -> int:
+        """
+        Метод подбирает наибольшую стоимость, при которой проверка пароля укладывается в целевое время.
+
+        Время проверки на каждой стоимости - медиана нескольких замеров.
+        Если стоимость задана явно, калибровка не выполняется.
+
+        Returns:
+            int: выбранная стоимость.
+        """
+        if self._is_cost_fixed:
+            return self.cost
+
+        cost = self._backend_class.MIN_COST
+        for candidate in range(self._backend_class.MIN_COST, self._backend_class.MAX_COST + 1):
+            if measure_median_verify_time(self._backend_class(candidate)) * 1000 > self._target_ms:
+                break
+            cost = candidate
+
+        self._backend = self._backend_class(cost)
+        logger.info('Стоимость хэширования паролей %s подобрана: %s', self.algorithm, cost)
+        return cost
+
+    def hash(self, password: str) -> str:
+        """
+        Метод хэширует пароль по текущей политике.
+
+        Args:
+            password: пароль.
+        """
+        return self._backend.hash(password)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """
+        Метод проверяет пароль по хэшу любого поддерживаемого алгоритма и стоимости.
+
+        Args:
+            password: пароль.
+            password_hash: хэш пароля.
+
+        Raises:
+            UnsupportedPasswordHash
+        """
+        backend = self._get_backend(password_hash)
+        return backend.verify(password, password_hash) if backend else False
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """
+        Метод проверяет, что хэш построен другим алгоритмом или с меньшей стоимостью, чем требует политика.
+
+        Args:
+            password_hash: хэш пароля.
+        """
+        if not self._backend.identify(password_hash):
+            return True
+
+        return self._backend.needs_rehash(password_hash)
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает текущую политику.
+
+        Returns:
+            dict: алгоритм, стоимость и целевое время проверки.
+        """
+        return {
+            'algorithm': self.algorithm,
+            'cost': self.cost,
+            'cost_fixed': self._is_cost_fixed,
+            'target_ms': self._target_ms,
+        }
+
+    def _get_backend(self, password_hash: str) -> PasswordHashBackend | None:
+        """
+        Служебный метод. Определяет алгоритм по хэшу.
+
+        Args:
+            password_hash: хэш пароля.
+
+        Raises:
+            UnsupportedPasswordHash: хэш построен алгоритмом, зависимости которого не установлены.
+        """
+        if self._backend.identify(password_hash):
+            return self._backend
+
+        for backend_class in BACKENDS.values():
+            if not backend_class.identify(password_hash):
+                continue
+
+            if not backend_class.is_available():
+                logger.error('Хэш пароля %s не проверить: зависимости алгоритма не установлены', backend_class.NAME)
+                raise UnsupportedPasswordHash(
+                    'Вход временно недоступен, попробуйте позже.',
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                    f'Проверка хэша пароля {backend_class.NAME} недоступна в сервисе.',
+                )
+            return backend_class(backend_class.DEFAULT_COST)
+
+        return None
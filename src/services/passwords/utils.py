@@ -1,31 +1,69 @@
 """Модуль отвечает за утилиты для работы с паролями."""
 
-import bcrypt
+from core.config import PASSWORD_HASHING_SETTINGS
+from services.metrics.registry import register_metrics_source
+from services.passwords.executor import PasswordHashingExecutor
+from services.passwords.policy import PasswordPolicy
+
+password_executor = PasswordHashingExecutor(
+    workers=PASSWORD_HASHING_SETTINGS.workers,
+    max_queue=PASSWORD_HASHING_SETTINGS.max_queue,
+)
+password_policy = PasswordPolicy(
+    algorithm=PASSWORD_HASHING_SETTINGS.algorithm,
+    cost=PASSWORD_HASHING_SETTINGS.cost,
+    target_ms=PASSWORD_HASHING_SETTINGS.target_ms,
+)
+register_metrics_source('password_hashing', lambda: {**password_executor.stats(), 'policy': password_policy.stats()})
 
 
 def get_hash_password(password: str) -> str:
     """
     Функция получает закэшированное значение пароля.
 
+    Хэш вычисляется по текущей политике (см. services.passwords.policy)
+    в пуле хэширования паролей (см. services.passwords.executor).
+
     Args:
         password: пароль.
 
     Returns:
         hash: захэшированный пароль.
+
+    Raises:
+        ServiceOverloaded
     """
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    return password_hash.decode('utf-8')
+    return password_executor.run(password_policy.hash, password)
 
 
 def is_correct_password(password: str, password_hash: str) -> bool:
     """
     Функция проверяет, что строковое представление пароля совпадает с хэшем.
 
+    Проверка выполняется в пуле хэширования паролей (см. services.passwords.executor).
+
     Args:
         password: пароль
         password_hash: хэш пароля.
 
     Returns:
         bool: True - пароль корректный, False - пароль не корректный.
+
+    Raises:
+        ServiceOverloaded
+        UnsupportedPasswordHash
+    """
+    return password_executor.run(password_policy.verify, password, password_hash)
+
+
+def is_password_rehash_needed(password_hash: str) -> bool:
+    """
+    Функция проверяет, что хэш пароля построен по устаревшей политике и его нужно пересчитать.
+
+    Args:
+        password_hash: хэш пароля.
+
+    Returns:
+        bool: True - хэш нужно пересчитать, False - хэш соответствует политике.
     """
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    return password_policy.needs_rehash(password_hash)
@@ -0,0 +1,99 @@
+"""
+Модуль описывает компактный формат разрешений пользователя в access токене.
+
+Уровень доступа к каждой области разрешения - это маска из битов ADMIN, WRITE и READ (см. AccessLevel).
+Маски всех областей упаковываются в одно целое число по 3 бита на область в порядке SCOPES
+и кодируются в base64url без выравнивания, с префиксом версии формата: `1.<base64url>`.
+Шесть областей занимают 18 бит, то есть 4 символа, поэтому заголовок с токеном почти не растет.
+
+Модуль использует только стандартную библиотеку и не зависит от сервиса: сервисы, которые принимают
+access токены, могут скопировать его и проверять разрешения локально, не обращаясь к `/user-permissions`.
+Новые области добавляются только в конец SCOPES, иначе нужно увеличить версию формата.
+
+Пример:
+    >>> levels = unpack_permissions(payload['sub']['permissions'])
+    >>> has_access(payload['sub']['permissions'], 'films', READ)
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+FORMAT_VERSION = 1
+
+ADMIN = 8
+WRITE = 4
+READ = 2
+
+SCOPES = ('films', 'film_details', 'persons', 'person_details', 'genres', 'protected')
+
+BITS_PER_SCOPE = 3
+SCOPE_MASK = (1 << BITS_PER_SCOPE) - 1
+ACCESS_LEVEL_SHIFT = 1
+PACKED_SIZE = (BITS_PER_SCOPE * len(SCOPES) + 7) // 8
+
+
+def pack_permissions(access_levels: dict[str, int]) -> str:
+    """
+    Функция упаковывает уровни доступа по областям в строку для токена.
+
+    Args:
+        access_levels: маски уровней доступа по именам областей. Отсутствующие области считаются без доступа.
+
+    Returns:
+        str: упакованные разрешения.
+
+    Raises:
+        ValueError: передана неизвестная область.
+    """
+    unknown_scopes = set(access_levels) - set(SCOPES)
+    if unknown_scopes:
+        raise ValueError(f'Неизвестные области разрешения: {sorted(unknown_scopes)}')
+
+    packed = 0
+    for position, scope in enumerate(SCOPES):
+        scope_bits = (access_levels.get(scope, 0) >> ACCESS_LEVEL_SHIFT) & SCOPE_MASK
+        packed |= scope_bits << (position * BITS_PER_SCOPE)
+
+    encoded = urlsafe_b64encode(packed.to_bytes(PACKED_SIZE, 'big')).rstrip(b'=').decode('ascii')
+    return f'{FORMAT_VERSION}.{encoded}'
+
+
+def unpack_permissions(value: str) -> dict[str, int]:
+    """
+    Функция распаковывает разрешения из токена.
+
+    Args:
+        value: упакованные разрешения.
+
+    Returns:
+        dict[str, int]: маски уровней доступа по именам областей.
+
+    Raises:
+        ValueError: неподдерживаемая версия формата или поврежденное значение.
+    """
+    version, _, encoded = value.partition('.')
+    if version != str(FORMAT_VERSION):
+        raise ValueError(f'Неподдерживаемая версия формата разрешений: {version}')
+
+    packed_bytes = urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+    if len(packed_bytes) != PACKED_SIZE:
+        raise ValueError('Поврежденное значение разрешений.')
+
+    packed = int.from_bytes(packed_bytes, 'big')
+    return {
+        scope: ((packed >> (position * BITS_PER_SCOPE)) & SCOPE_MASK) << ACCESS_LEVEL_SHIFT
+        for position, scope in enumerate(SCOPES)
+    }
+
+
+def has_access(value: str, scope: str, access_level: int) -> bool:
+    """
+    Функция проверяет, что упакованные разрешения содержат все биты уровня доступа к области.
+
+    Args:
+        value: упакованные разрешения.
+        scope: имя области.
+        access_level: требуемая маска уровня доступа (ADMIN, WRITE, READ или их сочетание).
+
+    Returns:
+        bool: True - доступ есть, False - доступа нет или область неизвестна.
+    """
+    return unpack_permissions(value).get(scope, 0) & access_level == access_level
@@ -0,0 +1,203 @@
+"""
+Модуль реализует матрицу разрешений в памяти воркера.
+
+Разрешения ролей (роль -> область -> маска уровня доступа) загружаются из БД целиком один раз:
+ролей и областей в системе немного, поэтому матрица занимает мало памяти. Уровень доступа пользователя
+вычисляется побитовым ИЛИ масок его ролей, а роли пользователя берутся из кэша ролей (см. services.role.cache),
+так что в установившемся режиме ответ не требует обращений к БД.
+
+При изменении разрешений публикуется событие в канал Redis, и все воркеры помечают матрицу устаревшей:
+она перечитывается при следующем запросе. На случай потери события матрица также перечитывается
+не реже, чем раз в заданный интервал.
+"""
+from datetime import timedelta
+from time import monotonic, sleep
+from typing import Callable, Iterable
+
+from redis import Redis
+from redis.client import PubSub, PubSubWorkerThread
+from redis.exceptions import RedisError
+
+from services.logs import logs
+
+logger = logs.get_logger()
+
+PermissionRow = tuple[str, str, str, int]
+
+
+class PermissionMatrix:
+    """Класс хранит маски уровней доступа ролей по областям разрешений."""
+
+    LISTENER_SLEEP_TIME = 1
+    LISTENER_ERROR_DELAY = 1
+
+    def __init__(self, client: Redis, channel: str, max_age: timedelta):
+        """
+        Инициализирующий метод.
+
+        Args:
+            client: клиент Redis, через который публикуются и принимаются события изменения разрешений.
+            channel: канал для событий изменения разрешений.
+            max_age: как часто перечитывать матрицу, даже если событий не было.
+        """
+        self._client = client
+        self._channel = channel
+        self._max_age = max_age.total_seconds()
+
+        self._masks: dict[str, dict[str, int]] = {}
+        self._role_ids_by_name: dict[str, str] = {}
+        self._loaded_at: float | None = None
+        self._version = 0
+
+        self._lookups = 0
+        self._loads = 0
+        self._invalidations = 0
+
+        self._pubsub: PubSub | None = None
+        self._listener: PubSubWorkerThread | None = None
+
+    def get_access_level(
+        self,
+        role_ids: Iterable[str],
+        scope_name: str,
+        loader: Callable[[], Iterable[PermissionRow]],
+    ) -> int:
+        """
+        Метод вычисляет уровень доступа по набору ролей.
+
+        Args:
+            role_ids: ID ролей пользователя.
+            scope_name: имя области разрешения.
+            loader: функция загрузки разрешений из БД, вызывается, если матрица не загружена или устарела.
+
+        Returns:
+            int: побитовое ИЛИ масок уровня доступа ролей в области.
+        """
+        self._ensure_loaded(loader)
+        self._lookups += 1
+
+        access_level = 0
+        for role_id in role_ids:
+            access_level |= self._masks.get(str(role_id), {}).get(scope_name, 0)
+
+        return access_level
+
+    def get_access_level_by_role_names(
+        self,
+        role_names: Iterable[str],
+        scope_name: str,
+        loader: Callable[[], Iterable[PermissionRow]],
+    ) -> int:
+        """
+        Метод вычисляет уровень доступа по именам ролей.
+
+        Args:
+            role_names: имена ролей.
+            scope_name: имя области разрешения.
+            loader: функция загрузки разрешений из БД.
+
+        Returns:
+            int: побитовое ИЛИ масок уровня доступа ролей в области, роли без разрешений пропускаются.
+        """
+        self._ensure_loaded(loader)
+        role_ids = [self._role_ids_by_name[name] for name in role_names if name in self._role_ids_by_name]
+
+        return self.get_access_level(role_ids, scope_name, loader)
+
+    def invalidate(self):
+        """Метод помечает матрицу устаревшей во всех воркерах."""
+        self._invalidations += 1
+        self._mark_stale()
+
+        try:
+            self._client.publish(self._channel, 'invalidate')
+        except RedisError:
+            logger.warning('Не удалось оповестить воркеры об изменении разрешений', exc_info=True)
+
+    def start(self):
+        """Метод запускает прослушивание событий изменения разрешений в фоне."""
+        if self._listener:
+            return
+
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self._channel: self._on_invalidated_message})
+        self._listener = self._pubsub.run_in_thread(
+            sleep_time=self.LISTENER_SLEEP_TIME,
+            daemon=True,
+            exception_handler=self._on_listener_error,
+        )
+
+    def stop(self):
+        """Метод останавливает прослушивание событий изменения разрешений."""
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+            self._pubsub = None
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает статистику матрицы.
+
+        Returns:
+            dict: размер матрицы, возраст, количество вычислений, загрузок из БД и инвалидаций.
+        """
+        return {
+            'listening': self._listener is not None,
+            'roles': len(self._masks),
+            'age_ms': (monotonic() - self._loaded_at) * 1000 if self._loaded_at is not None else None,
+            'max_age_ms': self._max_age * 1000,
+            'lookups': self._lookups,
+            'loads': self._loads,
+            'invalidations': self._invalidations,
+        }
+
+    def _ensure_loaded(self, loader: Callable[[], Iterable[PermissionRow]]):
+        """
+        Служебный метод. Загружает матрицу, если она не загружена или устарела.
+
+        Если во время загрузки матрица была помечена устаревшей, загруженные данные используются,
+        но при следующем запросе матрица загружается снова.
+
+        Args:
+            loader: функция загрузки разрешений из БД.
+        """
+        if self._loaded_at is not None and monotonic() - self._loaded_at < self._max_age:
+            return
+
+        version = self._version
+        loaded_at = monotonic()
+        masks = {}
+        role_ids_by_name = {}
+        for role_id, role_name, scope_name, access_level in loader():
+            role_id = str(role_id)
+            role_ids_by_name[role_name] = role_id
+            masks.setdefault(role_id, {})[scope_name] = access_level
+
+        self._masks = masks
+        self._role_ids_by_name = role_ids_by_name
+        self._loaded_at = loaded_at if version == self._version else None
+        self._loads += 1
+
+    def _mark_stale(self):
+        """Служебный метод. Помечает матрицу устаревшей."""
+        self._version += 1
+        self._loaded_at = None
+
+    def _on_invalidated_message(self, message: dict):
+        """
+        Служебный метод. Обрабатывает событие изменения разрешений из канала.
+
+        Args:
+            message: сообщение pub/sub.
+        """
+        self._mark_stale()
+
+    def _on_listener_error(self, error: Exception, pubsub: PubSub, thread: PubSubWorkerThread):
+        """
+        Служебный метод. Обрабатывает ошибку подключения к каналу событий.
+
+        Пока подписка была недоступна, события могли быть потеряны, поэтому матрица перечитывается.
+        """
+        logger.warning('Ошибка подписки на канал изменения разрешений %s', self._channel, exc_info=error)
+        self._mark_stale()
+        sleep(self.LISTENER_ERROR_DELAY)
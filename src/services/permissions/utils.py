@@ -3,12 +3,18 @@
 from uuid import UUID
 from http import HTTPStatus
 
-from sqlalchemy import select, and_
+from sqlalchemy import select
 
-from db import db_session
+from db import db_session, permission_matrix
+from services.permissions.bitmask import SCOPES
 from services.permissions.config import AccessLevel, RoleName, ScopeName
+from services.permissions.matrix import PermissionRow
 from services.http_exceptions.common_exceptions import InvalidData
-from db_models import Permissions, Scope, user_role, Role
+from services.role.utils import get_user_roles, get_users_roles
+from db_models import Permissions, Scope, Role
+
+if tuple(scope_name.value for scope_name in ScopeName) != SCOPES:
+    raise RuntimeError('Порядок областей разрешений в services.permissions.bitmask не совпадает с ScopeName.')
 
 
 def get_access_level(
@@ -37,35 +43,110 @@ def calculate_permissions(access_level: int) -> dict:
 
 def get_user_permissions_by_scope(scope_name: str, user_id: UUID | None) -> dict:
     """
-    Функция выполняет запрос в БД по параметрам `scope` и `user_id`
-    и возвращает уровень всех разрешений пользователя по всем имеющимся у него ролям.
-    При отсутствии `user_id` функция выполняет запрос по `scope` и роли `incognito`.
+    Функция возвращает уровень всех разрешений пользователя по всем имеющимся у него ролям в области `scope`.
+    При отсутствии `user_id` возвращаются разрешения роли `incognito`.
+
+    Уровень доступа вычисляется по матрице разрешений в памяти (см. services.permissions.matrix)
+    и закэшированным ролям пользователя, поэтому в установившемся режиме БД не запрашивается.
     """
 
-    if scope_name not in [s_name.value for s_name in ScopeName]:
-        raise InvalidData('Передано некорректное имя области разрешения.', HTTPStatus.BAD_REQUEST)
+    _validate_scope_names([scope_name])
 
     if user_id:
-        query = (
-            select(Permissions.access_level).
-            outerjoin(Scope, Permissions.scope_id == Scope.id).
-            outerjoin(user_role, Permissions.role_id == user_role.columns.role_id).
-            where(and_(Scope.name == scope_name, user_role.columns.user_id == user_id))
-        )
-        user_access_levels = tuple(db_session.execute(query).scalars())
-        result = 0
-        for access_level in user_access_levels:
-            result = result | access_level
-
+        role_ids = [role.get('id') for role in get_user_roles(user_id)]
+        result = permission_matrix.get_access_level(role_ids, scope_name, _query_permission_matrix)
     else:
-        query = (
-            select(Permissions.access_level).
-            outerjoin(Role, Permissions.role_id == Role.id).
-            outerjoin(Scope, Permissions.scope_id == Scope.id).
-            where(and_(Scope.name == scope_name, Role.name == RoleName.INCOGNITO.value))
+        result = permission_matrix.get_access_level_by_role_names(
+            (RoleName.INCOGNITO.value,), scope_name, _query_permission_matrix,
         )
-        result = db_session.execute(query).scalar()
 
     permissions = calculate_permissions(result)
 
     return permissions
+
+
+def get_users_permissions_by_scopes(scope_names: list[str], user_ids: list[str] | None) -> dict[str, dict]:
+    """
+    Функция возвращает разрешения нескольких пользователей сразу в нескольких областях.
+
+    Роли пользователей берутся из кэша одним обращением (отсутствующие - одним запросом в БД),
+    а уровни доступа вычисляются по матрице разрешений в памяти.
+    При отсутствии `user_ids` возвращаются разрешения роли `incognito` под ее именем.
+
+    Args:
+        scope_names: имена областей разрешения.
+        user_ids: ID пользователей.
+
+    Returns:
+        dict[str, dict]: разрешения по ID пользователей и именам областей.
+    """
+    _validate_scope_names(scope_names)
+
+    if user_ids:
+        users_role_ids = {
+            user_id: [role.get('id') for role in roles] for user_id, roles in get_users_roles(user_ids).items()
+        }
+        return {
+            user_id: {
+                scope_name: calculate_permissions(
+                    permission_matrix.get_access_level(role_ids, scope_name, _query_permission_matrix)
+                )
+                for scope_name in scope_names
+            }
+            for user_id, role_ids in users_role_ids.items()
+        }
+
+    return {
+        RoleName.INCOGNITO.value: {
+            scope_name: calculate_permissions(
+                permission_matrix.get_access_level_by_role_names(
+                    (RoleName.INCOGNITO.value,), scope_name, _query_permission_matrix,
+                )
+            )
+            for scope_name in scope_names
+        }
+    }
+
+
+def get_access_levels_by_role_names(role_names: list[str]) -> dict[str, int]:
+    """
+    Функция возвращает уровни доступа набора ролей во всех областях разрешений.
+
+    Args:
+        role_names: имена ролей.
+
+    Returns:
+        dict[str, int]: маски уровней доступа по именам областей.
+    """
+    return {
+        scope_name.value: permission_matrix.get_access_level_by_role_names(
+            role_names, scope_name.value, _query_permission_matrix,
+        )
+        for scope_name in ScopeName
+    }
+
+
+def _validate_scope_names(scope_names: list[str]):
+    """
+    Служебная функция. Проверяет имена областей разрешения.
+
+    Args:
+        scope_names: имена областей разрешения.
+
+    Raises:
+        InvalidData
+    """
+    known_scope_names = {s_name.value for s_name in ScopeName}
+    if not scope_names or not set(scope_names) <= known_scope_names:
+        raise InvalidData('Передано некорректное имя области разрешения.', HTTPStatus.BAD_REQUEST)
+
+
+def _query_permission_matrix() -> list[PermissionRow]:
+    """Служебная функция. Загружает из БД маски уровней доступа всех ролей по всем областям."""
+
+    query = (
+        select(Permissions.role_id, Role.name, Scope.name, Permissions.access_level).
+        join(Role, Permissions.role_id == Role.id).
+        join(Scope, Permissions.scope_id == Scope.id)
+    )
+    return [tuple(row) for row in db_session.execute(query)]
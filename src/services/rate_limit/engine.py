@@ -0,0 +1,93 @@
+"""
+Модуль реализует движок rate limit по алгоритму GCRA, который выполняется на стороне Redis одним Lua-скриптом.
+
+Всё решение (чтение TAT, сравнение, обновление TAT и выставление TTL) принимается атомарно внутри Redis
+за один сетевой вызов (EVALSHA), поэтому конкурентные гринлеты не могут "проскочить" лимит между чтением и записью.
+Время берется из Redis (команда TIME) с точностью до миллисекунд, чтобы все воркеры использовали одни и те же часы.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+
+from redis import Redis
+
+GCRA_LUA_SCRIPT = """
+local tat_key = KEYS[1]
+local period = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+
+local redis_time = redis.call('TIME')
+local now = tonumber(redis_time[1]) * 1000 + tonumber(redis_time[2]) / 1000
+local separation = period / limit
+
+local tat = tonumber(redis.call('GET', tat_key))
+if not tat or tat < now then
+    tat = now
+end
+
+local allow_at = tat + separation - period
+local diff = now - allow_at
+
+if diff < 0 then
+    return {0, 0, string.format('%.3f', -diff), string.format('%.3f', tat - now)}
+end
+
+local new_tat = tat + separation
+local reset_after = new_tat - now
+redis.call('SET', tat_key, string.format('%.3f', new_tat), 'PX', math.ceil(reset_after))
+
+local remaining = math.floor((period - reset_after) / separation)
+return {1, remaining, '0', string.format('%.3f', reset_after)}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Результат проверки запроса rate limit'ом."""
+
+    allowed: bool
+    remaining: int
+    retry_after: timedelta
+    reset_after: timedelta
+
+
+class GCRARateLimiter:
+    """Класс ограничивает количество запросов по алгоритму GCRA с помощью Lua-скрипта в Redis."""
+
+    def __init__(self, tat_storage: Redis, limit_requests: int, period: timedelta):
+        """
+        Инициализирующий метод.
+
+        Args:
+            tat_storage: хранилище редис, в котором для ключа будет хранится время TAT.
+            limit_requests: максимально допустимое количество запросов.
+            period: период, за который допустимо это количество запросов.
+        """
+        self._limit_requests = limit_requests
+        self._period_in_ms = period.total_seconds() * 1000
+        self._script = tat_storage.register_script(GCRA_LUA_SCRIPT)
+
+    def check(self, tat_key: str) -> RateLimitResult:
+        """
+        Метод проверяет, можно ли пропустить запрос, и сразу же учитывает его в TAT.
+
+        Args:
+            tat_key: ключ, по которому хранится время TAT.
+
+        Returns:
+            RateLimitResult: решение по запросу, оставшаяся квота и время до следующей попытки.
+        """
+        allowed, remaining, retry_after, reset_after = self._script(
+            keys=[tat_key],
+            args=[self._period_in_ms, self._limit_requests],
+        )
+
+        return RateLimitResult(
+            allowed=bool(int(allowed)),
+            remaining=int(remaining),
+            retry_after=timedelta(milliseconds=float(retry_after)),
+            reset_after=timedelta(milliseconds=float(reset_after)),
+        )
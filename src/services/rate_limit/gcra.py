@@ -39,6 +39,8 @@ from http import HTTPStatus
 from flask_jwt_extended import get_jwt
 from redis import Redis
 from services.http_exceptions.common_exceptions import TooManyRequests
+from services.rate_limit.engine import GCRARateLimiter
+from services.storages.key_value.keys import rate_limit_key
 
 
 def rate_limit_requests(tat_storage: Redis, limit_requests: int, period: timedelta):
@@ -46,11 +48,13 @@ def rate_limit_requests(tat_storage: Redis, limit_requests: int, period: timedel
     Декоратор для методов классов flask_restful, который обеспечивает ограничение запросов к ручке по алгоритму GCRA.
 
     Если limit_requests = 10, a period = 60 секунд, то можно делать 10 запросов в первые 6 секунд.
+    Решение принимается атомарно одним Lua-скриптом в Redis (см. services.rate_limit.engine).
     Args:
         tat_storage: хранилище редис, в котором для ключа будет хранится время TAT.
         limit_requests: максимально допустимое количество запросов.
         period: период, за который допустимо это количество запросов.
     """
+    rate_limiter = GCRARateLimiter(tat_storage, limit_requests, period)
 
     def decorator(func):
         @wraps(func)
@@ -61,21 +65,15 @@ def rate_limit_requests(tat_storage: Redis, limit_requests: int, period: timedel
 
             tat_key = _get_tat_key(class_name, func_name, user_id)
 
-            period_in_seconds = int(period.total_seconds())
-            current_time = tat_storage.time()[0]
-            separation = round(period_in_seconds / limit_requests)
-            tat_storage.setnx(tat_key, 0)
+            result = rate_limiter.check(tat_key)
+            if result.allowed:
+                return func(self, *args, **kwargs)
 
-            try:
-                tat = max(int(tat_storage.get(tat_key)), current_time)
-                if tat - current_time <= period_in_seconds - separation:
-                    new_tat = max(tat, current_time) + separation
-                    tat_storage.set(tat_key, new_tat)
-                    return func(self, *args, **kwargs)
-
-                raise TooManyRequests('Слишком частые однотипные вызовы метода!', HTTPStatus.TOO_MANY_REQUESTS)
-            except LookupError:
-                raise TooManyRequests('Слишком частые однотипные вызовы метода!', HTTPStatus.TOO_MANY_REQUESTS)
+            raise TooManyRequests(
+                'Слишком частые однотипные вызовы метода!',
+                HTTPStatus.TOO_MANY_REQUESTS,
+                f'Повторите запрос через {result.retry_after.total_seconds():.3f} сек.',
+            )
 
         return wrapper
 
@@ -108,4 +106,4 @@ def _get_tat_key(class_name: str, method_name: str, user_id: str | None = None)
     Return:
         tat_ket: str
     """
-    return f'{class_name}:{method_name}:{user_id}'
+    return rate_limit_key(class_name, method_name, user_id)
@@ -6,6 +6,8 @@ from flask_restful import reqparse
 
 parser = reqparse.RequestParser()
 
+MAX_LIMIT = 50
+
 
 @dataclass
 class ParserParam:
@@ -36,8 +38,8 @@ def limit_type(value):
         value = int(value)
     except ValueError:
         raise ValueError('Лимит должен быть целым числом.')
-    if value <= 0 or value > 50:
-        raise ValueError('Лимит должен быть в допустимом диапазоне [1:50].')
+    if value <= 0 or value > MAX_LIMIT:
+        raise ValueError(f'Лимит должен быть в допустимом диапазоне [1:{MAX_LIMIT}].')
     return value
 
 
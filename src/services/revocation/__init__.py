@@ -0,0 +1 @@
+"""Инициализирующий модуль пакета для проверки отозванных токенов."""
@@ -0,0 +1,153 @@
+"""
+Модуль содержит фильтры Блума для предварительной проверки отозванных токенов.
+
+Фильтр Блума отвечает на вопрос "может ли jti быть в блоклисте": отрицательный ответ всегда точен,
+а положительный может быть ложным с заданной вероятностью, поэтому его нужно подтверждать в Redis.
+Чтобы фильтр не рос бесконечно, jti раскладываются по корзинам по времени истечения записи в блоклисте,
+и корзина целиком удаляется, когда истекают все записи, которые в нее попали.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+from hashlib import blake2b
+from math import ceil, exp, floor, log
+from time import time
+
+
+class BloomFilter:
+    """Класс фильтра Блума фиксированного размера."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Инициализирующий метод.
+
+        Размер битового массива и количество хэш-функций подбираются по ожидаемому количеству элементов
+        и допустимой вероятности ложноположительного ответа.
+
+        Args:
+            capacity: ожидаемое количество элементов.
+            error_rate: допустимая вероятность ложноположительного ответа.
+        """
+        self._size = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self._hash_count = max(1, round(self._size / capacity * log(2)))
+        self._bits = bytearray(ceil(self._size / 8))
+        self.count = 0
+
+    def __contains__(self, item: str) -> bool:
+        return self.contains_positions(self.positions(item))
+
+    def contains_positions(self, positions: list[int]) -> bool:
+        """
+        Метод проверяет, что все биты элемента установлены.
+
+        Args:
+            positions: позиции битов элемента, вычисленные методом positions.
+        """
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def add(self, item: str):
+        """
+        Метод добавляет элемент в фильтр.
+
+        Args:
+            item: элемент.
+        """
+        for position in self.positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    @property
+    def memory_bytes(self) -> int:
+        """Размер битового массива в байтах."""
+        return len(self._bits)
+
+    @property
+    def estimated_false_positive_rate(self) -> float:
+        """Оценка вероятности ложноположительного ответа при текущем количестве элементов."""
+        return (1 - exp(-self._hash_count * self.count / self._size)) ** self._hash_count
+
+    def positions(self, item: str) -> list[int]:
+        """
+        Метод вычисляет позиции битов элемента методом двойного хэширования.
+
+        Args:
+            item: элемент.
+        """
+        digest = blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], 'little')
+        second_hash = int.from_bytes(digest[8:], 'little') | 1
+
+        return [(first_hash + index * second_hash) % self._size for index in range(self._hash_count)]
+
+
+class TimeBucketedBloomFilter:
+    """Класс набора фильтров Блума, разложенных по корзинам времени истечения элементов."""
+
+    def __init__(self, lifetime: timedelta, buckets: int, capacity: int, error_rate: float):
+        """
+        Инициализирующий метод.
+
+        Args:
+            lifetime: максимальное время жизни элемента.
+            buckets: на сколько корзин разбивается время жизни.
+            capacity: ожидаемое количество элементов в одной корзине.
+            error_rate: допустимая вероятность ложноположительного ответа одной корзины.
+        """
+        self._lifetime = lifetime.total_seconds()
+        self._bucket_span = self._lifetime / buckets
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._buckets: OrderedDict[int, BloomFilter] = OrderedDict()
+
+    def __contains__(self, item: str) -> bool:
+        self._drop_expired_buckets()
+        if not self._buckets:
+            return False
+
+        # У всех корзин одинаковые параметры, поэтому позиции битов вычисляются один раз.
+        positions = next(iter(self._buckets.values())).positions(item)
+        return any(bucket.contains_positions(positions) for bucket in self._buckets.values())
+
+    def add(self, item: str, expire: timedelta | None = None):
+        """
+        Метод добавляет элемент в корзину, которая истечет не раньше самого элемента.
+
+        Args:
+            item: элемент.
+            expire: через сколько истекает элемент. По умолчанию - максимальное время жизни.
+        """
+        expire_in = expire.total_seconds() if expire is not None else self._lifetime
+        bucket_number = ceil((time() + expire_in) / self._bucket_span)
+
+        bucket = self._buckets.get(bucket_number)
+        if bucket is None:
+            bucket = self._buckets[bucket_number] = BloomFilter(self._capacity, self._error_rate)
+            self._buckets = OrderedDict(sorted(self._buckets.items()))
+
+        bucket.add(item)
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает размер фильтров и оценку вероятности ложноположительного ответа.
+
+        Returns:
+            dict: количество корзин и элементов, занимаемая память и оценка вероятности ошибки.
+        """
+        self._drop_expired_buckets()
+
+        no_error_probability = 1.0
+        for bucket in self._buckets.values():
+            no_error_probability *= 1 - bucket.estimated_false_positive_rate
+
+        return {
+            'buckets': len(self._buckets),
+            'items': sum(bucket.count for bucket in self._buckets.values()),
+            'memory_bytes': sum(bucket.memory_bytes for bucket in self._buckets.values()),
+            'estimated_false_positive_rate': 1 - no_error_probability,
+        }
+
+    def _drop_expired_buckets(self):
+        """Служебный метод. Удаляет корзины, все элементы которых уже истекли."""
+        current_bucket_number = floor(time() / self._bucket_span)
+
+        while self._buckets and next(iter(self._buckets)) < current_bucket_number:
+            self._buckets.popitem(last=False)
@@ -0,0 +1,400 @@
+"""
+Модуль реализует проверку отозванных токенов с кэшем в памяти процесса.
+
+Проверка двухуровневая: сначала смотрим в локальный кэш воркера, и только при промахе идем в блоклист (Redis).
+Отозванные jti кэшируются надолго (отзыв необратим), а неотозванные - не дольше заданной границы устаревания.
+При отзыве токена jti публикуется в канал Redis, и все воркеры, подписанные на канал, помечают его отозванным,
+так что граница устаревания срабатывает только если сообщение было потеряно.
+При пакетном отзыве все jti публикуются одним сообщением через пробел.
+
+Перед кэшем может стоять предварительный фильтр Блума по отозванным jti (см. services.revocation.bloom).
+Он строится по ключам блоклиста при старте и пополняется событиями отзыва: отрицательный ответ фильтра означает,
+что токен не отзывался, и Redis не вызывается вовсе, а положительный подтверждается обычной проверкой.
+Чтобы потерянное без ошибки подключения событие не делало отрицательный ответ неверным навсегда, каждый отзыв
+записывается еще и в журнал последних отзывов (sorted set по времени отзыва), а фильтр сверяется с журналом
+чаще границы устаревания. Отрицательному ответу фильтра доверяют, только если последняя сверка была не раньше
+границы устаревания, иначе токен проверяется как без фильтра.
+Пока фильтр строится или после потери подписки (события могли быть пропущены) фильтр не используется.
+
+Ключи блоклиста строятся по схеме services.storages.key_value.keys; записи старого формата (ключ - сам jti)
+проверяются в том же запросе, пока не истекут.
+"""
+from datetime import timedelta
+from threading import Thread
+from time import sleep, time
+
+from typing import Callable
+
+from redis import Redis
+from redis.client import PubSub, PubSubWorkerThread
+from redis.exceptions import RedisError
+
+from services.logs import logs
+from services.revocation.bloom import TimeBucketedBloomFilter
+from services.storages.in_memory.ttl_lru import TTLLRUCache, MISSING
+from services.storages.key_value.interfaces import BaseKeyValueStorage
+from services.storages.key_value.keys import (
+    LEGACY_BLOCKLIST_KEY_PATTERN,
+    blocklist_jti,
+    blocklist_key,
+    blocklist_log_key,
+)
+
+logger = logs.get_logger()
+
+
+class RevocationChecker:
+    """Класс проверяет, находится ли токен в блоклисте, и отзывает токены."""
+
+    LISTENER_SLEEP_TIME = 1
+    LISTENER_ERROR_DELAY = 1
+    PREFILTER_SCAN_COUNT = 1000
+    PREFILTER_MIN_SYNC_INTERVAL = 0.5
+    # Запас на расхождение часов воркеров, записывающих время отзыва в журнал.
+    REVOCATION_LOG_CLOCK_MARGIN = 5
+    REVOCATION_LOG_RETENTION = 600
+
+    def __init__(
+        self,
+        blocklist: BaseKeyValueStorage,
+        client: Redis,
+        channel: str,
+        max_size: int,
+        staleness: timedelta,
+        revoked_ttl: timedelta,
+        prefilter_factory: Callable[[], TimeBucketedBloomFilter] | None = None,
+    ):
+        """
+        Инициализирующий метод.
+
+        Args:
+            blocklist: хранилище отозванных jti.
+            client: клиент Redis, через который публикуются и принимаются события отзыва.
+            channel: канал для событий отзыва.
+            max_size: максимальное количество jti в каждом из локальных кэшей.
+            staleness: сколько можно доверять закэшированному ответу "токен не отозван".
+            revoked_ttl: сколько хранить в кэше отозванные jti.
+            prefilter_factory: фабрика предварительного фильтра отозванных jti. Если не задана, фильтр не используется.
+        """
+        self._blocklist = blocklist
+        self._client = client
+        self._channel = channel
+        self._staleness = staleness
+
+        self._valid_cache = TTLLRUCache(max_size, staleness)
+        self._revoked_cache = TTLLRUCache(max_size, revoked_ttl)
+
+        self._prefilter_factory = prefilter_factory
+        self._prefilter: TimeBucketedBloomFilter | None = None
+        self._is_prefilter_ready = False
+        self._prefilter_synced_at = 0.0
+        self._prefilter_negatives = 0
+        self._prefilter_positives = 0
+        self._prefilter_false_positives = 0
+
+        self._pubsub: PubSub | None = None
+        self._listener: PubSubWorkerThread | None = None
+
+    def is_revoked(self, jti: str | None) -> bool:
+        """
+        Метод проверяет, отозван ли токен.
+
+        Args:
+            jti: идентификатор токена.
+
+        Returns:
+            bool: True - токен отозван, False - токен не отозван.
+        """
+        return self.is_any_revoked(jti)
+
+    def is_any_revoked(self, *jtis: str | None) -> bool:
+        """
+        Метод проверяет, отозван ли хотя бы один из токенов.
+
+        Все jti, которых нет в локальном кэше, проверяются в блоклисте за одно обращение к хранилищу.
+
+        Args:
+            jtis: идентификаторы токенов, пустые значения пропускаются.
+
+        Returns:
+            bool: True - хотя бы один токен отозван, False - ни один токен не отозван.
+        """
+        unknown_jtis = []
+        prefilter_positives = set()
+
+        for jti in filter(None, jtis):
+            if self._revoked_cache.get(jti, False):
+                return True
+
+            is_prefilter_positive = False
+            if self._is_prefilter_fresh():
+                if jti not in self._prefilter:
+                    self._prefilter_negatives += 1
+                    continue
+                self._prefilter_positives += 1
+                is_prefilter_positive = True
+                prefilter_positives.add(jti)
+
+            if self._staleness and self._valid_cache.get(jti, MISSING) is not MISSING:
+                if is_prefilter_positive:
+                    self._prefilter_false_positives += 1
+                continue
+
+            unknown_jtis.append(jti)
+
+        if not unknown_jtis:
+            return False
+
+        revoked_flags = self._exists_in_blocklist(unknown_jtis)
+        for jti, is_revoked in zip(unknown_jtis, revoked_flags):
+            self._remember(jti, is_revoked)
+            if jti in prefilter_positives and not is_revoked:
+                self._prefilter_false_positives += 1
+
+        return any(revoked_flags)
+
+    def revoke(self, jti: str, expire: timedelta):
+        """
+        Метод отзывает токен: добавляет jti в блоклист и оповещает остальные воркеры.
+
+        Args:
+            jti: идентификатор токена.
+            expire: сколько хранить jti в блоклисте.
+        """
+        self._blocklist.put(blocklist_key(jti), '', expire=expire)
+        self._remember(jti, True, expire)
+        self._announce_revoked([jti])
+
+    def revoke_many(self, jtis: list[str], expire: timedelta) -> int:
+        """
+        Метод отзывает пачку токенов: все jti пишутся в блоклист одной транзакцией и публикуются одним сообщением.
+
+        Args:
+            jtis: идентификаторы токенов.
+            expire: сколько хранить jti в блоклисте.
+
+        Returns:
+            int: количество отозванных токенов.
+        """
+        jtis = list(dict.fromkeys(filter(None, jtis)))
+        if not jtis:
+            return 0
+
+        self._blocklist.put_many(dict.fromkeys(map(blocklist_key, jtis), ''), expire=expire)
+        for jti in jtis:
+            self._remember(jti, True, expire)
+        self._announce_revoked(jtis)
+
+        return len(jtis)
+
+    def start(self):
+        """Метод запускает прослушивание событий отзыва в фоне."""
+        if self._listener:
+            return
+
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self._channel: self._on_revoked_message})
+        self._listener = self._pubsub.run_in_thread(
+            sleep_time=self.LISTENER_SLEEP_TIME,
+            daemon=True,
+            exception_handler=self._on_listener_error,
+        )
+
+        if self._prefilter_factory:
+            Thread(target=self._run_prefilter_sync, daemon=True).start()
+
+    def stop(self):
+        """Метод останавливает прослушивание событий отзыва."""
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+            self._pubsub = None
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает статистику локальных кэшей.
+
+        Returns:
+            dict: статистика кэшей отозванных и неотозванных jti.
+        """
+        return {
+            'staleness_ms': self._staleness.total_seconds() * 1000,
+            'listening': self._listener is not None,
+            'valid': self._valid_cache.stats(),
+            'revoked': self._revoked_cache.stats(),
+            'prefilter': self._prefilter_stats(),
+        }
+
+    def _announce_revoked(self, jtis: list[str]):
+        """
+        Служебный метод. Записывает отзыв в журнал последних отзывов и оповещает воркеры одним пайплайном.
+
+        Args:
+            jtis: идентификаторы отозванных токенов.
+        """
+        now = time()
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.zadd(blocklist_log_key(), dict.fromkeys(jtis, now))
+        pipeline.zremrangebyscore(blocklist_log_key(), '-inf', now - self.REVOCATION_LOG_RETENTION)
+        pipeline.publish(self._channel, ' '.join(jtis))
+        pipeline.execute()
+
+    def _exists_in_blocklist(self, jtis: list[str]) -> list[bool]:
+        """
+        Служебный метод. Проверяет jti в блоклисте по ключам текущей схемы и старого формата одним запросом.
+
+        Args:
+            jtis: идентификаторы токенов.
+
+        Returns:
+            list[bool]: отозван ли каждый токен.
+        """
+        flags = self._blocklist.exists_many([blocklist_key(jti) for jti in jtis] + jtis)
+        return [current or legacy for current, legacy in zip(flags[:len(jtis)], flags[len(jtis):])]
+
+    def _remember(self, jti: str, is_revoked: bool, expire: timedelta | None = None):
+        """
+        Служебный метод. Запоминает результат проверки в локальном кэше.
+
+        Args:
+            jti: идентификатор токена.
+            is_revoked: отозван ли токен.
+            expire: через сколько истекает запись в блоклисте, если известно.
+        """
+        if is_revoked:
+            self._valid_cache.pop(jti)
+            self._revoked_cache.put(jti, True)
+            if self._prefilter is not None and jti not in self._prefilter:
+                self._prefilter.add(jti, expire)
+        elif self._staleness:
+            self._valid_cache.put(jti, False)
+
+    def _on_revoked_message(self, message: dict):
+        """
+        Служебный метод. Обрабатывает событие отзыва одного или нескольких токенов из канала.
+
+        Args:
+            message: сообщение pub/sub.
+        """
+        for jti in message.get('data', '').split():
+            self._remember(jti, True)
+
+    def _on_listener_error(self, error: Exception, pubsub: PubSub, thread: PubSubWorkerThread):
+        """
+        Служебный метод. Обрабатывает ошибку подключения к каналу событий.
+
+        Пока подписка была недоступна, события отзыва могли быть потеряны,
+        поэтому закэшированные ответы "токен не отозван" больше не считаются достоверными.
+        """
+        logger.warning('Ошибка подписки на канал отзыва токенов %s', self._channel, exc_info=error)
+        self._valid_cache.clear()
+        self._is_prefilter_ready = False
+        sleep(self.LISTENER_ERROR_DELAY)
+
+        if self._prefilter_factory:
+            self._rebuild_prefilter()
+
+    def _is_prefilter_fresh(self) -> bool:
+        """Служебный метод. Проверяет, что фильтр построен и сверялся с журналом отзывов в пределах устаревания."""
+        return self._is_prefilter_ready and time() - self._prefilter_synced_at <= self._staleness.total_seconds()
+
+    def _run_prefilter_sync(self):
+        """
+        Служебный метод. Строит фильтр и сверяет его с журналом последних отзывов, пока идет прослушивание.
+
+        Если сверок не было дольше, чем хранится журнал, отзывы могли быть пропущены, и фильтр строится заново.
+        """
+        interval = max(self._staleness.total_seconds() / 2, self.PREFILTER_MIN_SYNC_INTERVAL)
+        self._rebuild_prefilter()
+
+        while self._listener is not None:
+            sleep(interval)
+            if time() - self._prefilter_synced_at > self.REVOCATION_LOG_RETENTION - self.REVOCATION_LOG_CLOCK_MARGIN:
+                self._rebuild_prefilter()
+            elif self._is_prefilter_ready:
+                self._sync_prefilter()
+
+    def _sync_prefilter(self):
+        """Служебный метод. Добавляет в фильтр jti из журнала, отозванные с момента прошлой сверки."""
+        started = time()
+        try:
+            jtis = self._client.zrangebyscore(
+                blocklist_log_key(), self._prefilter_synced_at - self.REVOCATION_LOG_CLOCK_MARGIN, '+inf'
+            )
+        except RedisError:
+            logger.warning('Не удалось сверить фильтр отозванных токенов с журналом отзывов', exc_info=True)
+            return
+
+        for jti in jtis:
+            self._remember(jti, True)
+        self._prefilter_synced_at = started
+
+    def _rebuild_prefilter(self):
+        """
+        Служебный метод. Строит предварительный фильтр заново по ключам блоклиста.
+
+        Сканируются только ключи блоклиста (текущей схемы и старого формата), а не вся БД Redis.
+        Новый фильтр подставляется сразу, чтобы события отзыва, пришедшие во время сканирования,
+        попали в него, но используется он только после завершения сканирования.
+        """
+        self._is_prefilter_ready = False
+        self._prefilter = self._prefilter_factory()
+        started = time()
+
+        try:
+            for pattern in (blocklist_key('*'), LEGACY_BLOCKLIST_KEY_PATTERN):
+                keys = []
+                for key in self._client.scan_iter(match=pattern, count=self.PREFILTER_SCAN_COUNT):
+                    keys.append(key)
+                    if len(keys) >= self.PREFILTER_SCAN_COUNT:
+                        self._add_blocklist_keys_to_prefilter(keys)
+                        keys = []
+                self._add_blocklist_keys_to_prefilter(keys)
+        except Exception:
+            logger.warning('Не удалось построить фильтр отозванных токенов', exc_info=True)
+            return
+
+        self._prefilter_synced_at = started
+        self._is_prefilter_ready = True
+        logger.info('Фильтр отозванных токенов построен: %s', self._prefilter.stats())
+
+    def _add_blocklist_keys_to_prefilter(self, keys: list[str]):
+        """
+        Служебный метод. Добавляет в фильтр jti из блоклиста с учетом оставшегося времени жизни записей.
+
+        Args:
+            keys: ключи блоклиста.
+        """
+        if not keys:
+            return
+
+        pipeline = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.pttl(key)
+
+        for key, ttl in zip(keys, pipeline.execute()):
+            self._prefilter.add(blocklist_jti(key), timedelta(milliseconds=ttl) if ttl > 0 else None)
+
+    def _prefilter_stats(self) -> dict | None:
+        """
+        Служебный метод. Возвращает статистику предварительного фильтра.
+
+        Returns:
+            dict | None: размер фильтра, время с последней сверки, оценка и наблюдаемая доля
+                ложноположительных ответов (по всем положительным ответам, в том числе подтвержденным кэшем).
+        """
+        if self._prefilter is None:
+            return None
+
+        return {
+            'ready': self._is_prefilter_ready,
+            'fresh': self._is_prefilter_fresh(),
+            'synced_ms_ago': (time() - self._prefilter_synced_at) * 1000 if self._prefilter_synced_at else None,
+            'negatives': self._prefilter_negatives,
+            'positives': self._prefilter_positives,
+            'false_positives': self._prefilter_false_positives,
+            'observed_false_positive_rate': (
+                self._prefilter_false_positives / self._prefilter_positives if self._prefilter_positives else 0.0
+            ),
+            **self._prefilter.stats(),
+        }
@@ -0,0 +1,321 @@
+"""
+Модуль реализует двухуровневый кэш ролей пользователей.
+
+Роли нужны при каждом входе и обновлении токенов, а меняются редко, поэтому они кэшируются:
+сначала в памяти воркера (LRU с TTL), затем в общем кэше в Redis, и только при промахе в обоих читаются из БД.
+
+Изменение ролей пользователя удаляет его запись из общего кэша и публикует событие в канал Redis,
+по которому все воркеры удаляют запись из локального кэша. Изменение или удаление самой роли затрагивает
+всех пользователей с этой ролью, поэтому вместо поиска таких пользователей увеличивается поколение кэша:
+оно входит в ключ общего кэша, и все прежние записи перестают читаться и истекают сами.
+Чтобы запрос, прочитавший роли из БД до сброса, не записал их в общий кэш уже после сброса, у каждого
+пользователя есть версия ролей, которую увеличивает сброс. Поколение и версия читаются до загрузки из БД,
+а записываются роли скриптом Lua, только если ни поколение, ни версия с тех пор не изменились.
+Если событие было потеряно, запись воркера устаревает не дольше, чем через время жизни локального кэша.
+При недоступности Redis роли читаются из БД.
+"""
+import json
+from datetime import timedelta
+from time import sleep
+from typing import Callable, Iterable
+from uuid import UUID
+
+from redis import Redis
+from redis.client import PubSub, PubSubWorkerThread
+from redis.exceptions import RedisError
+
+from services.logs import logs
+from services.storages.in_memory.ttl_lru import TTLLRUCache, MISSING
+from services.storages.key_value.keys import user_roles_generation_key, user_roles_key, user_roles_version_key
+
+logger = logs.get_logger()
+
+USER_EVENT = 'user'
+GENERATION_EVENT = 'generation'
+
+PUT_IF_UNCHANGED_LUA_SCRIPT = """
+local generation = tonumber(redis.call('GET', KEYS[1]) or '0')
+if generation ~= tonumber(ARGV[1]) then
+    return generation
+end
+
+for index = 2, #KEYS, 2 do
+    if (redis.call('GET', KEYS[index]) or '0') == ARGV[index + 1] then
+        redis.call('SET', KEYS[index + 1], ARGV[index + 2], 'PX', ARGV[2])
+    end
+end
+
+return generation
+"""
+
+
+class UserRolesCache:
+    """Класс кэширует роли пользователей в памяти воркера и в Redis."""
+
+    LISTENER_SLEEP_TIME = 1
+    LISTENER_ERROR_DELAY = 1
+
+    def __init__(self, client: Redis, channel: str, max_size: int, local_ttl: timedelta, shared_ttl: timedelta):
+        """
+        Инициализирующий метод.
+
+        Args:
+            client: клиент Redis для общего кэша и событий инвалидации.
+            channel: канал для событий инвалидации.
+            max_size: максимальное количество пользователей в локальном кэше.
+            local_ttl: сколько хранить роли в локальном кэше.
+            shared_ttl: сколько хранить роли в общем кэше.
+        """
+        self._client = client
+        self._channel = channel
+        self._shared_ttl = shared_ttl
+
+        self._local_cache = TTLLRUCache(max_size, local_ttl)
+        self._generation: int | None = None
+
+        self._shared_hits = 0
+        self._shared_misses = 0
+        self._shared_errors = 0
+        self._invalidations = 0
+
+        self._pubsub: PubSub | None = None
+        self._listener: PubSubWorkerThread | None = None
+        self._put_if_unchanged = client.register_script(PUT_IF_UNCHANGED_LUA_SCRIPT)
+
+    def get(self, user_id: UUID | str, loader: Callable[[UUID | str], list[dict]]) -> list[dict]:
+        """
+        Метод возвращает роли пользователя из кэша, при промахе загружает их и кэширует.
+
+        Args:
+            user_id: ID пользователя.
+            loader: функция загрузки ролей пользователя из БД.
+
+        Returns:
+            list[dict]: роли пользователя.
+        """
+        user_id = str(user_id)
+
+        return self.get_many([user_id], lambda user_ids: {user_id: loader(user_id)})[user_id]
+
+    def get_many(
+        self,
+        user_ids: Iterable[UUID | str],
+        loader: Callable[[list[str]], dict[str, list[dict]]],
+    ) -> dict[str, list[dict]]:
+        """
+        Метод возвращает роли нескольких пользователей.
+
+        Роли, которых нет в локальном кэше, читаются из общего кэша одним запросом вместе с их версиями,
+        а оставшиеся загружаются из БД одним вызовом loader и записываются в общий кэш,
+        если роли пользователя не были сброшены, пока шла загрузка.
+
+        Args:
+            user_ids: ID пользователей.
+            loader: функция загрузки ролей пользователей из БД по списку ID.
+                Пользователи без ролей могут отсутствовать в результате.
+
+        Returns:
+            dict[str, list[dict]]: роли по ID пользователей.
+        """
+        users_roles = {}
+        missing_user_ids = []
+        for user_id in dict.fromkeys(map(str, user_ids)):
+            roles = self._local_cache.get(user_id, MISSING)
+            if roles is MISSING:
+                missing_user_ids.append(user_id)
+            else:
+                users_roles[user_id] = roles
+
+        if not missing_user_ids:
+            return users_roles
+
+        shared_roles, generation, versions = self._get_shared_many(missing_user_ids)
+        unknown_user_ids = [user_id for user_id in missing_user_ids if user_id not in shared_roles]
+        if unknown_user_ids:
+            loaded_roles = loader(unknown_user_ids)
+            loaded_roles = {user_id: loaded_roles.get(user_id, []) for user_id in unknown_user_ids}
+            if generation is not None:
+                self._put_shared_many(loaded_roles, generation, versions)
+            shared_roles.update(loaded_roles)
+
+        for user_id, roles in shared_roles.items():
+            self._local_cache.put(user_id, roles)
+
+        return users_roles | shared_roles
+
+    def invalidate_users(self, *user_ids: UUID | str):
+        """
+        Метод сбрасывает закэшированные роли пользователей во всех воркерах.
+
+        Args:
+            user_ids: ID пользователей.
+        """
+        user_ids = list(dict.fromkeys(map(str, user_ids)))
+        if not user_ids:
+            return
+
+        self._invalidations += 1
+        for user_id in user_ids:
+            self._local_cache.pop(user_id)
+
+        try:
+            generation = self._get_generation()
+            pipeline = self._client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipeline.incr(user_roles_version_key(user_id))
+                pipeline.pexpire(user_roles_version_key(user_id), self._shared_ttl)
+            pipeline.delete(*(user_roles_key(generation, user_id) for user_id in user_ids))
+            pipeline.publish(self._channel, ' '.join((USER_EVENT, *user_ids)))
+            pipeline.execute()
+        except RedisError:
+            logger.warning('Не удалось сбросить общий кэш ролей пользователей %s', user_ids, exc_info=True)
+
+    def invalidate_all(self):
+        """Метод сбрасывает закэшированные роли всех пользователей во всех воркерах."""
+        self._invalidations += 1
+        self._local_cache.clear()
+
+        try:
+            generation = self._client.incr(user_roles_generation_key())
+            self._generation = generation
+            self._client.publish(self._channel, f'{GENERATION_EVENT} {generation}')
+        except RedisError:
+            self._generation = None
+            logger.warning('Не удалось сбросить общий кэш ролей', exc_info=True)
+
+    def start(self):
+        """Метод запускает прослушивание событий инвалидации в фоне."""
+        if self._listener:
+            return
+
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self._channel: self._on_invalidated_message})
+        self._listener = self._pubsub.run_in_thread(
+            sleep_time=self.LISTENER_SLEEP_TIME,
+            daemon=True,
+            exception_handler=self._on_listener_error,
+        )
+
+    def stop(self):
+        """Метод останавливает прослушивание событий инвалидации."""
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+            self._pubsub = None
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает статистику кэша.
+
+        Returns:
+            dict: статистика локального кэша, попадания и промахи общего кэша, количество инвалидаций.
+        """
+        shared_requests = self._shared_hits + self._shared_misses
+
+        return {
+            'listening': self._listener is not None,
+            'generation': self._generation,
+            'invalidations': self._invalidations,
+            'local': self._local_cache.stats(),
+            'shared': {
+                'ttl_ms': self._shared_ttl.total_seconds() * 1000,
+                'hits': self._shared_hits,
+                'misses': self._shared_misses,
+                'errors': self._shared_errors,
+                'hit_rate': self._shared_hits / shared_requests if shared_requests else 0.0,
+            },
+        }
+
+    def _get_shared_many(self, user_ids: list[str]) -> tuple[dict[str, list[dict]], int | None, dict[str, str]]:
+        """
+        Служебный метод. Читает роли пользователей и версии их ролей из общего кэша одним запросом.
+
+        Args:
+            user_ids: ID пользователей.
+
+        Returns:
+            tuple[dict[str, list[dict]], int | None, dict[str, str]]: роли найденных пользователей,
+                поколение кэша и версии ролей всех пользователей. Если Redis недоступен - пустой словарь и None.
+        """
+        try:
+            generation = self._get_generation()
+            values = self._client.mget(
+                [user_roles_key(generation, user_id) for user_id in user_ids]
+                + [user_roles_version_key(user_id) for user_id in user_ids]
+            )
+        except RedisError:
+            self._shared_errors += 1
+            logger.warning('Общий кэш ролей недоступен', exc_info=True)
+            return {}, None, {}
+
+        roles_values, version_values = values[:len(user_ids)], values[len(user_ids):]
+        users_roles = {
+            user_id: json.loads(value) for user_id, value in zip(user_ids, roles_values) if value is not None
+        }
+        versions = {user_id: version or '0' for user_id, version in zip(user_ids, version_values)}
+        self._shared_hits += len(users_roles)
+        self._shared_misses += len(user_ids) - len(users_roles)
+
+        return users_roles, generation, versions
+
+    def _put_shared_many(self, users_roles: dict[str, list[dict]], generation: int, versions: dict[str, str]):
+        """
+        Служебный метод. Записывает роли пользователей в общий кэш, если они не были сброшены после чтения версий.
+
+        Если поколение в Redis изменилось, ничего не записывается, а поколение воркера будет перечитано.
+
+        Args:
+            users_roles: роли по ID пользователей.
+            generation: поколение кэша, прочитанное до загрузки ролей.
+            versions: версии ролей пользователей, прочитанные до загрузки ролей.
+        """
+        keys = [user_roles_generation_key()]
+        args = [generation, int(self._shared_ttl.total_seconds() * 1000)]
+        for user_id, roles in users_roles.items():
+            keys += [user_roles_version_key(user_id), user_roles_key(generation, user_id)]
+            args += [versions[user_id], json.dumps(roles, default=str)]
+
+        try:
+            current_generation = int(self._put_if_unchanged(keys=keys, args=args))
+        except RedisError:
+            self._shared_errors += 1
+            logger.warning('Не удалось записать роли в общий кэш', exc_info=True)
+            return
+
+        if current_generation != generation:
+            self._generation = None
+
+    def _get_generation(self) -> int:
+        """Служебный метод. Возвращает текущее поколение общего кэша, при необходимости читая его из Redis."""
+        if self._generation is None:
+            self._generation = int(self._client.get(user_roles_generation_key()) or 0)
+
+        return self._generation
+
+    def _on_invalidated_message(self, message: dict):
+        """
+        Служебный метод. Обрабатывает событие инвалидации из канала.
+
+        Args:
+            message: сообщение pub/sub вида `user <id> <id> ...` или `generation <номер>`.
+        """
+        event, *values = message.get('data', '').split()
+
+        if event == USER_EVENT:
+            for user_id in values:
+                self._local_cache.pop(user_id)
+        elif event == GENERATION_EVENT:
+            self._generation = max(int(values[0]), self._generation or 0)
+            self._local_cache.clear()
+
+    def _on_listener_error(self, error: Exception, pubsub: PubSub, thread: PubSubWorkerThread):
+        """
+        Служебный метод. Обрабатывает ошибку подключения к каналу событий.
+
+        Пока подписка была недоступна, события инвалидации могли быть потеряны,
+        поэтому локальный кэш очищается, а поколение будет перечитано из Redis.
+        """
+        logger.warning('Ошибка подписки на канал инвалидации ролей %s', self._channel, exc_info=error)
+        self._local_cache.clear()
+        self._generation = None
+        sleep(self.LISTENER_ERROR_DELAY)
@@ -2,26 +2,117 @@
 from http import HTTPStatus
 from uuid import UUID
 
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
-from db import db_session
+from core.config import ROLES_CACHE_SETTINGS
+from db import db_session, user_roles_cache, permission_matrix
 from db_models import Role, user_role
-from schemes import ListResponseSchema, RoleSchema, list_response_schema, roles_schema
+from schemes import ListResponseSchema, RoleSchema, list_response_schema, role_schema, roles_schema
 from services.http_exceptions.common_exceptions import MissingUpdatedData, DuplicatedEntity
 from services.logs import logs
 
 logger = logs.get_logger()
 
+INVALIDATED_USERS_INFO_KEY = 'roles_cache_invalidated_users'
+INVALIDATED_ALL_INFO_KEY = 'roles_cache_invalidated_all'
+
 
 def get_user_roles(user_id: UUID) -> list[RoleSchema]:
     """
     Поиск всех ролей пользователя по `id`.
 
+    Роли берутся из кэша (см. services.role.cache), при промахе - из БД.
+
     Args:
         user_id: ID пользователя
 
     Returns:
-        Query: sqlalchemy.orm запрос
+        list[RoleSchema]: роли пользователя.
+    """
+    if not ROLES_CACHE_SETTINGS.enabled:
+        return _query_user_roles(user_id)
+
+    return user_roles_cache.get(user_id, _query_user_roles)
+
+
+def get_users_roles(user_ids: list[UUID | str]) -> dict[str, list[RoleSchema]]:
+    """
+    Функция возвращает роли нескольких пользователей.
+
+    Роли берутся из кэша, а роли пользователей, которых нет в кэше, загружаются из БД одним запросом.
+
+    Args:
+        user_ids: ID пользователей.
+
+    Returns:
+        dict[str, list[RoleSchema]]: роли по ID пользователей.
+    """
+    if not ROLES_CACHE_SETTINGS.enabled:
+        return _query_users_roles([str(user_id) for user_id in user_ids])
+
+    return user_roles_cache.get_many(user_ids, _query_users_roles)
+
+
+def invalidate_user_roles(*user_ids: UUID):
+    """
+    Функция сбрасывает кэш ролей пользователей после подтверждения текущей транзакции.
+
+    Кэш сбрасывается только после коммита, чтобы другой запрос не успел закэшировать роли,
+    прочитанные до изменения. При откате транзакции кэш не сбрасывается.
+
+    Args:
+        user_ids: ID пользователей.
+    """
+    db_session.info.setdefault(INVALIDATED_USERS_INFO_KEY, set()).update(map(str, user_ids))
+
+
+def invalidate_all_user_roles():
+    """
+    Функция сбрасывает кэш ролей всех пользователей после подтверждения текущей транзакции.
+
+    Вместе с ним перечитывается матрица разрешений: в ней хранятся имена ролей, а у удаленной роли удаляются
+    и разрешения.
+    """
+    db_session.info[INVALIDATED_ALL_INFO_KEY] = True
+
+
+@event.listens_for(db_session, 'after_commit')
+def _apply_roles_invalidation(session: Session):
+    """
+    Служебная функция. Сбрасывает кэш ролей, отложенный до коммита транзакции.
+
+    Args:
+        session: сессия БД.
+    """
+    user_ids = session.info.pop(INVALIDATED_USERS_INFO_KEY, None)
+
+    if session.info.pop(INVALIDATED_ALL_INFO_KEY, False):
+        user_roles_cache.invalidate_all()
+        permission_matrix.invalidate()
+    elif user_ids:
+        user_roles_cache.invalidate_users(*user_ids)
+
+
+@event.listens_for(db_session, 'after_rollback')
+def _discard_roles_invalidation(session: Session):
+    """
+    Служебная функция. Отменяет отложенный сброс кэша ролей при откате транзакции.
+
+    Args:
+        session: сессия БД.
+    """
+    session.info.pop(INVALIDATED_USERS_INFO_KEY, None)
+    session.info.pop(INVALIDATED_ALL_INFO_KEY, None)
+
+
+def _query_user_roles(user_id: UUID | str) -> list[RoleSchema]:
+    """
+    Служебная функция. Загружает роли пользователя из БД.
+
+    Args:
+        user_id: ID пользователя.
     """
     return roles_schema.dump(
         db_session
@@ -31,6 +122,27 @@ def get_user_roles(user_id: UUID) -> list[RoleSchema]:
     )
 
 
+def _query_users_roles(user_ids: list[str]) -> dict[str, list[RoleSchema]]:
+    """
+    Служебная функция. Загружает роли нескольких пользователей из БД одним запросом.
+
+    Args:
+        user_ids: ID пользователей.
+    """
+    users_roles = {user_id: [] for user_id in user_ids}
+    rows = (
+        db_session
+        .query(user_role.columns.user_id, Role.name, Role.id)
+        .select_from(user_role)
+        .join(Role, Role.id == user_role.columns.role_id)
+        .filter(user_role.columns.user_id.in_(user_ids))
+    )
+    for user_id, name, role_id in rows:
+        users_roles[str(user_id)].append(role_schema.dump(dict(name=name, id=role_id)))
+
+    return users_roles
+
+
 def get_role_by_id(role_id: UUID) -> Role:
     """
     Функция получает роль по Id
@@ -99,7 +211,7 @@ def update_role(role_id: UUID, new_name: str | None, new_description: str | None
         new_values['description'] = new_description
 
     try:
-        return bool(db_session.query(Role).filter_by(id=role_id).update(new_values))
+        is_updated = bool(db_session.query(Role).filter_by(id=role_id).update(new_values))
     except IntegrityError:
         logger.warning(
             'Попытка обновить роль role_id: %s. new_name: %s, new_description: %s',
@@ -110,6 +222,11 @@ def update_role(role_id: UUID, new_name: str | None, new_description: str | None
         )
         raise DuplicatedEntity('Такое имя роли уже используется.', HTTPStatus.BAD_REQUEST)
 
+    if is_updated:
+        invalidate_all_user_roles()
+
+    return is_updated
+
 
 def delete_role(role_id: UUID) -> bool:
     """
@@ -121,7 +238,12 @@ def delete_role(role_id: UUID) -> bool:
     Returns:
         bool: True - роль удалена, False - такой роли не существовало.
     """
-    return bool(db_session.query(Role).filter_by(id=role_id).delete())
+    is_deleted = bool(db_session.query(Role).filter_by(id=role_id).delete())
+
+    if is_deleted:
+        invalidate_all_user_roles()
+
+    return is_deleted
 
 
 def get_role_list() -> ListResponseSchema:
@@ -0,0 +1 @@
+"""Инициализирующий модуль пакета для работы с сессиями пользователей."""
@@ -0,0 +1,93 @@
+"""
+Модуль заполняет индекс сессий пользователей по уже сохраненным рефреш токенам.
+
+Нужен один раз после выкатки индекса: сессии, созданные до нее, в индексах отсутствуют.
+Повторный запуск безопасен - добавление в индекс идемпотентно.
+
+Запуск из папки src:
+    python -m services.sessions.backfill --batch-size 1000
+"""
+import argparse
+
+import jwt
+from redis import Redis
+
+from services.logs import logs
+from services.sessions.index import SessionIndex
+from services.storages.key_value.keys import is_session_key
+
+logger = logs.get_logger()
+
+
+def backfill_session_index(client: Redis, session_index: SessionIndex, batch_size: int) -> int:
+    """
+    Функция проходит по хранилищу рефреш токенов и добавляет найденные сессии в индексы пользователей.
+
+    Пользователь определяется по телу рефреш токена. Подпись не проверяется: токены берутся
+    из собственного хранилища сервиса, а срок их жизни ограничен временем жизни ключа.
+
+    Args:
+        client: клиент Redis хранилища рефреш токенов.
+        session_index: индекс сессий.
+        batch_size: сколько ключей читать и индексировать за одно обращение к Redis.
+
+    Returns:
+        int: количество проиндексированных сессий.
+    """
+    indexed = 0
+    session_keys = []
+
+    for key in client.scan_iter(count=batch_size):
+        if not is_session_key(key):
+            continue
+
+        session_keys.append(key)
+        if len(session_keys) >= batch_size:
+            indexed += _index_sessions(client, session_index, session_keys)
+            session_keys = []
+
+    return indexed + _index_sessions(client, session_index, session_keys)
+
+
+def _index_sessions(client: Redis, session_index: SessionIndex, session_keys: list[str]) -> int:
+    """
+    Служебная функция. Читает рефреш токены пачки сессий и добавляет сессии в индексы.
+
+    Args:
+        client: клиент Redis хранилища рефреш токенов.
+        session_index: индекс сессий.
+        session_keys: ключи сессий.
+
+    Returns:
+        int: количество проиндексированных сессий.
+    """
+    if not session_keys:
+        return 0
+
+    sessions = []
+    for session_key, refresh_token in zip(session_keys, client.mget(session_keys)):
+        if not refresh_token:
+            continue
+
+        try:
+            payload = jwt.decode(refresh_token, options={'verify_signature': False})
+            user_id = payload['sub']['user_id']
+        except (jwt.PyJWTError, KeyError, TypeError):
+            logger.warning('Ключ %s не содержит рефреш токен, пропускаем', session_key)
+            continue
+
+        sessions.append((user_id, session_key))
+
+    session_index.add_many(sessions)
+    return len(sessions)
+
+
+if __name__ == '__main__':
+    from db import refresh_list_client, session_index
+
+    parser = argparse.ArgumentParser(description='Заполнение индекса сессий пользователей.')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    count = backfill_session_index(refresh_list_client, session_index, args.batch_size)
+    logger.info('Проиндексировано сессий: %s', count)
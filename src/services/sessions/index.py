@@ -0,0 +1,133 @@
+"""
+Модуль реализует индекс сессий пользователя в хранилище рефреш токенов.
+
+Для каждого пользователя в Redis хранится множество ключей его рефреш токенов (сессий),
+поэтому выход со всех устройств не сканирует все ключи хранилища, а читает только сессии этого пользователя.
+Множество живет не меньше самой новой сессии пользователя: при каждом входе его время жизни продлевается.
+Ключи истекших сессий остаются во множестве до ближайшего выхода со всех устройств, где они просто пропускаются.
+Формат ключей описан в services.storages.key_value.keys: до завершения миграции ключей
+вместе с индексом текущей версии читается и индекс в старом формате.
+"""
+from datetime import timedelta
+from uuid import UUID
+
+from redis import Redis
+from redis.client import Pipeline
+
+from services.storages.key_value import keys
+
+POP_SESSIONS_LUA_SCRIPT = """
+local sessions = {}
+
+for _, index_key in ipairs(KEYS) do
+    for _, session_key in ipairs(redis.call('SMEMBERS', index_key)) do
+        local refresh_token = redis.call('GET', session_key)
+        if refresh_token then
+            sessions[#sessions + 1] = session_key
+            sessions[#sessions + 1] = refresh_token
+            redis.call('DEL', session_key)
+        end
+    end
+    redis.call('DEL', index_key)
+end
+
+return sessions
+"""
+
+
+class SessionIndex:
+    """Класс хранит рефреш токены пользователей вместе с индексом сессий каждого пользователя."""
+
+    def __init__(self, client: Redis, lifetime: timedelta):
+        """
+        Инициализирующий метод.
+
+        Args:
+            client: клиент Redis хранилища рефреш токенов.
+            lifetime: время жизни рефреш токена.
+        """
+        self._client = client
+        self._lifetime = lifetime
+        self._pop_sessions = client.register_script(POP_SESSIONS_LUA_SCRIPT)
+
+    def put(self, user_id: UUID | str, session_key: str, refresh_token: str):
+        """
+        Метод сохраняет рефреш токен сессии и добавляет сессию в индекс пользователя за одно обращение к Redis.
+
+        Args:
+            user_id: ID пользователя.
+            session_key: ключ сессии в хранилище рефреш токенов.
+            refresh_token: закодированный рефреш токен.
+        """
+        pipeline = self._client.pipeline(transaction=True)
+        pipeline.set(session_key, refresh_token, ex=self._lifetime)
+        self._add_to_index(pipeline, user_id, session_key)
+        pipeline.execute()
+
+    def delete(self, user_id: UUID | str, *session_keys: str):
+        """
+        Метод удаляет рефреш токены сессий и убирает сессии из индекса пользователя.
+
+        Args:
+            user_id: ID пользователя.
+            session_keys: ключи сессий в хранилище рефреш токенов.
+        """
+        if not session_keys:
+            return
+
+        pipeline = self._client.pipeline(transaction=True)
+        pipeline.delete(*session_keys)
+        pipeline.srem(keys.session_index_key(user_id), *session_keys)
+        pipeline.srem(keys.legacy_session_index_key(user_id), *session_keys)
+        pipeline.execute()
+
+    def pop_all(self, *user_ids: UUID | str) -> list[tuple[str, str]]:
+        """
+        Метод атомарно удаляет все сессии пользователей вместе с индексами и возвращает их.
+
+        Скрипт обращается к ключам сессий, которые не передаются в KEYS, поэтому рассчитан
+        на одиночный Redis (не кластер), как и остальные хранилища сервиса.
+
+        Args:
+            user_ids: ID пользователей.
+
+        Returns:
+            list[tuple[str, str]]: пары (ключ сессии, рефреш токен) для еще не истекших сессий.
+        """
+        if not user_ids:
+            return []
+
+        index_keys = []
+        for user_id in user_ids:
+            index_keys += [keys.session_index_key(user_id), keys.legacy_session_index_key(user_id)]
+
+        sessions = self._pop_sessions(keys=index_keys)
+        return list(zip(sessions[::2], sessions[1::2]))
+
+    def add_many(self, sessions: list[tuple[UUID | str, str]]):
+        """
+        Метод добавляет в индексы уже сохраненные сессии за одно обращение к Redis.
+
+        Args:
+            sessions: пары (ID пользователя, ключ сессии).
+        """
+        if not sessions:
+            return
+
+        pipeline = self._client.pipeline(transaction=False)
+        for user_id, session_key in sessions:
+            self._add_to_index(pipeline, user_id, session_key)
+        pipeline.execute()
+
+    def _add_to_index(self, pipeline: Pipeline, user_id: UUID | str, session_key: str):
+        """
+        Служебный метод. Добавляет в пайплайн команды добавления сессии в индекс и продления его времени жизни.
+
+        Args:
+            pipeline: пайплайн Redis.
+            user_id: ID пользователя.
+            session_key: ключ сессии.
+        """
+        index_key = keys.session_index_key(user_id)
+        pipeline.sadd(index_key, session_key)
+        pipeline.expire(index_key, self._lifetime)
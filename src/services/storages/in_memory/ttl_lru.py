@@ -0,0 +1,105 @@
+"""Модуль содержит ограниченный по размеру LRU-кэш с временем жизни записей."""
+from collections import OrderedDict
+from datetime import timedelta
+from time import monotonic
+from typing import Any, Hashable
+
+MISSING = object()
+
+
+class TTLLRUCache:
+    """
+    Класс LRU-кэша в памяти процесса, у записей которого есть время жизни.
+
+    При превышении максимального размера вытесняются давно не использованные записи.
+    Кэш не использует блокировки: под gevent переключение гринлетов происходит только на операциях ввода-вывода,
+    поэтому операции со словарем не прерываются.
+    """
+
+    def __init__(self, max_size: int, ttl: timedelta):
+        """
+        Инициализирующий метод.
+
+        Args:
+            max_size: максимальное количество записей.
+            ttl: время жизни записи по умолчанию.
+        """
+        self._max_size = max_size
+        self._ttl = ttl.total_seconds()
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Метод получает значение по ключу, если запись есть и не устарела.
+
+        Args:
+            key: ключ.
+            default: значение, возвращаемое при промахе.
+
+        Returns:
+            значение из кэша или default.
+        """
+        item = self._data.get(key)
+
+        if item is None or item[0] < monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: Hashable, value: Any, ttl: timedelta | None = None):
+        """
+        Метод сохраняет значение по ключу.
+
+        Args:
+            key: ключ.
+            value: значение.
+            ttl: время жизни записи, если отличается от времени жизни по умолчанию.
+        """
+        expire_at = monotonic() + (ttl.total_seconds() if ttl is not None else self._ttl)
+
+        self._data[key] = (expire_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """
+        Метод удаляет запись по ключу, если она есть.
+
+        Args:
+            key: ключ.
+        """
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Метод очищает кэш."""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает статистику использования кэша.
+
+        Returns:
+            dict: размер, хиты, промахи и доля попаданий.
+        """
+        requests = self.hits + self.misses
+
+        return {
+            'size': len(self._data),
+            'max_size': self._max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
@@ -0,0 +1,145 @@
+"""
+Модуль управляет пулами соединений с Redis для всех хранилищ сервиса.
+
+Каждое логическое хранилище (блоклист, рефреш токены, OAuth токены, rate limit) получает клиента
+поверх пула соединений с ограниченным количеством соединений. При нехватке соединений гринлеты ждут
+освобождения соединения не дольше заданного времени, а не открывают новые сокеты, поэтому всплеск трафика
+не приводит к тысячам соединений с Redis. Хранилища, указывающие на один и тот же сервер и номер БД,
+используют общий пул, так что несколько хранилищ можно перенести на один сервер с разными номерами БД.
+"""
+from time import perf_counter
+
+from redis import BlockingConnectionPool, Redis
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.retry import Retry
+
+from core.config import RedisPoolSettings
+
+
+class InstrumentedBlockingConnectionPool(BlockingConnectionPool):
+    """Класс пула соединений, который считает выдачи соединений, время ожидания и неудачные попытки."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquired = 0
+        self.failed = 0
+        self.max_wait = 0.0
+
+    def get_connection(self, command_name, *keys, **options):
+        start = perf_counter()
+
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except ConnectionError:
+            self.failed += 1
+            raise
+
+        self.acquired += 1
+        self.max_wait = max(self.max_wait, perf_counter() - start)
+        return connection
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает заполненность пула.
+
+        Returns:
+            dict: лимит, количество открытых, занятых и свободных соединений, статистика ожиданий и количество
+                неудачных попыток получить соединение (пул исчерпан или Redis недоступен).
+        """
+        idle = sum(1 for connection in list(self.pool.queue) if connection is not None)
+        created = len(self._connections)
+        in_use = created - idle
+
+        return {
+            'max_connections': self.max_connections,
+            'created': created,
+            'in_use': in_use,
+            'idle': idle,
+            'saturation': in_use / self.max_connections,
+            'acquired': self.acquired,
+            'failed': self.failed,
+            'max_wait_ms': self.max_wait * 1000,
+        }
+
+
+class RedisConnectionManager:
+    """Класс создает клиентов Redis для хранилищ сервиса поверх общих ограниченных пулов соединений."""
+
+    def __init__(self, settings: RedisPoolSettings):
+        """
+        Инициализирующий метод.
+
+        Args:
+            settings: настройки пулов соединений.
+        """
+        self._settings = settings
+        self._clients: dict[tuple[str, int, int], Redis] = {}
+        self._stores: dict[tuple[str, int, int], list[str]] = {}
+
+    def client(self, store: str, host: str, port: int, db: int = 0) -> Redis:
+        """
+        Метод возвращает клиента Redis для хранилища.
+
+        Если для того же сервера и номера БД клиент уже создан, хранилище использует его и его пул.
+
+        Args:
+            store: название хранилища, под ним пул попадает в метрики.
+            host: хост Redis.
+            port: порт Redis.
+            db: номер БД Redis.
+
+        Returns:
+            Redis: клиент хранилища.
+        """
+        address = (host, port, db)
+        self._stores.setdefault(address, []).append(store)
+
+        if address not in self._clients:
+            self._clients[address] = Redis(connection_pool=self._create_pool(host, port, db))
+
+        return self._clients[address]
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает заполненность всех пулов.
+
+        Returns:
+            dict: метрики пулов по адресам серверов с перечнем использующих их хранилищ.
+        """
+        return {
+            f'{host}:{port}/{db}': {
+                'stores': self._stores[(host, port, db)],
+                **client.connection_pool.stats(),
+            }
+            for (host, port, db), client in self._clients.items()
+        }
+
+    def _create_pool(self, host: str, port: int, db: int) -> InstrumentedBlockingConnectionPool:
+        """
+        Служебный метод. Создает пул соединений с таймаутами, keepalive и повторами с экспоненциальной задержкой.
+
+        Args:
+            host: хост Redis.
+            port: порт Redis.
+            db: номер БД Redis.
+        """
+        settings = self._settings
+
+        return InstrumentedBlockingConnectionPool(
+            host=host,
+            port=port,
+            db=db,
+            decode_responses=True,
+            max_connections=settings.max_connections,
+            timeout=settings.timeout,
+            socket_timeout=settings.socket_timeout,
+            socket_connect_timeout=settings.socket_connect_timeout,
+            socket_keepalive=settings.socket_keepalive,
+            health_check_interval=settings.health_check_interval,
+            retry=Retry(
+                ExponentialBackoff(cap=settings.retry_backoff_cap, base=settings.retry_backoff_base),
+                settings.retries,
+            ),
+            retry_on_error=[ConnectionError, TimeoutError],
+        )
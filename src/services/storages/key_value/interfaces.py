@@ -24,6 +24,32 @@ class BaseKeyValueStorage(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_many(self, keys: list) -> list:
+        """
+        Абстрактный метод для получения значений по нескольким ключам за одно обращение к хранилищу.
+
+        Args:
+            keys: ключи.
+
+        Returns:
+            метод должен возвращать список значений в порядке ключей (None для отсутствующих ключей)
+        """
+        pass
+
+    @abstractmethod
+    def exists_many(self, keys: list) -> list[bool]:
+        """
+        Абстрактный метод для проверки наличия нескольких ключей за одно обращение к хранилищу.
+
+        Args:
+            keys: ключи.
+
+        Returns:
+            метод должен возвращать список признаков наличия в порядке ключей
+        """
+        pass
+
     @abstractmethod
     def get_by_template(self, template: str):
         """
@@ -57,3 +83,14 @@ class BaseKeyValueStorage(ABC):
             expire: время жизни записи
         """
         pass
+
+    @abstractmethod
+    def put_many(self, items: dict, expire: int | timedelta | None = None):
+        """
+        Абстрактный метод для сохранения в хранилище нескольких значений за одно обращение к хранилищу.
+
+        Args:
+            items: значения по ключам.
+            expire: время жизни записей
+        """
+        pass
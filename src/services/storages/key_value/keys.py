@@ -0,0 +1,202 @@
+"""
+Модуль описывает схему ключей key-value хранилищ сервиса.
+
+Ключ строится как `<пространство имен>:<версия схемы>:<части ключа>` через двоеточие.
+Вместо полного user agent в ключ сессии попадает его короткий хэш, поэтому длина ключа не зависит
+от длины заголовка, а сессии пользователя ищутся по префиксу `rt:<версия>:<user_id>:`.
+При изменении формата ключей версия схемы увеличивается, а старый формат поддерживается
+функциями legacy_* до завершения миграции (см. services.storages.key_value.migrate_keys).
+Отозванные jti раньше хранились в блоклисте под ключом, равным самому jti: такие записи не переносятся,
+а читаются вместе с текущими, пока не истекут (не дольше времени жизни рефреш токена).
+"""
+from hashlib import blake2b
+from uuid import UUID
+
+KEY_SCHEMA_VERSION = 1
+USER_AGENT_DIGEST_SIZE = 8
+
+BLOCKLIST_NAMESPACE = 'bl'
+BLOCKLIST_LOG_NAMESPACE = 'bllog'
+SESSION_NAMESPACE = 'rt'
+SESSION_INDEX_NAMESPACE = 'rtidx'
+OAUTH_TOKEN_NAMESPACE = 'oauth'
+RATE_LIMIT_NAMESPACE = 'tat'
+USER_ROLES_NAMESPACE = 'roles'
+USER_ROLES_GENERATION_NAMESPACE = 'rolesgen'
+USER_ROLES_VERSION_NAMESPACE = 'rolesver'
+
+LEGACY_SESSION_INDEX_PREFIX = 'sessions'
+# jti старого формата - это uuid4 без пространства имен.
+LEGACY_BLOCKLIST_KEY_PATTERN = '????????-????-????-????-????????????'
+
+
+def build_key(namespace: str, *parts) -> str:
+    """
+    Функция строит ключ хранилища по текущей версии схемы.
+
+    Args:
+        namespace: пространство имен ключа.
+        parts: части ключа, приводятся к строке.
+    """
+    return ':'.join((namespace, str(KEY_SCHEMA_VERSION), *map(str, parts)))
+
+
+def user_agent_digest(user_agent: str | None) -> str:
+    """
+    Функция возвращает короткий хэш user agent для ключа сессии.
+
+    Args:
+        user_agent: информация об устройстве пользователя.
+    """
+    return blake2b((user_agent or '').encode('utf-8'), digest_size=USER_AGENT_DIGEST_SIZE).hexdigest()
+
+
+def blocklist_key(jti: str) -> str:
+    """
+    Функция возвращает ключ отозванного токена в блоклисте.
+
+    Args:
+        jti: идентификатор токена.
+    """
+    return build_key(BLOCKLIST_NAMESPACE, jti)
+
+
+def blocklist_log_key() -> str:
+    """Функция возвращает ключ журнала последних отзывов (jti с временем отзыва)."""
+    return build_key(BLOCKLIST_LOG_NAMESPACE)
+
+
+def blocklist_jti(key: str) -> str:
+    """
+    Функция возвращает идентификатор токена по ключу блоклиста (в любой версии схемы).
+
+    Args:
+        key: ключ блоклиста.
+    """
+    prefix = build_key(BLOCKLIST_NAMESPACE, '')
+    return key[len(prefix):] if key.startswith(prefix) else key
+
+
+def session_key(user_id: UUID | str, user_agent: str | None) -> str:
+    """
+    Функция возвращает ключ рефреш токена сессии пользователя на устройстве.
+
+    Args:
+        user_id: ID пользователя.
+        user_agent: информация об устройстве пользователя.
+    """
+    return build_key(SESSION_NAMESPACE, user_id, user_agent_digest(user_agent))
+
+
+def session_index_key(user_id: UUID | str) -> str:
+    """
+    Функция возвращает ключ индекса сессий пользователя.
+
+    Args:
+        user_id: ID пользователя.
+    """
+    return build_key(SESSION_INDEX_NAMESPACE, user_id)
+
+
+def oauth_token_key(provider: str, client_id_user: str, token_type: str) -> str:
+    """
+    Функция возвращает ключ токена пользователя, выданного OAuth провайдером.
+
+    Args:
+        provider: название провайдера.
+        client_id_user: ID пользователя у провайдера.
+        token_type: тип токена (access или refresh).
+    """
+    return build_key(OAUTH_TOKEN_NAMESPACE, provider, client_id_user, token_type)
+
+
+def rate_limit_key(class_name: str, method_name: str, user_id: str | None = None) -> str:
+    """
+    Функция возвращает ключ времени TAT для rate limit'а.
+
+    Args:
+        class_name: название класса ручки.
+        method_name: название метода ручки.
+        user_id: ID пользователя, если есть.
+    """
+    return build_key(RATE_LIMIT_NAMESPACE, class_name, method_name, user_id)
+
+
+def user_roles_key(generation: int, user_id: UUID | str) -> str:
+    """
+    Функция возвращает ключ закэшированных ролей пользователя.
+
+    Args:
+        generation: поколение кэша ролей, увеличивается при изменении любой роли.
+        user_id: ID пользователя.
+    """
+    return build_key(USER_ROLES_NAMESPACE, generation, user_id)
+
+
+def user_roles_generation_key() -> str:
+    """Функция возвращает ключ текущего поколения кэша ролей."""
+    return build_key(USER_ROLES_GENERATION_NAMESPACE)
+
+
+def user_roles_version_key(user_id: UUID | str) -> str:
+    """
+    Функция возвращает ключ версии ролей пользователя, увеличивается при каждом сбросе его ролей.
+
+    Args:
+        user_id: ID пользователя.
+    """
+    return build_key(USER_ROLES_VERSION_NAMESPACE, user_id)
+
+
+def is_session_key(key: str) -> bool:
+    """
+    Функция проверяет, что ключ хранилища рефреш токенов является ключом сессии (в любой версии схемы).
+
+    Args:
+        key: ключ хранилища.
+    """
+    return key.startswith(f'{SESSION_NAMESPACE}:') or is_legacy_session_key(key)
+
+
+def is_session_index_key(key: str) -> bool:
+    """
+    Функция проверяет, что ключ хранилища рефреш токенов является индексом сессий (в любой версии схемы).
+
+    Args:
+        key: ключ хранилища.
+    """
+    return key.startswith((f'{SESSION_INDEX_NAMESPACE}:', f'{LEGACY_SESSION_INDEX_PREFIX}:'))
+
+
+def is_legacy_session_key(key: str) -> bool:
+    """
+    Функция проверяет, что ключ сессии построен в старом формате generate_key.
+
+    Args:
+        key: ключ хранилища.
+    """
+    return key.startswith('(') and key.endswith(')_{}')
+
+
+def legacy_session_keys(user_id: UUID | str, user_agent: str | None) -> list[str]:
+    """
+    Функция возвращает возможные ключи сессии в старом формате `f'{args}_{kwargs}'`.
+
+    В старом формате ID пользователя попадал в ключ как UUID при входе и как строка при логауте,
+    поэтому проверяются оба варианта.
+
+    Args:
+        user_id: ID пользователя.
+        user_agent: информация об устройстве пользователя.
+    """
+    return [f'{(UUID(str(user_id)), user_agent)}_{{}}', f'{(str(user_id), user_agent)}_{{}}']
+
+
+def legacy_session_index_key(user_id: UUID | str) -> str:
+    """
+    Функция возвращает ключ индекса сессий пользователя в старом формате.
+
+    Args:
+        user_id: ID пользователя.
+    """
+    return f'{LEGACY_SESSION_INDEX_PREFIX}:{user_id}'
@@ -0,0 +1,109 @@
+"""
+Модуль переносит сессии из ключей старого формата generate_key в ключи текущей схемы.
+
+Для каждого ключа вида `"(UUID('...'), '<user agent>')_{}"` рефреш токен переписывается под ключ
+из services.storages.key_value.keys с сохранением оставшегося времени жизни, сессия добавляется
+в индекс сессий пользователя, а старый ключ удаляется. Повторный запуск безопасен.
+
+Запуск из папки src:
+    python -m services.storages.key_value.migrate_keys --batch-size 1000 [--dry-run]
+"""
+import argparse
+
+import jwt
+from redis import Redis
+
+from services.logs import logs
+from services.sessions.index import SessionIndex
+from services.storages.key_value.keys import is_legacy_session_key, legacy_session_index_key, session_key
+
+logger = logs.get_logger()
+
+
+def migrate_session_keys(client: Redis, session_index: SessionIndex, batch_size: int, dry_run: bool = False) -> int:
+    """
+    Функция переносит все сессии в старом формате ключей в ключи текущей схемы.
+
+    Args:
+        client: клиент Redis хранилища рефреш токенов.
+        session_index: индекс сессий.
+        batch_size: сколько ключей переносить за одно обращение к Redis.
+        dry_run: только посчитать ключи, которые будут перенесены.
+
+    Returns:
+        int: количество перенесенных (при dry_run - найденных) сессий.
+    """
+    migrated = 0
+    legacy_keys = []
+
+    for key in client.scan_iter(match='(*', count=batch_size):
+        if not is_legacy_session_key(key):
+            continue
+
+        legacy_keys.append(key)
+        if len(legacy_keys) >= batch_size:
+            migrated += len(legacy_keys) if dry_run else _migrate_batch(client, session_index, legacy_keys)
+            legacy_keys = []
+
+    return migrated + (len(legacy_keys) if dry_run else _migrate_batch(client, session_index, legacy_keys))
+
+
+def _migrate_batch(client: Redis, session_index: SessionIndex, legacy_keys: list[str]) -> int:
+    """
+    Служебная функция. Переносит пачку сессий.
+
+    Рефреш токены и их оставшееся время жизни читаются одним пайплайном,
+    а запись новых ключей и удаление старых выполняется вторым.
+
+    Args:
+        client: клиент Redis хранилища рефреш токенов.
+        session_index: индекс сессий.
+        legacy_keys: ключи сессий в старом формате.
+
+    Returns:
+        int: количество перенесенных сессий.
+    """
+    if not legacy_keys:
+        return 0
+
+    pipeline = client.pipeline(transaction=False)
+    for legacy_key in legacy_keys:
+        pipeline.get(legacy_key)
+        pipeline.pttl(legacy_key)
+    values = pipeline.execute()
+
+    sessions = []
+    pipeline = client.pipeline(transaction=False)
+    for legacy_key, refresh_token, ttl in zip(legacy_keys, values[::2], values[1::2]):
+        if not refresh_token or ttl == -2:
+            continue
+
+        try:
+            identity = jwt.decode(refresh_token, options={'verify_signature': False})['sub']
+            user_id, user_agent = identity['user_id'], identity.get('user_agent')
+        except (jwt.PyJWTError, KeyError, TypeError):
+            logger.warning('Ключ %s не содержит рефреш токен, пропускаем', legacy_key)
+            continue
+
+        new_key = session_key(user_id, user_agent)
+        pipeline.set(new_key, refresh_token, px=ttl if ttl > 0 else None)
+        pipeline.delete(legacy_key)
+        pipeline.srem(legacy_session_index_key(user_id), legacy_key)
+        sessions.append((user_id, new_key))
+
+    pipeline.execute()
+    session_index.add_many(sessions)
+
+    return len(sessions)
+
+
+if __name__ == '__main__':
+    from db import refresh_list_client, session_index
+
+    parser = argparse.ArgumentParser(description='Перенос ключей сессий в текущую схему ключей.')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    count = migrate_session_keys(refresh_list_client, session_index, args.batch_size, args.dry_run)
+    logger.info('%s сессий в старом формате ключей: %s', 'Найдено' if args.dry_run else 'Перенесено', count)
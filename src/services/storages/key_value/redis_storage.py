@@ -10,6 +10,14 @@ class RedisStorage(BaseKeyValueStorage):
     def get(self, key):
         return self._client.get(key)
 
+    def get_many(self, keys: list) -> list:
+        if not keys:
+            return []
+        return self._client.mget(keys)
+
+    def exists_many(self, keys: list) -> list[bool]:
+        return [value is not None for value in self.get_many(keys)]
+
     def get_by_template(self, template: str):
         for key in self._client.scan_iter(template):
             yield key, self._client.get(key)
@@ -19,3 +27,11 @@ class RedisStorage(BaseKeyValueStorage):
 
     def put(self, key, data, expire: int | timedelta | None = None):
         self._client.set(key, data, expire)
+
+    def put_many(self, items: dict, expire: int | timedelta | None = None):
+        if not items:
+            return
+        pipeline = self._client.pipeline(transaction=True)
+        for key, data in items.items():
+            pipeline.set(key, data, expire)
+        pipeline.execute()
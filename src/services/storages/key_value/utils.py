@@ -17,14 +17,3 @@ def get_key_value_storage_by_client(client):
         return RedisStorage(client)
 
     raise MissKeyValueInterfaceRealisation(client)
-
-
-def generate_key(*args, **kwargs):
-    """
-    Метод генерирует ключ для хранилища на основе параметров.
-
-    Args:
-          args: позиционные аргументы.
-          kwargs: именованные аргументы.
-    """
-    return f'{args}_{kwargs}'
@@ -0,0 +1,90 @@
+"""
+Модуль создает подключение к Postgres с настроенным и инструментированным пулом соединений.
+
+Сервис работает под gevent, и один процесс обслуживает сотни запросов одновременно, а сессия запроса держит
+соединение до конца транзакции, в том числе пока гринлет ждет Redis. Поэтому размер пула, ожидание свободного
+соединения и время жизни соединений задаются настройками, а пул считает, сколько запросы ждали соединение,
+сколько соединений занято и сколько открыто сверх размера пула. Запросы к БД ограничены statement_timeout,
+а соединения подписаны application_name, чтобы их было видно в pg_stat_activity.
+"""
+from time import perf_counter
+
+from sqlalchemy import Engine, create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from core.config import DataBaseEngineSettings
+
+
+class InstrumentedQueuePool(QueuePool):
+    """Класс пула соединений, который считает выдачи соединений, время ожидания и таймауты."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquired = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = perf_counter()
+
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+
+        wait = perf_counter() - start
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return connection
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает заполненность пула.
+
+        Returns:
+            dict: размер пула, лимит соединений, количество занятых, свободных и открытых сверх размера пула
+                соединений, количество выдач и таймаутов, среднее и максимальное время ожидания соединения.
+        """
+        max_connections = self.size() + self._max_overflow
+        in_use = self.checkedout()
+
+        return {
+            'pool_size': self.size(),
+            'max_connections': max_connections,
+            'in_use': in_use,
+            'idle': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+            'saturation': in_use / max_connections,
+            'acquired': self.acquired,
+            'timeouts': self.timeouts,
+            'mean_wait_ms': self.total_wait / self.acquired * 1000 if self.acquired else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+        }
+
+
+def create_db_engine(dsn: str, settings: DataBaseEngineSettings) -> Engine:
+    """
+    Функция создает подключение к Postgres с инструментированным пулом соединений.
+
+    Args:
+        dsn: строка подключения к БД.
+        settings: настройки пула соединений и сеанса БД.
+
+    Returns:
+        Engine: подключение к БД, метрики пула - `engine.pool.stats()`.
+    """
+    options = f'-c statement_timeout={settings.statement_timeout_ms}'
+
+    return create_engine(
+        dsn,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+        connect_args={'application_name': settings.application_name, 'options': options},
+    )
@@ -0,0 +1,352 @@
+"""
+Модуль содержит массовый импорт пользователей.
+
+Пользователи читаются из NDJSON или CSV и импортируются пачками. Каждая пачка загружается командой COPY
+во временную таблицу, из которой пользователи и их роли вставляются в основные таблицы одним запросом
+с `ON CONFLICT DO NOTHING`. Строки, которые не удалось импортировать (некорректные данные, неизвестные роли,
+занятые логин или email), попадают в отчет с номером строки, а остальные строки пачки импортируются.
+
+Пароль передается хэшем bcrypt или argon2id в поле `password_hash` или открытым текстом в поле `password`.
+Хэш argon2id принимается, только если в сервисе установлен пакет argon2-cffi.
+Открытые пароли хэшируются только при импорте из командной строки, в пуле процессов:
+в сервисе хэширование тысяч паролей заняло бы пул проверки паролей и остановило входы пользователей.
+
+Запуск из папки src:
+    python -m services.user.provisioning users.ndjson --format ndjson --processes 8
+"""
+import argparse
+import csv
+import io
+import json
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import ARRAY, Column, Integer, MetaData, Table, Text, any_, exists, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+
+from db import db_session, transaction
+from db_models import Role, User, user_role
+from services.logs import logs
+from services.passwords.policy import BACKENDS
+from services.passwords.utils import password_policy
+from services.permissions.config import RoleName
+
+logger = logs.get_logger()
+
+NDJSON_FORMAT = 'ndjson'
+CSV_FORMAT = 'csv'
+CSV_ROLES_SEPARATOR = '|'
+
+USER_FIELDS = ('login', 'email', 'first_name', 'surname', 'patronymic', 'phone')
+
+_staging_metadata = MetaData()
+
+user_import = Table(
+    'user_import',
+    _staging_metadata,
+    Column('line', Integer),
+    Column('id', UUID(as_uuid=True)),
+    *(Column(field, Text) for field in USER_FIELDS),
+    Column('password', Text),
+    Column('roles', ARRAY(Text)),
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='DROP',
+)
+STAGING_COLUMNS = ('line', 'id', *USER_FIELDS, 'password', 'roles')
+
+
+def read_records(lines: Iterable[str], data_format: str) -> Iterator[tuple[int, dict | None]]:
+    """
+    Функция читает записи о пользователях.
+
+    Args:
+        lines: строки файла или тела запроса.
+        data_format: формат данных (ndjson или csv). CSV должен содержать заголовок,
+            роли в колонке `roles` перечисляются через `|`.
+
+    Returns:
+        Iterator[tuple[int, dict | None]]: номер строки и запись. Если строку не удалось разобрать - None.
+    """
+    if data_format == CSV_FORMAT:
+        reader = csv.DictReader(lines)
+        for record in reader:
+            record = {key: value or None for key, value in record.items()}
+            if record.get('roles'):
+                record['roles'] = record['roles'].split(CSV_ROLES_SEPARATOR)
+            yield reader.line_num, record
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+
+        yield number, record if isinstance(record, dict) else None
+
+
+def hash_passwords(pool: ProcessPoolExecutor, processes: int, passwords: list[str]) -> list[str]:
+    """
+    Функция хэширует пароли по текущей политике в пуле процессов.
+
+    Args:
+        pool: пул процессов.
+        processes: количество процессов пула.
+        passwords: пароли.
+
+    Returns:
+        list[str]: хэши паролей в том же порядке.
+    """
+    chunksize = max(1, len(passwords) // (processes * 4))
+    return list(pool.map(password_policy.hash, passwords, chunksize=chunksize))
+
+
+class UserImporter:
+    """Класс импортирует пользователей пачками."""
+
+    def __init__(self, batch_size: int, hasher: Callable[[list[str]], list[str]] | None = None):
+        """
+        Инициализирующий метод.
+
+        Args:
+            batch_size: количество строк в одной пачке (и в одной транзакции).
+            hasher: функция хэширования списка открытых паролей. Если не задана, открытые пароли не принимаются.
+        """
+        self._batch_size = batch_size
+        self._hasher = hasher
+        self._role_names: set[str] = set()
+
+    def run(self, records: Iterable[tuple[int, dict | None]]) -> dict:
+        """
+        Метод импортирует пользователей.
+
+        Args:
+            records: номера строк и записи о пользователях (см. read_records).
+
+        Returns:
+            dict: количество созданных пользователей и ошибки по строкам.
+        """
+        self._role_names = set(db_session.execute(select(Role.name)).scalars())
+
+        created = 0
+        errors = []
+        records = iter(records)
+        while batch := list(islice(records, self._batch_size)):
+            batch_created, batch_errors = transaction(self._import_batch, batch)
+            created += batch_created
+            errors.extend(batch_errors)
+            logger.info('Импортирована пачка пользователей: создано %s, ошибок %s', batch_created, len(batch_errors))
+
+        return dict(created=created, errors=errors)
+
+    def _import_batch(self, batch: list[tuple[int, dict | None]]) -> tuple[int, list[dict]]:
+        """
+        Служебный метод. Импортирует одну пачку пользователей без подтверждения транзакции.
+
+        Args:
+            batch: номера строк и записи о пользователях.
+
+        Returns:
+            tuple[int, list[dict]]: количество созданных пользователей и ошибки по строкам.
+        """
+        errors = []
+        rows = []
+        for number, record in batch:
+            error = self._validate(record)
+            if error:
+                errors.append(dict(line=number, msg=error))
+            else:
+                rows.append((number, record))
+
+        plain_rows = [row for row in rows if not row[1].get('password_hash')]
+        if plain_rows:
+            hashes = self._hasher([record.get('password') for _, record in plain_rows])
+            for (_, record), password_hash in zip(plain_rows, hashes):
+                record['password_hash'] = password_hash
+
+        if not rows:
+            return 0, errors
+
+        self._copy(rows)
+        skipped_lines = self._insert()
+        errors.extend(self._get_conflict_errors(skipped_lines))
+
+        return len(rows) - len(skipped_lines), sorted(errors, key=lambda error: error['line'])
+
+    def _validate(self, record: dict | None) -> str | None:
+        """
+        Служебный метод. Проверяет запись и заполняет роли по умолчанию.
+
+        Args:
+            record: запись о пользователе.
+
+        Returns:
+            str | None: описание ошибки или None, если запись корректна.
+        """
+        if record is None:
+            return 'Некорректная запись.'
+
+        if not record.get('login') or not record.get('email'):
+            return 'Не переданы login или email.'
+
+        for field in USER_FIELDS:
+            value = record.get(field)
+            if value is not None and (not isinstance(value, str) or len(value) > User.__table__.c[field].type.length):
+                return f'Некорректное значение {field}.'
+
+        password_hash = record.get('password_hash')
+        if password_hash:
+            if (
+                not isinstance(password_hash, str)
+                or len(password_hash) > User.__table__.c.password.type.length
+                or not any(
+                    backend.is_available() and backend.identify(password_hash) for backend in BACKENDS.values()
+                )
+            ):
+                return 'Неподдерживаемый хэш пароля.'
+        elif not isinstance(record.get('password'), str) or not record.get('password'):
+            return 'Не передан пароль.'
+        elif self._hasher is None:
+            return 'Пароль должен быть передан хэшем в поле password_hash.'
+
+        roles = record.get('roles') or [RoleName.USER.value]
+        if not isinstance(roles, list) or not all(isinstance(role, str) for role in roles):
+            return 'Некорректный список ролей.'
+        if unknown_roles := set(roles) - self._role_names:
+            return f'В системе нет ролей: {", ".join(sorted(unknown_roles))}.'
+        record['roles'] = roles
+
+        return None
+
+    def _copy(self, rows: list[tuple[int, dict]]):
+        """
+        Служебный метод. Создает временную таблицу и загружает в нее пачку командой COPY.
+
+        Таблица удаляется при завершении транзакции.
+
+        Args:
+            rows: номера строк и проверенные записи о пользователях.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for number, record in rows:
+            writer.writerow((
+                number,
+                uuid.uuid4(),
+                *(record.get(field) for field in USER_FIELDS),
+                record.get('password_hash'),
+                '{%s}' % ','.join('"%s"' % role.replace('\\', '\\\\').replace('"', '\\"') for role in record['roles']),
+            ))
+        buffer.seek(0)
+
+        connection = db_session.connection()
+        user_import.create(connection)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {user_import.name} ({", ".join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+    def _insert(self) -> list[int]:
+        """
+        Служебный метод. Вставляет пользователей и их роли из временной таблицы одним запросом.
+
+        Returns:
+            list[int]: номера строк, пользователи из которых не были вставлены из-за конфликта логина или email.
+        """
+        now = datetime.utcnow()
+
+        inserted = (
+            pg_insert(User)
+            .from_select(
+                ['id', *USER_FIELDS, 'password', 'created_at', 'updated_at'],
+                select(
+                    user_import.c.id,
+                    *(user_import.c[field] for field in USER_FIELDS),
+                    user_import.c.password,
+                    literal(now),
+                    literal(now),
+                ).order_by(user_import.c.line),
+            )
+            .on_conflict_do_nothing()
+            .returning(User.id)
+            .cte('inserted')
+        )
+        inserted_roles = (
+            insert(user_role)
+            .from_select(
+                ['id', 'created_at', 'user_id', 'role_id'],
+                select(func.gen_random_uuid(), literal(now), user_import.c.id, Role.id)
+                .join(inserted, inserted.c.id == user_import.c.id)
+                .join(Role, Role.name == any_(user_import.c.roles)),
+            )
+            .returning(user_role.columns.role_id)
+            .cte('inserted_roles')
+        )
+
+        return list(db_session.execute(
+            select(user_import.c.line)
+            .add_cte(inserted_roles)
+            .where(user_import.c.id.not_in(select(inserted.c.id)))
+        ).scalars())
+
+    def _get_conflict_errors(self, lines: list[int]) -> list[dict]:
+        """
+        Служебный метод. Определяет, что именно занято у пользователей, которые не были вставлены.
+
+        Args:
+            lines: номера строк.
+
+        Returns:
+            list[dict]: ошибки по строкам.
+        """
+        if not lines:
+            return []
+
+        rows = db_session.execute(
+            select(
+                user_import.c.line,
+                exists().where(User.email == user_import.c.email),
+                exists().where(User.login == user_import.c.login),
+            ).where(user_import.c.line.in_(lines))
+        )
+
+        return [
+            dict(line=line, msg={
+                (True, True): 'Пользователь с таким email и login уже существует.',
+                (True, False): 'Пользователь с таким email уже существует.',
+                (False, True): 'Пользователь с таким login уже существует.',
+            }.get((is_email_exists, is_login_exists), 'Такой пользователь уже существует.'))
+            for line, is_email_exists, is_login_exists in rows
+        ]
+
+
+if __name__ == '__main__':
+    from core.config import USER_IMPORT_SETTINGS
+
+    parser = argparse.ArgumentParser(description='Массовый импорт пользователей.')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=(NDJSON_FORMAT, CSV_FORMAT), default=NDJSON_FORMAT)
+    parser.add_argument('--batch-size', type=int, default=USER_IMPORT_SETTINGS.batch_size)
+    parser.add_argument('--processes', type=int, default=USER_IMPORT_SETTINGS.hashing_processes)
+    parser.add_argument('--report', help='Файл для отчета об ошибках в формате NDJSON.')
+    args = parser.parse_args()
+
+    password_policy.calibrate()
+
+    with ProcessPoolExecutor(args.processes) as hashing_pool, open(args.path, encoding='utf-8', newline='') as file:
+        importer = UserImporter(args.batch_size, hasher=partial(hash_passwords, hashing_pool, args.processes))
+        result = importer.run(read_records(file, args.format))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as report:
+            report.writelines(json.dumps(error, ensure_ascii=False) + '\n' for error in result['errors'])
+
+    logger.info('Создано пользователей: %s, ошибок: %s', result['created'], len(result['errors']))
@@ -1,24 +1,29 @@
 """Модуль содержит различные утилиты для работы с пользователями."""
 
+import json
 import secrets
 import uuid
 from collections import defaultdict
+from datetime import datetime
 from http import HTTPStatus
 from operator import le, ge
 from string import ascii_letters
+from typing import Generator
 
-from sqlalchemy import insert, delete, select, and_, asc, Select, Result
+from sqlalchemy import insert, delete, select, and_, asc, tuple_, func, literal, Select, Result
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.query import Query
 
 from core.config import DB_SETTINGS
 from db import db_session
 from db_models import User, user_role, OAuthUser, Role
-from schemes import users_schema
+from schemes import UserSchema, users_schema
 from services.http_exceptions.common_exceptions import HTTPIntegrityError, MissingEntity, MissingSearchData
 from services.logs import logs
 from services.oauth.parsers import OAuthUserInfo
-from services.role.utils import get_user_roles, get_roles_by_names
+from services.pagination import decode_cursor, encode_cursor
+from services.role.utils import get_user_roles, get_roles_by_names, invalidate_user_roles
 from services.utils import SearchInfoUserParams
 
 logger = logs.get_logger()
@@ -55,6 +60,66 @@ def create_user(user: User):
     db_session.add(user)
 
 
+def create_user_with_roles(user: User, role_names: list[str]) -> bool:
+    """
+    Функция создает пользователя вместе с ролями одним запросом без подтверждения транзакции сессии.
+
+    Пользователь вставляется с `ON CONFLICT DO NOTHING`: занятые логин или email определяет сама БД,
+    поэтому не нужна предварительная проверка и между проверкой и вставкой нет гонки.
+    Роли вставляются в том же запросе через CTE, только если пользователь был создан.
+    Если хотя бы одной из ролей нет, выбрасывается исключение, и транзакцию нужно откатить.
+
+    Args:
+        user: модель пользователя.
+        role_names: наименования ролей.
+
+    Returns:
+        bool: True - пользователь создан, False - пользователь с таким логином или email уже существует.
+
+    Raises:
+        MissingEntity
+    """
+    now = datetime.utcnow()
+    user.id = user.id or uuid.uuid4()
+    user.created_at = user.created_at or now
+    user.updated_at = user.updated_at or now
+
+    new_user = (
+        pg_insert(User)
+        .values({column.key: getattr(user, column.key) for column in User.__table__.columns})
+        .on_conflict_do_nothing()
+        .returning(User.id)
+        .cte('new_user')
+    )
+    new_user_roles = (
+        insert(user_role)
+        .from_select(
+            ['id', 'created_at', 'user_id', 'role_id'],
+            select(func.gen_random_uuid(), literal(now), new_user.c.id, Role.id).where(Role.name.in_(role_names)),
+        )
+        .returning(user_role.columns.role_id)
+        .cte('new_user_roles')
+    )
+
+    user_id, roles_count = db_session.execute(
+        select(
+            select(new_user.c.id).scalar_subquery(),
+            select(func.count()).select_from(new_user_roles).scalar_subquery(),
+        )
+    ).one()
+
+    if not user_id:
+        return False
+
+    if roles_count < len(set(role_names)):
+        raise MissingEntity(
+            msg='В системе нет указанных ролей.',
+            http_status=HTTPStatus.BAD_REQUEST,
+        )
+
+    return True
+
+
 def get_user_by_id(user_id: uuid) -> Query | None:
     """
     Поиск пользователя по ID.
@@ -161,6 +226,8 @@ def add_roles_to_user(user_id, role_names: list[str]):
             http_status=HTTPStatus.CONFLICT,
         )
 
+    invalidate_user_roles(user_id)
+
 
 def delete_roles_from_user(user_id, role_names: list[str]):
     """
@@ -200,6 +267,8 @@ def delete_roles_from_user(user_id, role_names: list[str]):
             http_status=HTTPStatus.CONFLICT,
         )
 
+    invalidate_user_roles(user_id)
+
 
 def generate_random_string(count_letters: int) -> str:
     """Метод создаёт набор данных для записи в таблицу `user`"""
@@ -246,13 +315,21 @@ def create_oauth_user(user_info: dict) -> None:
 
 
 class InfoUsersList:
-    """Класс предоставляющий доступ к персональной информации о пользователях в списковом формате."""
+    """
+    Класс предоставляющий доступ к персональной информации о пользователях в списковом формате.
+
+    Поддерживаются два режима выдачи страниц: по номеру страницы (OFFSET, для совместимости) и по курсору
+    (если номер страницы не передан, см. services.pagination). Полная выгрузка отдается потоком без загрузки
+    всех пользователей в память.
+    """
+
+    EXPORT_BATCH_SIZE = 1000
 
     def __init__(self, params: dict):
         self.params = params
-        print(params)
         self._limit = self.params.get(SearchInfoUserParams.LIMIT.value)
         self._page_number = self.params.get(SearchInfoUserParams.PAGE_NUMBER.value)
+        self._cursor = self.params.get(SearchInfoUserParams.CURSOR.value)
         self._answer_body = defaultdict(list)
 
     def get(self) -> dict:
@@ -270,6 +347,30 @@ class InfoUsersList:
 
         return self._answer_body
 
+    def export(self) -> Generator[str, None, None]:
+        """
+        Метод выгружает персональную информацию о всех подходящих пользователях в формате NDJSON.
+
+        Пользователи читаются серверным курсором пачками по EXPORT_BATCH_SIZE строк,
+        поэтому в памяти одновременно находится не больше одной пачки.
+
+        Returns:
+            Генератор строк JSON, по одной на пользователя.
+        """
+        columns = [getattr(User, field) for field in UserSchema.Meta.fields]
+        query = (
+            self._filter_query(select(*columns))
+            .order_by(asc(User.created_at), asc(User.id))
+            .execution_options(yield_per=self.EXPORT_BATCH_SIZE)
+        )
+
+        result = db_session.execute(query)
+        try:
+            for row in result:
+                yield json.dumps(row._asdict(), default=str, ensure_ascii=False) + '\n'
+        finally:
+            result.close()
+
     def _get_query(self) -> Select | str:
         """
         Метод формирует запрос в зависимости от параметра поиска или выдаёт ошибку
@@ -277,53 +378,69 @@ class InfoUsersList:
         Returns:
             Сортированный SQL-запрос или ошибку
         """
-        if self.params.get(SearchInfoUserParams.USER_IDS.value):
-            query = self._user_model_query(self.params.get(SearchInfoUserParams.USER_IDS.value))
-        elif self.params.get(SearchInfoUserParams.USER_GROUPS.value):
-            query = self._user_role_model_query(self.params.get(SearchInfoUserParams.USER_GROUPS.value))
-        else:
-            query = select(User)
-        return (
-            query
-            .order_by(asc(User.created_at))
+        query = (
+            self._filter_query(select(User))
+            .order_by(asc(User.created_at), asc(User.id))
             .limit(self._limit + 1)
-            .offset((self._page_number - 1) * self._limit)
         )
 
-    def _user_model_query(self, user_ids: list) -> Select:
+        if self._page_number:
+            return query.offset((self._page_number - 1) * self._limit)
+
+        if self._cursor:
+            query = query.where(tuple_(User.created_at, User.id) > decode_cursor(self._cursor))
+
+        return query
+
+    def _filter_query(self, query: Select) -> Select:
+        """
+        Метод добавляет в запрос условия по параметрам поиска.
+
+        Args:
+            query: запрос к таблице пользователей.
+
+        Returns:
+            Select query
+        """
+        if self.params.get(SearchInfoUserParams.USER_IDS.value):
+            return self._user_model_query(query, self.params.get(SearchInfoUserParams.USER_IDS.value))
+        if self.params.get(SearchInfoUserParams.USER_GROUPS.value):
+            return self._user_role_model_query(query, self.params.get(SearchInfoUserParams.USER_GROUPS.value))
+        return query
+
+    def _user_model_query(self, query: Select, user_ids: list) -> Select:
         """
         Метод формирует запрос в SQL-запрос для получения пользователей по `id` из `user_ids`
 
         Args:
+            query: запрос к таблице пользователей.
             user_ids: список UUID пользователей
 
         Returns:
             Select query
         """
+        return query.where(User.id.in_(user_ids))
 
-        query = (
-            select(User)
-            .where(User.id.in_(user_ids))
-        )
-        return query
-
-    def _user_role_model_query(self, role_names: list[str]) -> Select:
+    def _user_role_model_query(self, query: Select, role_names: list[str]) -> Select:
         """
         Метод формирует запрос в SQL-запрос для получения пользователей соотв. группы из `role_names`
 
+        Пользователи отбираются подзапросом, а не соединением с `user_role`,
+        поэтому пользователь с несколькими подходящими ролями попадает в выдачу один раз.
+
         Args:
+            query: запрос к таблице пользователей.
             role_names: список названий групп
 
         Returns:
             Select query
         """
-        query = (
-            select(User)
-            .join(user_role)
-            .join(Role)
+        users_with_roles = (
+            select(user_role.columns.user_id)
+            .join(Role, Role.id == user_role.columns.role_id)
             .where(Role.name.in_(role_names))
         )
-        return query
+        return query.where(User.id.in_(users_with_roles))
 
     def _build_page_answer(self, result: Result) -> None:
         """
@@ -334,13 +451,15 @@ class InfoUsersList:
         """
 
         info_users = list(result.scalars())
-        length = len(info_users)
-        serialize = users_schema.dump
+        has_next = len(info_users) > self._limit
+        info_users = info_users[:self._limit]
 
-        if length > self._limit:
-            obj, next_page = serialize(info_users[:self._limit]), self._page_number + 1
-        else:
-            obj, next_page = serialize(info_users[:length]), None
+        self._answer_body['result'] = users_schema.dump(info_users)
 
-        self._answer_body['result'] = obj
-        self._answer_body['outcome'].append({'next_page': next_page})
+        if self._page_number:
+            self._answer_body['outcome'].append({'next_page': self._page_number + 1 if has_next else None})
+        else:
+            last_user = info_users[-1] if has_next else None
+            self._answer_body['outcome'].append(
+                {'next_cursor': encode_cursor(last_user.created_at, last_user.id) if last_user else None}
+            )
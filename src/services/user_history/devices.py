@@ -0,0 +1,94 @@
+"""
+Модуль содержит определение устройства пользователя по user agent.
+
+Разбор user agent (пакет user-agents) прогоняет строку через десятки регулярных выражений, а почти все входы
+приходят с небольшого набора строк user agent. Поэтому результат разбора кэшируется в ограниченном LRU-кэше
+по самой строке: повторные входы с того же устройства не разбирают строку заново.
+Собственный кэш ua-parser хранит только 200 строк и очищается целиком при заполнении, поэтому при потоке
+уникальных строк (версии сборок, встроенные браузеры приложений) он сбрасывается и для популярных строк.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+
+from user_agents import parse
+
+from services.storages.in_memory.ttl_lru import TTLLRUCache, MISSING
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+    """Сведения об устройстве, с которого был осуществлен вход."""
+
+    device_type: str
+    device_family: str
+    browser_family: str
+    os_family: str
+
+
+def classify_user_agent(user_agent: str) -> DeviceInfo:
+    """
+    Функция разбирает user agent без кэширования.
+
+    Тип устройства: pc, mobile или other (планшеты, боты и неизвестные устройства).
+
+    Args:
+        user_agent: строка user agent.
+
+    Returns:
+        DeviceInfo: сведения об устройстве.
+    """
+    parsed_user_agent = parse(user_agent)
+
+    if parsed_user_agent.is_pc:
+        device_type = 'pc'
+    elif parsed_user_agent.is_mobile:
+        device_type = 'mobile'
+    else:
+        device_type = 'other'
+
+    return DeviceInfo(
+        device_type=device_type,
+        device_family=parsed_user_agent.device.family,
+        browser_family=parsed_user_agent.browser.family,
+        os_family=parsed_user_agent.os.family,
+    )
+
+
+class UserAgentClassifier:
+    """Класс определяет устройство по user agent и кэширует результат."""
+
+    def __init__(self, max_size: int, ttl: timedelta):
+        """
+        Инициализирующий метод.
+
+        Args:
+            max_size: максимальное количество строк user agent в кэше.
+            ttl: сколько хранить результат разбора.
+        """
+        self._cache = TTLLRUCache(max_size, ttl)
+
+    def classify(self, user_agent: str) -> DeviceInfo:
+        """
+        Метод возвращает сведения об устройстве из кэша, при промахе разбирает user agent.
+
+        Args:
+            user_agent: строка user agent.
+
+        Returns:
+            DeviceInfo: сведения об устройстве.
+        """
+        device_info = self._cache.get(user_agent, MISSING)
+        if device_info is MISSING:
+            device_info = classify_user_agent(user_agent)
+            self._cache.put(user_agent, device_info)
+
+        return device_info
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает статистику кэша.
+
+        Returns:
+            dict: размер, хиты, промахи и доля попаданий.
+        """
+        return self._cache.stats()
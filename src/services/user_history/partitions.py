@@ -0,0 +1,344 @@
+"""
+Модуль содержит управление партициями истории входов по времени.
+
+Таблица истории входов разбита по типу устройства (LIST), а каждая партиция устройства - по месяцам
+(RANGE по created_at): `user_auth_history_pc_p202610` хранит входы с ПК за октябрь 2026 года.
+Запросы за последние месяцы читают только небольшие партиции и их индексы, а старые данные удаляются
+отсоединением и удалением целой партиции вместо DELETE по миллионам строк.
+
+Менеджер партиций заранее создает партиции на несколько месяцев вперед и отсоединяет (или удаляет) партиции
+старше срока хранения. По умолчанию срок хранения не задан и история хранится всегда, а устаревшие партиции
+только отсоединяются: удаление истории включается явно (retention_action=drop). Партиция всей истории до разбиения
+по месяцам (`_legacy`) тоже считается устаревшей, когда ее верхняя граница выходит за срок хранения.
+У каждой партиции устройства есть партиция по умолчанию для строк вне созданных диапазонов: если строки в нее
+все-таки попали, при создании партиции месяца они переносятся в новую партицию.
+Менеджер запускается по расписанию в каждом воркере, но работает только один из них (advisory lock в Postgres).
+
+Запуск из папки src:
+    python -m services.user_history.partitions --premake-months 3 --retention-months 12 --retention-action detach
+"""
+import argparse
+import re
+from datetime import datetime, timedelta
+
+import gevent
+from sqlalchemy import Connection, Engine, func, select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from services.logs import logs
+
+logger = logs.get_logger()
+
+DEVICE_TYPES = ('pc', 'mobile', 'other')
+
+RETENTION_DROP = 'drop'
+RETENTION_DETACH = 'detach'
+
+LOCK_TIMEOUT = '5s'
+UPPER_BOUND_PATTERN = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    """
+    Функция возвращает начало месяца, смещенного от заданного момента.
+
+    Args:
+        moment: момент времени.
+        months: смещение в месяцах.
+
+    Returns:
+        datetime: полночь первого дня месяца.
+    """
+    month_index = moment.year * 12 + moment.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def device_partition_name(table: str, device_type: str) -> str:
+    """Функция возвращает имя партиции устройства."""
+    return f'{table}_{device_type}'
+
+
+def month_partition_name(table: str, device_type: str, start: datetime) -> str:
+    """Функция возвращает имя партиции устройства за месяц."""
+    return f'{device_partition_name(table, device_type)}_p{start:%Y%m}'
+
+
+def default_partition_name(table: str, device_type: str) -> str:
+    """Функция возвращает имя партиции по умолчанию для партиции устройства."""
+    return f'{device_partition_name(table, device_type)}_default'
+
+
+def create_month_partition(connection: Connection, schema: str, table: str, device_type: str, start: datetime) -> bool:
+    """
+    Функция создает партицию устройства за месяц, если ее еще нет, без подтверждения транзакции.
+
+    Партиция создается отдельной таблицей, в нее переносятся строки этого месяца из партиции по умолчанию,
+    и только затем она присоединяется: так создание не падает, если строки месяца уже попали в партицию по умолчанию.
+
+    Args:
+        connection: соединение с БД.
+        schema: схема таблицы истории входов.
+        table: имя таблицы истории входов.
+        device_type: тип устройства.
+        start: начало месяца.
+
+    Returns:
+        bool: True - партиция создана, False - партиция уже существовала.
+    """
+    name = month_partition_name(table, device_type, start)
+    if connection.execute(select(func.to_regclass(f'{schema}.{name}'))).scalar():
+        return False
+
+    parent = f'{schema}.{device_partition_name(table, device_type)}'
+    default = f'{schema}.{default_partition_name(table, device_type)}'
+    bounds = {'start': start, 'end': month_start(start, 1)}
+
+    connection.execute(text(f'CREATE TABLE {schema}.{name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    connection.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {default} WHERE created_at >= :start AND created_at < :end RETURNING *
+        )
+        INSERT INTO {schema}.{name} SELECT * FROM moved
+    """), bounds)
+    connection.execute(text(
+        f"ALTER TABLE {parent} ATTACH PARTITION {schema}.{name} "
+        f"FOR VALUES FROM ('{bounds['start']:%Y-%m-%d}') TO ('{bounds['end']:%Y-%m-%d}')"
+    ))
+
+    return True
+
+
+class HistoryPartitionManager:
+    """Класс создает будущие партиции истории входов и удаляет партиции старше срока хранения."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        schema: str,
+        table: str,
+        premake_months: int,
+        retention_months: int,
+        retention_action: str = RETENTION_DETACH,
+    ):
+        """
+        Инициализирующий метод.
+
+        Args:
+            engine: подключение к БД.
+            schema: схема таблицы истории входов.
+            table: имя таблицы истории входов.
+            premake_months: на сколько месяцев вперед создавать партиции.
+            retention_months: сколько полных месяцев хранить историю, не считая текущего. 0 - хранить всегда.
+            retention_action: что делать с устаревшими партициями: drop - удалять, detach - только отсоединять.
+        """
+        self._engine = engine
+        self._schema = schema
+        self._table = table
+        self._premake_months = premake_months
+        self._retention_months = retention_months
+        self._retention_action = retention_action
+
+        self._greenlet: gevent.Greenlet | None = None
+
+        self._runs = 0
+        self._errors = 0
+        self._created = 0
+        self._removed = 0
+        self._last_run_at: datetime | None = None
+
+    def run(self, now: datetime | None = None, dry_run: bool = False) -> dict:
+        """
+        Метод создает недостающие партиции и удаляет устаревшие.
+
+        Если менеджер уже работает в другом процессе, ничего не делает.
+
+        Args:
+            now: текущий момент, по умолчанию - текущее время UTC.
+            dry_run: только определить, какие партиции будут созданы и удалены.
+
+        Returns:
+            dict: созданные и удаленные партиции, признак того, что менеджер работал в другом процессе.
+        """
+        now = now or datetime.utcnow()
+        result = {'created': [], 'removed': [], 'skipped': False}
+
+        with self._engine.connect() as connection:
+            if not connection.execute(select(func.pg_try_advisory_lock(func.hashtext(self._lock_name)))).scalar():
+                connection.rollback()
+                result['skipped'] = True
+                return result
+
+            try:
+                connection.execute(text(f"SET lock_timeout = '{LOCK_TIMEOUT}'"))
+                connection.commit()
+
+                for device_type in DEVICE_TYPES:
+                    result['created'].extend(self._create_partitions(connection, device_type, now, dry_run))
+                    result['removed'].extend(self._remove_partitions(connection, device_type, now, dry_run))
+            finally:
+                connection.rollback()
+                connection.execute(select(func.pg_advisory_unlock(func.hashtext(self._lock_name))))
+                connection.execute(text('RESET lock_timeout'))
+                connection.commit()
+
+        if not dry_run:
+            self._runs += 1
+            self._created += len(result['created'])
+            self._removed += len(result['removed'])
+            self._last_run_at = now
+
+        return result
+
+    def start(self, interval: timedelta):
+        """
+        Метод запускает обслуживание партиций по расписанию в фоне.
+
+        Args:
+            interval: интервал между запусками.
+        """
+        if self._greenlet:
+            return
+
+        self._greenlet = gevent.spawn(self._run_forever, interval.total_seconds())
+
+    def stop(self):
+        """Метод останавливает обслуживание партиций по расписанию."""
+        if self._greenlet:
+            self._greenlet.kill()
+            self._greenlet = None
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает статистику обслуживания партиций.
+
+        Returns:
+            dict: настройки, количество запусков и ошибок, созданных и удаленных партиций, время последнего запуска.
+        """
+        return {
+            'running': self._greenlet is not None,
+            'premake_months': self._premake_months,
+            'retention_months': self._retention_months,
+            'retention_action': self._retention_action,
+            'runs': self._runs,
+            'errors': self._errors,
+            'created': self._created,
+            'removed': self._removed,
+            'last_run_at': self._last_run_at.isoformat() if self._last_run_at else None,
+        }
+
+    @property
+    def _lock_name(self) -> str:
+        """Имя advisory lock менеджера партиций."""
+        return f'partitions:{self._schema}.{self._table}'
+
+    def _run_forever(self, interval: float):
+        """
+        Служебный метод. Обслуживает партиции с заданным интервалом.
+
+        Args:
+            interval: интервал между запусками в секундах.
+        """
+        while True:
+            try:
+                result = self.run()
+                if result['created'] or result['removed']:
+                    logger.info('Партиции истории входов обновлены: %s', result)
+            except SQLAlchemyError:
+                self._errors += 1
+                logger.warning('Не удалось обновить партиции истории входов', exc_info=True)
+
+            gevent.sleep(interval)
+
+    def _create_partitions(self, connection: Connection, device_type: str, now: datetime, dry_run: bool) -> list[str]:
+        """
+        Служебный метод. Создает партиции устройства с текущего месяца на заданное количество месяцев вперед.
+
+        Каждая партиция создается в отдельной транзакции.
+
+        Returns:
+            list[str]: имена созданных партиций.
+        """
+        created = []
+        for months in range(self._premake_months + 1):
+            start = month_start(now, months)
+            name = month_partition_name(self._table, device_type, start)
+
+            if dry_run:
+                if not connection.execute(select(func.to_regclass(f'{self._schema}.{name}'))).scalar():
+                    created.append(name)
+                continue
+
+            with connection.begin():
+                if create_month_partition(connection, self._schema, self._table, device_type, start):
+                    created.append(name)
+
+        return created
+
+    def _remove_partitions(self, connection: Connection, device_type: str, now: datetime, dry_run: bool) -> list[str]:
+        """
+        Служебный метод. Отсоединяет и удаляет партиции устройства, все строки которых старше срока хранения.
+
+        Returns:
+            list[str]: имена удаленных (отсоединенных) партиций.
+        """
+        if not self._retention_months:
+            return []
+
+        cutoff = month_start(now, -self._retention_months)
+        parent = f'{self._schema}.{device_partition_name(self._table, device_type)}'
+
+        partitions = connection.execute(text("""
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(:parent)
+        """), {'parent': parent}).all()
+        connection.rollback()
+
+        removed = []
+        for name, bound in partitions:
+            upper_bound = UPPER_BOUND_PATTERN.search(bound)
+            if not upper_bound or datetime.fromisoformat(upper_bound.group(1)) > cutoff:
+                continue
+
+            removed.append(name)
+            if dry_run:
+                continue
+
+            with connection.begin():
+                connection.execute(text(f'ALTER TABLE {parent} DETACH PARTITION {self._schema}.{name}'))
+                if self._retention_action == RETENTION_DROP:
+                    connection.execute(text(f'DROP TABLE {self._schema}.{name}'))
+
+        return removed
+
+
+if __name__ == '__main__':
+    from core.config import DB_SETTINGS, HISTORY_PARTITION_SETTINGS
+    from db import engine
+    from db_models import UserAuthHistory
+
+    parser = argparse.ArgumentParser(description='Обслуживание партиций истории входов.')
+    parser.add_argument('--premake-months', type=int, default=HISTORY_PARTITION_SETTINGS.premake_months)
+    parser.add_argument('--retention-months', type=int, default=HISTORY_PARTITION_SETTINGS.retention_months)
+    parser.add_argument(
+        '--retention-action',
+        choices=(RETENTION_DROP, RETENTION_DETACH),
+        default=HISTORY_PARTITION_SETTINGS.retention_action,
+    )
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    manager = HistoryPartitionManager(
+        engine=engine,
+        schema=DB_SETTINGS.pg_schema,
+        table=UserAuthHistory.__tablename__,
+        premake_months=args.premake_months,
+        retention_months=args.retention_months,
+        retention_action=args.retention_action,
+    )
+    run_result = manager.run(dry_run=args.dry_run)
+    if run_result['skipped']:
+        logger.info('Партиции обслуживаются другим процессом, повторите позже')
+    logger.info('Созданы партиции: %s', run_result['created'])
+    logger.info('Удалены партиции: %s', run_result['removed'])
@@ -0,0 +1,207 @@
+"""
+Модуль содержит сводку истории входов по устройствам пользователя.
+
+Для каждого пользователя хранится строка на устройство (тип устройства и семейства устройства, браузера и ОС
+из user agent): когда был первый и последний вход и сколько всего было входов. Сводка обновляется в той же
+транзакции, что и запись истории входов, и только по действительно вставленным строкам истории, поэтому повторная
+запись пачки не увеличивает счетчики дважды. Ручка устройств пользователя читает сводку, а не всю историю входов.
+
+Для истории, записанной до появления сводки, есть заполнение по партициям истории в нескольких процессах
+(одна партиция - одна задача). Заполняются только входы до момента --until: по умолчанию это самый ранний
+вход, уже попавший в сводку при записи истории, т.е. момент включения обновления сводки. Заполнение нужно
+запустить один раз, повторный запуск увеличит счетчики повторно.
+
+Запуск из папки src:
+    python -m services.user_history.rollup --processes 4
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import repeat
+from typing import Iterable
+
+from sqlalchemy import Connection, Engine, Table, create_engine, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from services.logs import logs
+from services.user_history.devices import DeviceInfo, UserAgentClassifier
+
+logger = logs.get_logger()
+
+FAMILY_MAX_LENGTH = 255
+BACKFILL_CACHE_SIZE = 100_000
+BACKFILL_CACHE_TTL = timedelta(days=1)
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def merge_device_rollup(records: Iterable[dict]) -> list[dict]:
+    """
+    Функция сводит записи о входах в строки сводки по устройствам.
+
+    Args:
+        records: записи с ключами user_id, device (DeviceInfo), first_seen, last_seen, logins.
+
+    Returns:
+        list[dict]: строки сводки, отсортированные по ключу устройства, чтобы параллельные обновления
+            блокировали строки в одном порядке.
+    """
+    rollup = {}
+    for record in records:
+        device: DeviceInfo = record['device']
+        key = (
+            str(record['user_id']),
+            device.device_type,
+            device.device_family[:FAMILY_MAX_LENGTH],
+            device.browser_family[:FAMILY_MAX_LENGTH],
+            device.os_family[:FAMILY_MAX_LENGTH],
+        )
+
+        row = rollup.get(key)
+        if row is None:
+            rollup[key] = dict(
+                user_id=record['user_id'],
+                device_type=key[1],
+                device_family=key[2],
+                browser_family=key[3],
+                os_family=key[4],
+                first_seen=record['first_seen'],
+                last_seen=record['last_seen'],
+                logins=record['logins'],
+            )
+            continue
+
+        row['first_seen'] = min(row['first_seen'], record['first_seen'])
+        row['last_seen'] = max(row['last_seen'], record['last_seen'])
+        row['logins'] += record['logins']
+
+    return [rollup[key] for key in sorted(rollup)]
+
+
+def upsert_device_rollup(connection: Connection, table: Table, records: Iterable[dict]):
+    """
+    Функция добавляет записи о входах в сводку по устройствам без подтверждения транзакции.
+
+    Args:
+        connection: соединение (или сессия) с БД.
+        table: таблица сводки по устройствам.
+        records: записи с ключами user_id, device (DeviceInfo), first_seen, last_seen, logins.
+    """
+    rows = merge_device_rollup(records)
+    if not rows:
+        return
+
+    statement = pg_insert(table)
+    statement = statement.on_conflict_do_update(
+        constraint='uc_user_device_unique',
+        set_={
+            'first_seen': func.least(table.c.first_seen, statement.excluded.first_seen),
+            'last_seen': func.greatest(table.c.last_seen, statement.excluded.last_seen),
+            'logins': table.c.logins + statement.excluded.logins,
+        },
+    )
+    connection.execute(statement, rows)
+
+
+def get_history_partitions(connection: Connection, schema: str, table: str) -> list[str]:
+    """
+    Функция возвращает конечные партиции истории входов (партиции устройств по месяцам).
+
+    Args:
+        connection: соединение с БД.
+        schema: схема таблицы истории входов.
+        table: имя таблицы истории входов.
+
+    Returns:
+        list[str]: имена партиций со схемой.
+    """
+    return connection.execute(text("""
+        SELECT relid::regclass::text
+        FROM pg_partition_tree(to_regclass(:table))
+        WHERE isleaf
+    """), {'table': f'{schema}.{table}'}).scalars().all()
+
+
+_backfill_engine: Engine | None = None
+_backfill_table: Table | None = None
+
+
+def _init_backfill_worker(dsn: str, table: Table):
+    """
+    Служебная функция. Создает подключение к БД в процессе заполнения.
+
+    Args:
+        dsn: строка подключения к БД.
+        table: таблица сводки по устройствам.
+    """
+    global _backfill_engine, _backfill_table
+    _backfill_engine = create_engine(dsn)
+    _backfill_table = table
+
+
+def backfill_partition(partition: str, until: datetime) -> int:
+    """
+    Функция добавляет в сводку по устройствам входы из одной партиции истории.
+
+    Входы группируются в БД по пользователю и user agent, а разобранные user agent кэшируются,
+    поэтому разбирается каждая строка user agent один раз.
+
+    Args:
+        partition: имя партиции истории со схемой.
+        until: до какого момента учитывать входы.
+
+    Returns:
+        int: количество учтенных входов.
+    """
+    classifier = UserAgentClassifier(BACKFILL_CACHE_SIZE, BACKFILL_CACHE_TTL)
+    logins = 0
+
+    with _backfill_engine.connect() as connection:
+        result = connection.execution_options(yield_per=BACKFILL_BATCH_SIZE).execute(text(f"""
+            SELECT user_id, user_agent, min(created_at), max(created_at), count(*)
+            FROM ONLY {partition}
+            WHERE created_at < :until
+            GROUP BY user_id, user_agent
+        """), {'until': until})
+
+        for rows in result.partitions():
+            records = [
+                dict(user_id=user_id, device=classifier.classify(user_agent),
+                     first_seen=first_seen, last_seen=last_seen, logins=count)
+                for user_id, user_agent, first_seen, last_seen, count in rows
+            ]
+            logins += sum(record['logins'] for record in records)
+
+            with _backfill_engine.begin() as write_connection:
+                upsert_device_rollup(write_connection, _backfill_table, records)
+
+    return logins
+
+
+if __name__ == '__main__':
+    from core.config import DB_SETTINGS
+    from db import engine
+    from db_models import UserAuthHistory, UserDevice
+
+    parser = argparse.ArgumentParser(description='Заполнение сводки истории входов по устройствам.')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--until', type=datetime.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    with engine.connect() as main_connection:
+        until = args.until or main_connection.execute(
+            text(f'SELECT min(first_seen) FROM {DB_SETTINGS.pg_schema}.{UserDevice.__tablename__}')
+        ).scalar() or datetime.utcnow()
+        history_partitions = get_history_partitions(
+            main_connection, DB_SETTINGS.pg_schema, UserAuthHistory.__tablename__
+        )
+    engine.dispose()
+
+    logger.info('Заполнение сводки по устройствам: входы до %s, партиций: %s', until, len(history_partitions))
+    with ProcessPoolExecutor(
+        args.processes,
+        initializer=_init_backfill_worker,
+        initargs=(DB_SETTINGS.pg_dsn, UserDevice.__table__),
+    ) as pool:
+        counts = pool.map(backfill_partition, history_partitions, repeat(until))
+        for name, counted in zip(history_partitions, counts):
+            logger.info('Партиция %s: учтено входов %s', name, counted)
@@ -1,15 +1,49 @@
 """Модуль содержит различные утилиты для работы с историей пользователей."""
 import uuid
-from http import HTTPStatus
-
-from user_agents import parse
-from sqlalchemy import desc, and_
-from sqlalchemy.exc import DataError
-
-from db import db_session
-from db_models import User, UserAuthHistory
-from schemes import auth_histories_schema, list_response_schema, ListResponseSchema
-from services.http_exceptions.navigation_exceptions import WrongSearchAfter
+from datetime import datetime
+
+from sqlalchemy import and_, desc, select, tuple_
+
+from core.config import AUTH_HISTORY_SETTINGS, DB_SETTINGS, HISTORY_PARTITION_SETTINGS, USER_AGENT_SETTINGS
+from db import db_session, engine
+from db_models import User, UserAuthHistory, UserDevice
+from schemes import auth_histories_schema, list_response_schema, user_devices_schema, ListResponseSchema
+from services.metrics.registry import register_metrics_source
+from services.pagination import decode_cursor, encode_cursor
+from services.user_history.devices import UserAgentClassifier
+from services.user_history.partitions import HistoryPartitionManager
+from services.user_history.rollup import upsert_device_rollup
+from services.user_history.writer import AuthHistoryWriter
+
+
+user_agent_classifier = UserAgentClassifier(
+    max_size=USER_AGENT_SETTINGS.cache_max_size,
+    ttl=USER_AGENT_SETTINGS.cache_ttl,
+)
+register_metrics_source('user_agents', user_agent_classifier.stats)
+
+
+auth_history_writer = AuthHistoryWriter(
+    engine=engine,
+    table=UserAuthHistory.__table__,
+    device_table=UserDevice.__table__,
+    device_resolver=user_agent_classifier.classify,
+    batch_size=AUTH_HISTORY_SETTINGS.batch_size,
+    max_queue=AUTH_HISTORY_SETTINGS.max_queue,
+    flush_interval=AUTH_HISTORY_SETTINGS.flush_interval,
+    retry_delay=AUTH_HISTORY_SETTINGS.retry_delay,
+)
+register_metrics_source('auth_history', auth_history_writer.stats)
+
+history_partition_manager = HistoryPartitionManager(
+    engine=engine,
+    schema=DB_SETTINGS.pg_schema,
+    table=UserAuthHistory.__tablename__,
+    premake_months=HISTORY_PARTITION_SETTINGS.premake_months,
+    retention_months=HISTORY_PARTITION_SETTINGS.retention_months,
+    retention_action=HISTORY_PARTITION_SETTINGS.retention_action,
+)
+register_metrics_source('history_partitions', history_partition_manager.stats)
 
 
 def create_user_history(user: User, user_agent: str = 'unknown'):
@@ -18,83 +52,103 @@ def create_user_history(user: User, user_agent: str = 'unknown'):
     Раздел device_type записывается в зависимости от устройства:
     mobile, pc или other.
 
+    По умолчанию событие только ставится в очередь фоновой записи (см. services.user_history.writer)
+    и попадает в БД с задержкой до интервала записи, независимо от транзакции входа.
+    Вместе с историей обновляется сводка по устройствам пользователя.
+
     Args:
         user: пользователь
         user_agent: информация об устройсве, с которого пользователь осуществил вход.
     """
-    parsed_user_agent = parse(user_agent)
-
-    if parsed_user_agent.is_pc:
-        device_type = 'pc'
-    elif parsed_user_agent.is_mobile:
-        device_type = 'mobile'
-    else:
-        device_type = 'other'
+    if AUTH_HISTORY_SETTINGS.async_enabled:
+        auth_history_writer.enqueue(user.id, user_agent)
+        return
 
+    device = user_agent_classifier.classify(user_agent)
     history = UserAuthHistory(
         user_id=user.id,
         user_agent=user_agent,
-        device_type=device_type
+        device_type=device.device_type,
+        created_at=datetime.utcnow(),
     )
-    return db_session.add(history)
+    db_session.add(history)
+    upsert_device_rollup(db_session, UserDevice.__table__, [dict(
+        user_id=user.id, device=device, first_seen=history.created_at, last_seen=history.created_at, logins=1,
+    )])
 
 
 def get_user_history_list(
-        user_id: uuid,
+        user_id: uuid.UUID | str,
         limit: int,
-        search_after: list | None = None
+        cursor: str | None = None
 ) -> ListResponseSchema:
     """
-    Функция получает историю по пользователю.
+    Функция получает историю входов пользователя, начиная с последнего входа.
+
+    Страница выбирается по курсору `(created_at, id)` в два шага: ключи страницы - только по покрывающему индексу
+    `(user_id, created_at DESC, id DESC) INCLUDE (device_type)` без чтения строк таблицы, и уже затем user agent
+    только для записей страницы по первичному ключу. Так слияние партиций по месяцам не читает из таблицы
+    строки, которые не попадут на страницу.
 
     Args:
         user_id: идентификатор пользователя.
         limit: количество возвращаемых записей.
+        cursor: курсор из outcome.next_cursor предыдущей страницы.
 
     Returns:
-        list[UserAuthHistory]
+        ListResponseSchema: записи истории и курсор следующей страницы.
+
+    Raises:
+        InvalidData
     """
-    result_search_after = None
-
-    if search_after is None:
-        history_query = (
-            db_session.query(UserAuthHistory).
-            filter_by(user_id=user_id).
-            order_by(desc(UserAuthHistory.created_at), desc(UserAuthHistory.id)).
-            limit(limit)
-        )
-    else:
-        try:
-            created_at,  = search_after
-        except ValueError:
-            raise WrongSearchAfter(
-                'Ошибочные значения для фильтра search_after. '
-                'Пример корректных значений: '
-                'search_after=2023-02-21T19:43:47.030500&search_after=9dc06f01-93cd-4237-a3c1-d9130e720c35',
-                HTTPStatus.BAD_REQUEST
-            )
-
-        history_query = (
-            db_session.query(UserAuthHistory).filter_by(user_id=user_id).
-            where(and_(UserAuthHistory.created_at < created_at)).
-            order_by(desc(UserAuthHistory.created_at), desc(UserAuthHistory.id)).
-            limit(limit)
-        )
-
-    try:
-        history = auth_histories_schema.dump(history_query)
-    except DataError:
-        raise WrongSearchAfter('Некорректные параметры запроса', HTTPStatus.BAD_REQUEST)
-
-    if history:
-        last_row = history[-1]
-        result_search_after = last_row.get('created_at') if len(history) == limit else None
+    page = (
+        select(UserAuthHistory.created_at, UserAuthHistory.id, UserAuthHistory.device_type)
+        .where(UserAuthHistory.user_id == user_id)
+        .order_by(desc(UserAuthHistory.created_at), desc(UserAuthHistory.id))
+        .limit(limit + 1)
+    )
+    if cursor:
+        page = page.where(tuple_(UserAuthHistory.created_at, UserAuthHistory.id) < decode_cursor(cursor))
+    page = page.subquery('page')
+
+    history_query = (
+        select(page.c.id, page.c.created_at, page.c.device_type, UserAuthHistory.user_agent)
+        .join_from(page, UserAuthHistory, and_(
+            UserAuthHistory.id == page.c.id,
+            UserAuthHistory.device_type == page.c.device_type,
+            UserAuthHistory.created_at == page.c.created_at,
+        ))
+        .order_by(desc(page.c.created_at), desc(page.c.id))
+    )
+
+    history = [dict(row._mapping, user_id=user_id) for row in db_session.execute(history_query)]
+    has_next = len(history) > limit
+    history = history[:limit]
+    last_row = history[-1] if has_next else None
 
     result = {
-        'result': history,
+        'result': auth_histories_schema.dump(history),
         'outcome': {
-            'search_after': result_search_after,
+            'next_cursor': encode_cursor(last_row['created_at'], last_row['id']) if last_row else None,
         }
     }
 
     return list_response_schema.dump(result)
+
+
+def get_user_devices(user_id: uuid.UUID | str) -> list[dict]:
+    """
+    Функция получает устройства, с которых входил пользователь, начиная с последнего входа.
+
+    Устройства читаются из сводки по устройствам, поэтому запрос не зависит от количества входов.
+
+    Args:
+        user_id: идентификатор пользователя.
+
+    Returns:
+        list[dict]: устройства с временем первого и последнего входа и количеством входов.
+    """
+    devices = db_session.scalars(
+        select(UserDevice).where(UserDevice.user_id == user_id).order_by(desc(UserDevice.last_seen))
+    )
+    return user_devices_schema.dump(devices)
@@ -0,0 +1,301 @@
+"""
+Модуль содержит фоновую запись истории входов пользователей.
+
+Вход пользователя только кладет событие в ограниченную очередь воркера, а фоновый гринлет забирает события
+пачками (по размеру пачки или по истечении интервала) и записывает их в БД одним многострочным INSERT.
+Разбор user agent тоже выполняется при записи, а не во время входа. В той же транзакции обновляется
+сводка по устройствам пользователей (см. services.user_history.rollup).
+
+Запись выполняется не меньше одного раза: при ошибке БД пачка записывается повторно, пока не будет записана,
+а повторная вставка уже записанных событий игнорируется (`ON CONFLICT DO NOTHING` по ID события).
+Событие, которое нельзя записать (например, пользователь уже удален), пропускается с записью в лог,
+чтобы не блокировать остальные. Если очередь заполнена, событие записывается сразу в запросе входа;
+если и эта запись не удалась, событие теряется с записью в лог, а вход не прерывается ошибкой.
+При остановке сервиса оставшиеся в очереди события дописываются.
+"""
+import uuid
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Callable
+from uuid import UUID
+
+import gevent
+from gevent.queue import Empty, Full, Queue
+from sqlalchemy import Engine, Table
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from services.logs import logs
+from services.user_history.devices import DeviceInfo
+from services.user_history.rollup import upsert_device_rollup
+
+logger = logs.get_logger()
+
+STOP = object()
+
+
+class AuthHistoryWriter:
+    """Класс записывает события истории входов в БД пачками в фоне."""
+
+    STOP_FLUSH_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        engine: Engine,
+        table: Table,
+        device_table: Table,
+        device_resolver: Callable[[str], DeviceInfo],
+        batch_size: int,
+        max_queue: int,
+        flush_interval: timedelta,
+        retry_delay: timedelta,
+    ):
+        """
+        Инициализирующий метод.
+
+        Args:
+            engine: подключение к БД.
+            table: таблица истории входов.
+            device_table: таблица сводки по устройствам.
+            device_resolver: функция, определяющая устройство по user agent.
+            batch_size: максимальное количество событий в одной вставке.
+            max_queue: максимальное количество событий, ожидающих записи.
+            flush_interval: сколько копить события перед записью неполной пачки.
+            retry_delay: пауза перед повторной записью пачки после ошибки БД.
+        """
+        self._engine = engine
+        self._table = table
+        self._device_table = device_table
+        self._device_resolver = device_resolver
+        self._batch_size = batch_size
+        self._max_queue = max_queue
+        self._flush_interval = flush_interval.total_seconds()
+        self._retry_delay = retry_delay.total_seconds()
+
+        self._queue = Queue(max_queue)
+        self._greenlet: gevent.Greenlet | None = None
+        self._stopping = False
+
+        self._enqueued = 0
+        self._written = 0
+        self._skipped = 0
+        self._dropped = 0
+        self._overflows = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._last_flush_duration = 0.0
+        self._max_flush_duration = 0.0
+
+    def enqueue(self, user_id: UUID | str, user_agent: str):
+        """
+        Метод добавляет событие входа в очередь записи.
+
+        Если фоновая запись не запущена или очередь заполнена, событие записывается сразу.
+        Ошибка такой записи не передается в запрос входа: событие пропускается с записью в лог.
+
+        Args:
+            user_id: ID пользователя.
+            user_agent: информация об устройстве, с которого был осуществлен вход.
+        """
+        event = dict(id=uuid.uuid4(), user_id=user_id, user_agent=user_agent, created_at=datetime.utcnow())
+
+        if not self._is_running() or self._stopping:
+            self._write_now(event)
+            return
+
+        try:
+            self._queue.put_nowait(event)
+            self._enqueued += 1
+        except Full:
+            self._overflows += 1
+            logger.warning('Очередь записи истории входов заполнена, событие записывается сразу')
+            self._write_now(event)
+
+    def start(self):
+        """Метод запускает фоновую запись."""
+        if self._is_running():
+            return
+
+        self._stopping = False
+        self._greenlet = gevent.spawn(self._run)
+
+    def stop(self, timeout: timedelta):
+        """
+        Метод останавливает фоновую запись, предварительно записав события из очереди.
+
+        Args:
+            timeout: сколько ждать записи оставшихся событий.
+        """
+        if not self._greenlet:
+            return
+
+        self._stopping = True
+        try:
+            self._queue.put(STOP, timeout=timeout.total_seconds())
+        except Full:
+            pass
+
+        self._greenlet.join(timeout.total_seconds())
+        if not self._greenlet.dead:
+            self._greenlet.kill()
+            logger.error('Не удалось записать события истории входов при остановке: %s', self._queue.qsize())
+
+        self._greenlet = None
+
+    def stats(self) -> dict:
+        """
+        Метод возвращает статистику записи.
+
+        Returns:
+            dict: глубина очереди, количество событий и записей пачками, длительность записи.
+        """
+        return {
+            'running': self._is_running(),
+            'queue_depth': self._queue.qsize(),
+            'max_queue': self._max_queue,
+            'enqueued': self._enqueued,
+            'written': self._written,
+            'skipped': self._skipped,
+            'dropped': self._dropped,
+            'overflows': self._overflows,
+            'flushes': self._flushes,
+            'failed_flushes': self._failed_flushes,
+            'last_flush_ms': self._last_flush_duration * 1000,
+            'max_flush_ms': self._max_flush_duration * 1000,
+        }
+
+    def _is_running(self) -> bool:
+        """Служебный метод. Проверяет, что фоновый гринлет запущен и не завершился."""
+        return self._greenlet is not None and not self._greenlet.dead
+
+    def _run(self):
+        """Служебный метод. Забирает события из очереди пачками и записывает их, пока запись не остановлена."""
+        stopped = False
+        while not stopped:
+            batch, stopped = self._collect_batch()
+            if batch:
+                self._flush(batch)
+
+        batch = []
+        while not self._queue.empty():
+            event = self._queue.get_nowait()
+            if event is not STOP:
+                batch.append(event)
+            if len(batch) >= self._batch_size:
+                self._flush(batch)
+                batch = []
+
+        if batch:
+            self._flush(batch)
+
+    def _collect_batch(self) -> tuple[list[dict], bool]:
+        """
+        Служебный метод. Ждет первое событие и добирает к нему события, пришедшие за интервал записи.
+
+        Returns:
+            tuple[list[dict], bool]: пачка событий и признак остановки записи.
+        """
+        event = self._queue.get()
+        if event is STOP:
+            return [], True
+
+        batch = [event]
+        deadline = perf_counter() + self._flush_interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - perf_counter()
+            if timeout <= 0:
+                break
+
+            try:
+                event = self._queue.get(timeout=timeout)
+            except Empty:
+                break
+
+            if event is STOP:
+                return batch, True
+            batch.append(event)
+
+        return batch, False
+
+    def _flush(self, batch: list[dict]):
+        """
+        Служебный метод. Записывает пачку, повторяя запись при ошибках БД.
+
+        При остановке сервиса количество попыток ограничено, чтобы остановка не зависла при недоступной БД.
+        Ошибка, не связанная с БД, не исправится повторной записью: такая пачка пропускается, а запись продолжается.
+        Длительность записи включает неудачные попытки и паузы между ними.
+
+        Args:
+            batch: события входа.
+        """
+        attempt = 0
+        start = perf_counter()
+        while True:
+            attempt += 1
+            try:
+                self._write(batch)
+                break
+            except SQLAlchemyError:
+                self._failed_flushes += 1
+                logger.warning('Не удалось записать историю входов, событий: %s', len(batch), exc_info=True)
+                if self._stopping and attempt >= self.STOP_FLUSH_ATTEMPTS:
+                    self._dropped += len(batch)
+                    logger.error('История входов не записана при остановке, событий: %s', len(batch))
+                    return
+                gevent.sleep(self._retry_delay)
+            except Exception:
+                self._failed_flushes += 1
+                self._dropped += len(batch)
+                logger.error('История входов не записана, событий: %s', len(batch), exc_info=True)
+                return
+
+        self._flushes += 1
+        self._last_flush_duration = perf_counter() - start
+        self._max_flush_duration = max(self._max_flush_duration, self._last_flush_duration)
+
+    def _write_now(self, event: dict):
+        """
+        Служебный метод. Записывает событие в запросе входа, не передавая ошибку записи в запрос.
+
+        Args:
+            event: событие входа.
+        """
+        try:
+            self._write([event])
+        except Exception:
+            self._failed_flushes += 1
+            self._dropped += 1
+            logger.error('Событие входа пользователя %s не записано', event['user_id'], exc_info=True)
+
+    def _write(self, events: list[dict]):
+        """
+        Служебный метод. Записывает события одним многострочным INSERT и обновляет сводку по устройствам.
+
+        Сводка обновляется только по вставленным строкам: уже записанные события повторно не учитываются.
+        Если пачка нарушает ограничения БД, события записываются по одному, а нарушающие пропускаются.
+
+        Args:
+            events: события входа.
+        """
+        devices = {event['id']: self._device_resolver(event['user_agent']) for event in events}
+        rows = [dict(event, device_type=devices[event['id']].device_type) for event in events]
+        statement = pg_insert(self._table).on_conflict_do_nothing().returning(self._table.c.id)
+
+        try:
+            with self._engine.begin() as connection:
+                inserted = set(connection.execute(statement, rows).scalars())
+                upsert_device_rollup(connection, self._device_table, (
+                    dict(user_id=row['user_id'], device=devices[row['id']],
+                         first_seen=row['created_at'], last_seen=row['created_at'], logins=1)
+                    for row in rows if row['id'] in inserted
+                ))
+            self._written += len(inserted)
+            return
+        except IntegrityError:
+            if len(rows) == 1:
+                self._skipped += 1
+                logger.warning('Событие входа пользователя %s пропущено', rows[0]['user_id'], exc_info=True)
+                return
+
+        for event in events:
+            self._write([event])
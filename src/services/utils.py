@@ -10,7 +10,7 @@ from sqlalchemy.exc import IntegrityError, InternalError
 from sqlalchemy.ext.declarative import declarative_base
 
 from core.config import DB_SETTINGS, APP_SETTINGS
-from db import db_session
+from db import db_session, permission_matrix
 from db_models import User, Role, user_role, Scope, Permissions
 from schemes import base_schema
 from services.passwords.utils import get_hash_password
@@ -171,6 +171,8 @@ def create_permissions():
     for permission in all_permissions:
         _insert_values(Permissions, permission)
 
+    permission_matrix.invalidate()
+
 
 def fallback_exception_response(*args, **kwargs) -> tuple[base_schema, HTTPStatus]:
     """Базовый ответ в случае неожиданной ошибки в функции."""
@@ -226,6 +228,7 @@ class SearchInfoUserParams(str, Enum):
     USER_GROUPS = "user_groups"
     PAGE_NUMBER = "page_number"
     LIMIT = 'limit'
+    CURSOR = 'cursor'
 
 
 if __name__ == '__main__':
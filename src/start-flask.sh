@@ -23,7 +23,7 @@ wait_database $REDIS_HOST $REDIS_PORT $BLOCKLIST_REDIS_TYPE
 
 wait_database $RATE_LIMIT_REDIS_HOST $RATE_LIMIT_REDIS_PORT $RATE_LIMIT_REDIS_TYPE
 
-alembic upgrade head
+python3 migrate.py
 
 python3 app.py
 
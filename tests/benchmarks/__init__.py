@@ -0,0 +1 @@
+"""Инициализирующий модуль для бенчмарков сервиса аутентификации."""
@@ -0,0 +1,50 @@
+"""
+Бенчмарк предварительного фильтра отозванных токенов.
+
+Для заданного количества отозванных jti выводит память, занимаемую фильтром, оценку вероятности
+ложноположительного ответа и фактическую долю ложноположительных ответов на случайных неотозванных jti,
+а также время одной проверки.
+
+Запуск:
+    PYTHONPATH=src python -m tests.benchmarks.bloom --revoked 100000 --checks 100000
+"""
+import argparse
+from datetime import timedelta
+from time import perf_counter
+from uuid import uuid4
+
+from services.revocation.bloom import TimeBucketedBloomFilter
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--revoked', type=int, default=100_000)
+    arg_parser.add_argument('--checks', type=int, default=100_000)
+    arg_parser.add_argument('--buckets', type=int, default=8)
+    arg_parser.add_argument('--bucket-capacity', type=int, default=100_000)
+    arg_parser.add_argument('--error-rate', type=float, default=0.01)
+    arg_parser.add_argument('--lifetime-days', type=int, default=7)
+    args = arg_parser.parse_args()
+
+    lifetime = timedelta(days=args.lifetime_days)
+    prefilter = TimeBucketedBloomFilter(lifetime, args.buckets, args.bucket_capacity, args.error_rate)
+
+    for index in range(args.revoked):
+        prefilter.add(str(uuid4()), lifetime * (index + 1) / args.revoked)
+
+    candidates = [str(uuid4()) for _ in range(args.checks)]
+    start = perf_counter()
+    false_positives = sum(candidate in prefilter for candidate in candidates)
+    elapsed = perf_counter() - start
+
+    stats = prefilter.stats()
+    print(
+        f'revoked={args.revoked} buckets={stats["buckets"]} memory={stats["memory_bytes"] / 1024:.1f}KiB '
+        f'estimated_fpr={stats["estimated_false_positive_rate"]:.5f} '
+        f'observed_fpr={false_positives / args.checks:.5f} '
+        f'check={elapsed / args.checks * 1_000_000:.2f}us'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Нагрузочный тест пула соединений с Postgres: ожидание соединения при разном размере пула.
+
+--concurrency потоков выполняют по --requests запросов; каждый запрос берет соединение из пула и держит его
+--hold-ms миллисекунд (`pg_sleep`), как запрос сервиса держит соединение до конца транзакции.
+Для каждого размера пула из --pool-sizes выводятся задержки получения соединения (checkout), количество
+таймаутов ожидания, пропускная способность и метрики пула (занятые соединения, открытые сверх размера пула).
+Подключение создается той же фабрикой, что и в сервисе, остальные настройки пула берутся из .env.
+
+Запуск (нужен Postgres сервиса, настройки берутся из .env):
+    PYTHONPATH=src python -m tests.benchmarks.db_pool --concurrency 200 --pool-sizes 5,20,50 --hold-ms 20
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from sqlalchemy import exc, text
+
+from core.config import DB_ENGINE_SETTINGS, DB_SETTINGS
+from services.storages.relational.connections import create_db_engine
+from tests.benchmarks.utils import build_latency_report
+
+HOLD_QUERY = text('SELECT pg_sleep(:seconds)')
+
+
+def run_requests(engine, requests: int, hold: float) -> tuple[list[float], int]:
+    """
+    Выполняет запросы, удерживающие соединение, и замеряет ожидание соединения.
+
+    Args:
+        engine: подключение к БД.
+        requests: количество запросов.
+        hold: сколько секунд держать соединение.
+
+    Returns:
+        tuple[list[float], int]: задержки получения соединения в миллисекундах и количество таймаутов.
+    """
+    waits = []
+    timeouts = 0
+    for _ in range(requests):
+        start = perf_counter()
+        try:
+            with engine.connect() as connection:
+                waits.append((perf_counter() - start) * 1000)
+                connection.execute(HOLD_QUERY, {'seconds': hold})
+        except exc.TimeoutError:
+            timeouts += 1
+
+    return waits, timeouts
+
+
+def measure(pool_size: int, max_overflow: int, concurrency: int, requests: int, hold: float):
+    """
+    Выполняет запросы в заданное количество потоков через пул заданного размера и выводит результаты.
+
+    Args:
+        pool_size: размер пула.
+        max_overflow: сколько соединений можно открыть сверх размера пула.
+        concurrency: количество потоков.
+        requests: количество запросов на поток.
+        hold: сколько секунд держать соединение.
+    """
+    settings = DB_ENGINE_SETTINGS.copy(update={'pool_size': pool_size, 'max_overflow': max_overflow})
+    engine = create_db_engine(DB_SETTINGS.pg_dsn, settings)
+
+    try:
+        start = perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(lambda _: run_requests(engine, requests, hold), range(concurrency)))
+        elapsed = perf_counter() - start
+
+        waits = [wait for thread_waits, _ in results for wait in thread_waits]
+        timeouts = sum(thread_timeouts for _, thread_timeouts in results)
+
+        print(build_latency_report(f'checkout pool={pool_size}+{max_overflow}', waits))
+        print(f'  timeouts={timeouts} requests/s={len(waits) / elapsed:.0f} pool={engine.pool.stats()}')
+    finally:
+        engine.dispose()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--concurrency', type=int, default=200)
+    arg_parser.add_argument('--requests', type=int, default=50)
+    arg_parser.add_argument('--hold-ms', type=float, default=20)
+    arg_parser.add_argument('--pool-sizes', default='5,20,50')
+    arg_parser.add_argument('--max-overflow', type=int, default=DB_ENGINE_SETTINGS.max_overflow)
+    args = arg_parser.parse_args()
+
+    for pool_size in map(int, args.pool_sizes.split(',')):
+        measure(pool_size, args.max_overflow, args.concurrency, args.requests, args.hold_ms / 1000)
+
+
+if __name__ == '__main__':
+    main()
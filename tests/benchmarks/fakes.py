@@ -0,0 +1,57 @@
+"""Модуль содержит подделки внешних хранилищ для бенчмарков."""
+from datetime import timedelta
+from fnmatch import fnmatchcase
+
+import gevent
+
+
+class LatencyRedis:
+    """
+    Класс имитирует клиент Redis, у которого каждое обращение к серверу занимает фиксированное время.
+
+    Поддерживается только то подмножество команд, которое используют хранилища сервиса.
+    Время жизни ключей не учитывается.
+    """
+
+    def __init__(self, latency: timedelta):
+        """
+        Инициализирующий метод.
+
+        Args:
+            latency: задержка одного обращения к серверу.
+        """
+        self._latency = latency.total_seconds()
+        self._data = {}
+        self.round_trips = 0
+
+    def _round_trip(self):
+        """Имитирует одно обращение к серверу."""
+        self.round_trips += 1
+        gevent.sleep(self._latency)
+
+    def get(self, key):
+        self._round_trip()
+        return self._data.get(key)
+
+    def mget(self, keys):
+        self._round_trip()
+        return [self._data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self._round_trip()
+        self._data[key] = value
+        return True
+
+    def delete(self, *keys):
+        self._round_trip()
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def publish(self, channel, message):
+        self._round_trip()
+        return 0
+
+    def scan_iter(self, match=None):
+        self._round_trip()
+        for key in list(self._data):
+            if match is None or fnmatchcase(key, match):
+                yield key
@@ -0,0 +1,227 @@
+"""
+Бенчмарк истории входов с партициями только по устройству и с партициями по устройству и месяцу.
+
+В отдельной схеме создаются две копии таблицы истории входов:
+ - list: партиции по типу устройства, как было до разбиения по месяцам;
+ - list_range: партиции по типу устройства, разбитые по месяцам тем же кодом, что и в сервисе.
+Обе таблицы заполняются одинаковыми входами (равномерно за --months месяцев, --users пользователей)
+пачками по --chunk строк, выводится скорость вставки. Затем замеряются задержки запросов:
+ - user_page: первая страница истории пользователя;
+ - user_month: история пользователя за последний месяц;
+ - week_count: количество входов всех пользователей за последнюю неделю;
+и время удаления самого старого месяца: DELETE по created_at против отсоединения и удаления партиций.
+После замера схема удаляется.
+
+Запуск (нужен Postgres сервиса, настройки берутся из .env; 100 млн строк занимают десятки ГБ):
+    PYTHONPATH=src python -m tests.benchmarks.history_partitions --rows 100000000 --months 24
+"""
+import argparse
+import random
+from datetime import datetime
+from time import perf_counter
+
+from sqlalchemy import text
+
+from db import engine
+from services.user_history.partitions import (
+    DEVICE_TYPES,
+    create_month_partition,
+    default_partition_name,
+    device_partition_name,
+    month_partition_name,
+    month_start,
+)
+from tests.benchmarks.utils import build_latency_report
+
+SCHEMA = 'bench_history'
+TABLES = ('list', 'list_range')
+
+NO_STATEMENT_TIMEOUT_QUERY = text('SET LOCAL statement_timeout = 0')
+
+COLUMNS = """
+    id uuid NOT NULL,
+    user_id uuid NOT NULL,
+    user_agent varchar(1000) NOT NULL,
+    device_type varchar(50) NOT NULL,
+    created_at timestamp NOT NULL,
+    PRIMARY KEY (id, device_type, created_at)
+"""
+USER_ID = "('00000000-0000-0000-0000-' || lpad(to_hex({number}), 12, '0'))::uuid"
+
+QUERIES = {
+    'user_page': """
+        SELECT * FROM {table} WHERE user_id = {user_id}
+        ORDER BY created_at DESC, id DESC LIMIT 10
+    """,
+    'user_month': """
+        SELECT * FROM {table} WHERE user_id = {user_id} AND created_at >= now() - interval '1 month'
+        ORDER BY created_at DESC, id DESC
+    """,
+    'week_count': """
+        SELECT count(*) FROM {table} WHERE created_at >= now() - interval '7 days'
+    """,
+}
+
+
+def create_tables(months: int, now: datetime):
+    """
+    Создает схему бенчмарка и обе таблицы истории входов.
+
+    Args:
+        months: за сколько месяцев создаются партиции.
+        now: текущий момент.
+    """
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+
+        for table in TABLES:
+            connection.execute(text(f'CREATE TABLE {SCHEMA}.{table} ({COLUMNS}) PARTITION BY LIST (device_type)'))
+            connection.execute(text(f'CREATE INDEX ON {SCHEMA}.{table} (user_id, created_at, id)'))
+
+            for device_type in DEVICE_TYPES:
+                partition = device_partition_name(table, device_type)
+                partition_by = ' PARTITION BY RANGE (created_at)' if table == 'list_range' else ''
+                connection.execute(text(
+                    f"CREATE TABLE {SCHEMA}.{partition} PARTITION OF {SCHEMA}.{table} "
+                    f"FOR VALUES IN ('{device_type}'){partition_by}"
+                ))
+
+                if table != 'list_range':
+                    continue
+
+                connection.execute(text(
+                    f'CREATE TABLE {SCHEMA}.{default_partition_name(table, device_type)} '
+                    f'PARTITION OF {SCHEMA}.{partition} DEFAULT'
+                ))
+                for offset in range(-months, 2):
+                    create_month_partition(connection, SCHEMA, table, device_type, month_start(now, offset))
+
+
+def fill(table: str, rows: int, users: int, months: int, chunk: int) -> float:
+    """
+    Заполняет таблицу входами пачками и возвращает скорость вставки.
+
+    Args:
+        table: имя таблицы.
+        rows: количество входов.
+        users: количество пользователей.
+        months: за сколько месяцев распределены входы.
+        chunk: количество строк в одной вставке.
+
+    Returns:
+        float: вставленных строк в секунду.
+    """
+    statement = text(f"""
+        INSERT INTO {SCHEMA}.{table} (id, user_id, user_agent, device_type, created_at)
+        SELECT
+            gen_random_uuid(),
+            {USER_ID.format(number='n % :users')},
+            'Mozilla/5.0',
+            (ARRAY['pc', 'mobile', 'other'])[n % 3 + 1],
+            now() - random() * (interval '1 month' * :months)
+        FROM generate_series(:start, :end) AS n
+    """)
+
+    elapsed = 0.0
+    for start in range(0, rows, chunk):
+        began = perf_counter()
+        with engine.begin() as connection:
+            connection.execute(NO_STATEMENT_TIMEOUT_QUERY)
+            connection.execute(
+                statement,
+                {'users': users, 'months': months, 'start': start, 'end': min(start + chunk, rows) - 1},
+            )
+        elapsed += perf_counter() - began
+
+    with engine.begin() as connection:
+        connection.execute(NO_STATEMENT_TIMEOUT_QUERY)
+        connection.execute(text(f'ANALYZE {SCHEMA}.{table}'))
+
+    return rows / elapsed
+
+
+def measure_queries(users: int, queries: int, seed: int):
+    """
+    Выполняет запросы истории к обеим таблицам и выводит задержки.
+
+    Args:
+        users: количество пользователей.
+        queries: количество запросов каждого вида.
+        seed: зерно генератора случайных чисел.
+    """
+    for name, query in QUERIES.items():
+        for table in TABLES:
+            rng = random.Random(seed)
+            latencies = []
+            with engine.connect() as connection:
+                for _ in range(queries):
+                    statement = text(query.format(
+                        table=f'{SCHEMA}.{table}',
+                        user_id=USER_ID.format(number=rng.randrange(users)),
+                    ))
+                    start = perf_counter()
+                    connection.execute(statement).all()
+                    latencies.append((perf_counter() - start) * 1000)
+
+            print(build_latency_report(f'{name} {table}', latencies))
+
+
+def measure_retention(months: int, now: datetime):
+    """
+    Удаляет самый старый месяц из обеих таблиц и выводит время удаления.
+
+    Args:
+        months: за сколько месяцев распределены входы.
+        now: текущий момент.
+    """
+    oldest = month_start(now, -months)
+
+    start = perf_counter()
+    with engine.begin() as connection:
+        connection.execute(NO_STATEMENT_TIMEOUT_QUERY)
+        deleted = connection.execute(
+            text(f'DELETE FROM {SCHEMA}.list WHERE created_at < :end'),
+            {'end': month_start(oldest, 1)},
+        ).rowcount
+    print(f'retention list: DELETE rows={deleted} elapsed={perf_counter() - start:.3f}s')
+
+    start = perf_counter()
+    for device_type in DEVICE_TYPES:
+        with engine.begin() as connection:
+            partition = month_partition_name('list_range', device_type, oldest)
+            connection.execute(text(
+                f'ALTER TABLE {SCHEMA}.{device_partition_name("list_range", device_type)} '
+                f'DETACH PARTITION {SCHEMA}.{partition}'
+            ))
+            connection.execute(text(f'DROP TABLE {SCHEMA}.{partition}'))
+    print(f'retention list_range: DETACH + DROP elapsed={perf_counter() - start:.3f}s')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--rows', type=int, default=1_000_000)
+    arg_parser.add_argument('--users', type=int, default=100_000)
+    arg_parser.add_argument('--months', type=int, default=24)
+    arg_parser.add_argument('--chunk', type=int, default=1_000_000)
+    arg_parser.add_argument('--queries', type=int, default=1000)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    now = datetime.utcnow()
+
+    try:
+        create_tables(args.months, now)
+
+        for table in TABLES:
+            rate = fill(table, args.rows, args.users, args.months, args.chunk)
+            print(f'insert {table}: rows={args.rows} rows/s={rate:.0f}')
+
+        measure_queries(args.users, args.queries, args.seed)
+        measure_retention(args.months, now)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+
+
+if __name__ == '__main__':
+    main()
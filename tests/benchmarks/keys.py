@@ -0,0 +1,72 @@
+"""
+Бенчмарк схемы ключей сессий: память Redis на ключ в старом формате generate_key и в текущей схеме.
+
+Для заданного количества сессий с реалистичными user agent один и тот же рефреш токен записывается
+под ключами обоих форматов, после чего по каждому ключу запрашивается MEMORY USAGE.
+Выводится средняя длина ключа и средний расход памяти на запись, а также экономия на ключ.
+
+Запуск (нужен локальный Redis, например `docker run --rm -p 6379:6379 redis:7`):
+    PYTHONPATH=src python -m tests.benchmarks.keys --host 127.0.0.1 --port 6379 --sessions 10000
+"""
+import argparse
+from statistics import mean
+from uuid import uuid4
+
+from redis import Redis
+
+from services.storages.key_value.keys import session_key
+
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/110.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 16_3 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/16.3 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/110.0',
+    'PostmanRuntime/7.31.1',
+)
+REFRESH_TOKEN = 'x' * 420
+
+
+def measure(client: Redis, keys: list[str]) -> tuple[float, float]:
+    """
+    Записывает рефреш токен под каждым ключом и возвращает среднюю длину ключа и средний MEMORY USAGE.
+
+    Args:
+        client: клиент Redis.
+        keys: ключи.
+    """
+    pipeline = client.pipeline(transaction=False)
+    for key in keys:
+        pipeline.set(key, REFRESH_TOKEN, ex=600)
+    pipeline.execute()
+
+    pipeline = client.pipeline(transaction=False)
+    for key in keys:
+        pipeline.memory_usage(key, samples=0)
+    usages = pipeline.execute()
+
+    client.delete(*keys)
+    return mean(len(key) for key in keys), mean(usages)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=6379)
+    arg_parser.add_argument('--sessions', type=int, default=10_000)
+    args = arg_parser.parse_args()
+
+    client = Redis(host=args.host, port=args.port, decode_responses=True)
+    sessions = [(uuid4(), USER_AGENTS[number % len(USER_AGENTS)]) for number in range(args.sessions)]
+
+    legacy_length, legacy_usage = measure(client, [f'{session}_{{}}' for session in sessions])
+    print(f'legacy: key_length={legacy_length:.1f} memory_usage={legacy_usage:.1f}B')
+
+    length, usage = measure(client, [session_key(user_id, user_agent) for user_id, user_agent in sessions])
+    print(f'v1: key_length={length:.1f} memory_usage={usage:.1f}B')
+
+    print(f'экономия на ключ: {legacy_usage - usage:.1f}B ({(1 - usage / legacy_usage) * 100:.1f}%)')
+
+
+if __name__ == '__main__':
+    main()
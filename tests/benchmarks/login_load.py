@@ -0,0 +1,117 @@
+"""
+Нагрузочный тест: задержка ручки разрешений, пока ручка входа загружена хэшированием паролей.
+
+Сначала замеряются задержки `/user-permissions/` без другой нагрузки, затем те же запросы повторяются,
+пока заданное количество гринлетов непрерывно вызывает `/account/login`. Если bcrypt выполняется
+в цикле событий, p99 ручки разрешений растет вместе с нагрузкой на вход; при вынесении хэширования
+в пул (services.passwords.executor) p99 должна остаться на прежнем уровне, а лишние входы получают 503.
+Ручка входа ограничена rate limit'ом, поэтому часть входов может получать 429 - они тоже выводятся.
+
+Запуск (нужен запущенный сервис, например из docker_app/docker-compose.prod.yml):
+    PYTHONPATH=src python -m tests.benchmarks.login_load --base-url http://127.0.0.1:5100/auth/api/v1 \
+        --login admin --password admin --scope movies --duration 10 --login-greenlets 50
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import json
+from collections import Counter
+from time import perf_counter
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import gevent
+
+from tests.benchmarks.utils import build_latency_report
+
+
+def request(url: str, body: dict | None = None) -> int:
+    """
+    Выполняет HTTP-запрос и возвращает статус ответа.
+
+    Args:
+        url: адрес.
+        body: тело POST-запроса в JSON. Если не задано - выполняется GET.
+    """
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    http_request = Request(url, data=data, headers={'Content-Type': 'application/json'})
+
+    try:
+        with urlopen(http_request, timeout=30) as response:
+            response.read()
+            return response.status
+    except HTTPError as error:
+        return error.code
+
+
+def measure_permissions(url: str, duration: float, greenlets: int) -> list[float]:
+    """
+    Непрерывно вызывает ручку разрешений и возвращает задержки в миллисекундах.
+
+    Args:
+        url: адрес ручки разрешений.
+        duration: длительность замера в секундах.
+        greenlets: количество конкурентных гринлетов.
+    """
+    latencies = []
+    deadline = perf_counter() + duration
+
+    def worker():
+        while perf_counter() < deadline:
+            start = perf_counter()
+            request(url)
+            latencies.append((perf_counter() - start) * 1000)
+
+    gevent.joinall([gevent.spawn(worker) for _ in range(greenlets)])
+    return latencies
+
+
+def saturate_login(url: str, body: dict, greenlets: int, statuses: Counter) -> list[gevent.Greenlet]:
+    """
+    Запускает гринлеты, непрерывно вызывающие ручку входа.
+
+    Args:
+        url: адрес ручки входа.
+        body: логин и пароль.
+        greenlets: количество конкурентных гринлетов.
+        statuses: счетчик статусов ответов ручки входа.
+    """
+    def worker():
+        while True:
+            statuses[request(url, body)] += 1
+
+    return [gevent.spawn(worker) for _ in range(greenlets)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--base-url', default='http://127.0.0.1:5100/auth/api/v1')
+    arg_parser.add_argument('--login', default='admin')
+    arg_parser.add_argument('--password', default='admin')
+    arg_parser.add_argument('--scope', default='movies')
+    arg_parser.add_argument('--duration', type=float, default=10)
+    arg_parser.add_argument('--permission-greenlets', type=int, default=5)
+    arg_parser.add_argument('--login-greenlets', type=int, default=50)
+    args = arg_parser.parse_args()
+
+    permissions_url = f'{args.base_url}/user-permissions/?scope={args.scope}'
+    login_url = f'{args.base_url}/account/login'
+
+    baseline = measure_permissions(permissions_url, args.duration, args.permission_greenlets)
+    print(build_latency_report('permissions (idle)', baseline))
+
+    statuses = Counter()
+    login_workers = saturate_login(
+        login_url, {'login': args.login, 'password': args.password}, args.login_greenlets, statuses,
+    )
+    under_load = measure_permissions(permissions_url, args.duration, args.permission_greenlets)
+    gevent.killall(login_workers)
+
+    print(build_latency_report('permissions (login saturated)', under_load))
+    print(f'login statuses: {dict(statuses)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Бенчмарк стоимости хэширования паролей: время проверки пароля на каждом уровне стоимости на текущей машине.
+
+Помогает выбрать PASSWORD_HASH_COST или PASSWORD_HASH_TARGET_MS (см. services.passwords.policy).
+argon2id замеряется, только если установлен пакет argon2-cffi.
+
+Запуск:
+    PYTHONPATH=src python -m tests.benchmarks.password_cost --samples 5
+"""
+import argparse
+
+from services.passwords.policy import BACKENDS, PasswordPolicy, argon2, measure_verify_time
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--samples', type=int, default=5)
+    arg_parser.add_argument('--max-ms', type=float, default=2000, help='не замерять уровни дороже этого времени')
+    arg_parser.add_argument('--target-ms', type=float, default=250, help='целевое время для калибровки')
+    args = arg_parser.parse_args()
+
+    for name, backend_class in BACKENDS.items():
+        if name == 'argon2id' and argon2 is None:
+            print(f'{name}: пропущен, пакет argon2-cffi не установлен')
+            continue
+
+        for cost in range(backend_class.MIN_COST, backend_class.MAX_COST + 1):
+            verify_ms = measure_verify_time(backend_class(cost), args.samples) * 1000
+            print(f'{name}: cost={cost} verify={verify_ms:.1f}ms')
+            if verify_ms > args.max_ms:
+                break
+
+        policy = PasswordPolicy(name, None, args.target_ms)
+        print(f'{name}: калибровка под {args.target_ms:.0f}ms выбирает cost={policy.calibrate()}')
+
+
+if __name__ == '__main__':
+    main()
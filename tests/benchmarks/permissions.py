@@ -0,0 +1,98 @@
+"""
+Бенчмарк вычисления разрешений пользователя: запрос в БД и матрица разрешений в памяти.
+
+Для заданного количества пользователей с ролями уровень доступа к области вычисляется двумя способами:
+ - query: прежний запрос с соединением permissions, scope и user_role на каждый вызов;
+ - matrix: get_user_permissions_by_scope поверх матрицы разрешений и кэша ролей (после прогрева).
+Для каждого способа выводятся задержки и проверяется, что результаты совпадают.
+
+Запуск (нужны Postgres и Redis сервиса с заполненными ролями и разрешениями, настройки берутся из .env):
+    PYTHONPATH=src python -m tests.benchmarks.permissions --scope films --users 1000 --rounds 5
+"""
+import argparse
+from time import perf_counter
+
+from sqlalchemy import select, and_
+
+from db import db_session
+from db_models import Permissions, Scope, user_role
+from services.permissions.utils import calculate_permissions, get_user_permissions_by_scope
+from tests.benchmarks.utils import build_latency_report
+
+
+def query_permissions(scope_name: str, user_id: str) -> dict:
+    """
+    Вычисляет разрешения пользователя прежним запросом в БД.
+
+    Args:
+        scope_name: имя области разрешения.
+        user_id: ID пользователя.
+    """
+    query = (
+        select(Permissions.access_level).
+        outerjoin(Scope, Permissions.scope_id == Scope.id).
+        outerjoin(user_role, Permissions.role_id == user_role.columns.role_id).
+        where(and_(Scope.name == scope_name, user_role.columns.user_id == user_id))
+    )
+    result = 0
+    for access_level in db_session.execute(query).scalars():
+        result = result | access_level
+
+    return calculate_permissions(result)
+
+
+def measure(name: str, func, scope_name: str, user_ids: list[str], rounds: int) -> list[dict]:
+    """
+    Вычисляет разрешения всех пользователей заданное количество раз и выводит задержки.
+
+    Args:
+        name: название способа.
+        func: функция вычисления разрешений.
+        scope_name: имя области разрешения.
+        user_ids: ID пользователей.
+        rounds: количество проходов по пользователям.
+
+    Returns:
+        list[dict]: разрешения пользователей из последнего прохода.
+    """
+    latencies = []
+    results = []
+
+    for _ in range(rounds):
+        results = []
+        for user_id in user_ids:
+            start = perf_counter()
+            results.append(func(scope_name, user_id))
+            latencies.append((perf_counter() - start) * 1000)
+
+    print(build_latency_report(name, latencies))
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--scope', default='films')
+    arg_parser.add_argument('--users', type=int, default=1000)
+    arg_parser.add_argument('--rounds', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    user_ids = [
+        str(user_id) for user_id in db_session.execute(
+            select(user_role.columns.user_id).distinct().limit(args.users)
+        ).scalars()
+    ]
+    if not user_ids:
+        raise SystemExit('В БД нет пользователей с ролями.')
+
+    for user_id in user_ids:
+        get_user_permissions_by_scope(args.scope, user_id)
+
+    expected = measure('query', query_permissions, args.scope, user_ids, args.rounds)
+    actual = measure('matrix', get_user_permissions_by_scope, args.scope, user_ids, args.rounds)
+
+    print(f'users: {len(user_ids)}, results match: {expected == actual}')
+    db_session.remove()
+
+
+if __name__ == '__main__':
+    main()
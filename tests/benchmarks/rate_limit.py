@@ -0,0 +1,95 @@
+"""
+Бенчмарк rate limit'а: сравнение старой реализации GCRA (TIME/SETNX/GET/SET) и Lua-скрипта (EVALSHA).
+
+Для каждого варианта запускается заданное количество конкурентных гринлетов, которые одновременно
+обращаются к одному и тому же ключу. Замеряются p50/p99 задержки проверки и количество пропущенных запросов:
+при limit запросов за период корректная реализация должна пропустить ровно limit запросов.
+
+Запуск (нужен локальный Redis, например `docker run --rm -p 6379:6379 redis:7`):
+    PYTHONPATH=src python -m tests.benchmarks.rate_limit --host 127.0.0.1 --port 6379
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+from datetime import timedelta
+from time import perf_counter
+from uuid import uuid4
+
+import gevent
+from redis import BlockingConnectionPool, Redis
+
+from services.rate_limit.engine import GCRARateLimiter
+from tests.benchmarks.utils import build_latency_report
+
+
+def legacy_check(tat_storage: Redis, tat_key: str, limit_requests: int, period: timedelta) -> bool:
+    """Копия прежнего алгоритма из services.rate_limit.gcra для сравнения."""
+    period_in_seconds = int(period.total_seconds())
+    current_time = tat_storage.time()[0]
+    separation = round(period_in_seconds / limit_requests)
+    tat_storage.setnx(tat_key, 0)
+
+    tat = max(int(tat_storage.get(tat_key)), current_time)
+    if tat - current_time <= period_in_seconds - separation:
+        new_tat = max(tat, current_time) + separation
+        tat_storage.set(tat_key, new_tat)
+        return True
+
+    return False
+
+
+def run(name: str, check, greenlets: int) -> None:
+    """
+    Запускает проверку в конкурентных гринлетах и выводит результаты.
+
+    Args:
+        name: название варианта.
+        check: функция проверки, возвращающая True, если запрос пропущен.
+        greenlets: количество конкурентных гринлетов.
+    """
+    latencies = []
+    allowed = []
+
+    def worker():
+        start = perf_counter()
+        is_allowed = check()
+        latencies.append((perf_counter() - start) * 1000)
+        allowed.append(is_allowed)
+
+    gevent.joinall([gevent.spawn(worker) for _ in range(greenlets)])
+
+    print(build_latency_report(name, latencies))
+    print(f'{name}: allowed={sum(allowed)} of {greenlets}')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=6379)
+    arg_parser.add_argument('--greenlets', type=int, default=500)
+    arg_parser.add_argument('--limit', type=int, default=100)
+    arg_parser.add_argument('--period', type=int, default=60, help='период в секундах')
+    args = arg_parser.parse_args()
+
+    pool = BlockingConnectionPool(
+        host=args.host, port=args.port, max_connections=args.greenlets, timeout=30, decode_responses=True,
+    )
+    tat_storage = Redis(connection_pool=pool)
+    period = timedelta(seconds=args.period)
+
+    print(f'limit={args.limit} period={args.period}s greenlets={args.greenlets}, ожидается allowed={args.limit}')
+
+    legacy_key = f'benchmark:legacy:{uuid4()}'
+    run('legacy', lambda: legacy_check(tat_storage, legacy_key, args.limit, period), args.greenlets)
+
+    rate_limiter = GCRARateLimiter(tat_storage, args.limit, period)
+    lua_key = f'benchmark:lua:{uuid4()}'
+    run('lua', lambda: rate_limiter.check(lua_key).allowed, args.greenlets)
+
+    tat_storage.delete(legacy_key, lua_key)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Микробенчмарк проверки отозванных токенов на защищенной ручке.
+
+Поднимается минимальное Flask-приложение с одной ручкой под `jwt_required`, блоклист хранится в поддельном Redis,
+каждое обращение к которому занимает фиксированное время. Сравниваются варианты проверки блоклиста:
+ - sequential: два последовательных GET (access jti и refresh_jti), как было раньше;
+ - batched: один MGET на оба jti;
+ - cached: RevocationChecker с локальным кэшем (в установившемся режиме Redis не вызывается).
+
+Запуск:
+    PYTHONPATH=src python -m tests.benchmarks.revocation --latency-ms 1 --greenlets 50 --requests 5000
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+from datetime import timedelta
+from time import perf_counter
+from uuid import uuid4
+
+import gevent
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+
+from services.revocation.checker import RevocationChecker
+from services.storages.key_value.redis_storage import RedisStorage
+from tests.benchmarks.fakes import LatencyRedis
+
+
+def build_app(is_token_revoked) -> Flask:
+    """
+    Создает приложение с одной защищенной ручкой.
+
+    Args:
+        is_token_revoked: функция проверки блоклиста, принимающая access jti и refresh_jti.
+    """
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'benchmark'
+    jwt = JWTManager(app)
+
+    @jwt.token_in_blocklist_loader
+    def token_in_blocklist_loader(jwt_header, jwt_payload):
+        return is_token_revoked(jwt_payload.get('jti'), jwt_payload.get('sub', {}).get('refresh_jti'))
+
+    @app.get('/protected')
+    @jwt_required()
+    def protected():
+        return {'msg': 'ok'}
+
+    return app
+
+
+def measure(name: str, app: Flask, client: LatencyRedis, greenlets: int, requests: int):
+    """
+    Выполняет запросы к защищенной ручке в конкурентных гринлетах и выводит количество запросов в секунду.
+
+    Args:
+        name: название варианта.
+        app: приложение.
+        client: поддельный Redis, чтобы посчитать обращения к нему.
+        greenlets: количество конкурентных гринлетов.
+        requests: общее количество запросов.
+    """
+    with app.app_context():
+        token = create_access_token(identity={'refresh_jti': str(uuid4())})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    test_client = app.test_client()
+    requests_per_greenlet = requests // greenlets
+    round_trips_before = client.round_trips
+
+    def worker():
+        for _ in range(requests_per_greenlet):
+            response = test_client.get('/protected', headers=headers)
+            assert response.status_code == 200
+
+    start = perf_counter()
+    gevent.joinall([gevent.spawn(worker) for _ in range(greenlets)], raise_error=True)
+    elapsed = perf_counter() - start
+
+    total = requests_per_greenlet * greenlets
+    print(
+        f'{name}: {total / elapsed:.1f} req/s, '
+        f'обращений к Redis на запрос: {(client.round_trips - round_trips_before) / total:.2f}'
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--latency-ms', type=float, default=1.0)
+    arg_parser.add_argument('--greenlets', type=int, default=50)
+    arg_parser.add_argument('--requests', type=int, default=5000)
+    arg_parser.add_argument('--staleness-ms', type=int, default=5000)
+    args = arg_parser.parse_args()
+
+    client = LatencyRedis(timedelta(milliseconds=args.latency_ms))
+    blocklist = RedisStorage(client)
+
+    def sequential(jti, refresh_jti):
+        return blocklist.get(jti) is not None or blocklist.get(refresh_jti) is not None
+
+    def batched(jti, refresh_jti):
+        return any(blocklist.exists_many([jti, refresh_jti]))
+
+    checker = RevocationChecker(
+        blocklist=blocklist,
+        client=client,
+        channel='benchmark:revoked',
+        max_size=100_000,
+        staleness=timedelta(milliseconds=args.staleness_ms),
+        revoked_ttl=timedelta(days=1),
+    )
+
+    print(f'latency={args.latency_ms}ms greenlets={args.greenlets} requests={args.requests}')
+    measure('sequential', build_app(sequential), client, args.greenlets, args.requests)
+    measure('batched', build_app(batched), client, args.greenlets, args.requests)
+    measure('cached', build_app(checker.is_any_revoked), client, args.greenlets, args.requests)
+
+
+if __name__ == '__main__':
+    main()
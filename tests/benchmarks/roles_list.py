@@ -0,0 +1,115 @@
+"""
+Бенчмарк получения списка ролей при большом количестве пользователей с ролями.
+
+Список ролей строится двумя способами:
+ - subquery: с подгрузкой пользователей ролей отдельным запросом, как при прежней стратегии `lazy='subquery'`;
+ - explicit: get_role_list с текущей стратегией, без подгрузки пользователей.
+Для каждого способа выводятся задержки и количество запросов в БД на один вызов.
+
+С флагом --seed перед замером создаются пользователи с ролью `user` (логины с префиксом `bench_roles_`),
+с флагом --cleanup они удаляются после замера.
+
+Запуск (нужен Postgres сервиса с созданными ролями, настройки берутся из .env):
+    PYTHONPATH=src python -m tests.benchmarks.roles_list --seed 1000000 --rounds 5 --cleanup
+"""
+import argparse
+from time import perf_counter
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import subqueryload
+
+from db import db_session, engine
+from db_models import Role
+from schemes import roles_schema
+from services.role.utils import get_role_list
+from tests.benchmarks.utils import build_latency_report
+
+LOGIN_PREFIX = 'bench_roles_'
+SEED_ROLE = 'user'
+
+NO_STATEMENT_TIMEOUT_QUERY = text('SET LOCAL statement_timeout = 0')
+SEED_USERS_QUERY = text(f"""
+    INSERT INTO auth."user" (id, login, email, password, created_at, updated_at)
+    SELECT gen_random_uuid(), '{LOGIN_PREFIX}' || n, '{LOGIN_PREFIX}' || n || '@example.com', '-', now(), now()
+    FROM generate_series(1, :count) AS n
+    ON CONFLICT DO NOTHING
+""")
+SEED_USER_ROLES_QUERY = text(f"""
+    INSERT INTO auth.user_role (id, created_at, user_id, role_id)
+    SELECT gen_random_uuid(), now(), u.id, r.id
+    FROM auth."user" u, auth.role r
+    WHERE u.login LIKE '{LOGIN_PREFIX}%' AND r.name = :role
+    ON CONFLICT DO NOTHING
+""")
+CLEANUP_USER_ROLES_QUERY = text(f"""
+    DELETE FROM auth.user_role
+    WHERE user_id IN (SELECT id FROM auth."user" WHERE login LIKE '{LOGIN_PREFIX}%')
+""")
+CLEANUP_USERS_QUERY = text(f"""DELETE FROM auth."user" WHERE login LIKE '{LOGIN_PREFIX}%'""")
+
+
+def get_role_list_with_users() -> list[dict]:
+    """Строит список ролей с подгрузкой пользователей ролей, как при `lazy='subquery'`."""
+    return roles_schema.dump(db_session.query(Role).options(subqueryload(Role.users)).all())
+
+
+def measure(name: str, func, rounds: int):
+    """
+    Вызывает функцию заданное количество раз и выводит задержки и количество запросов в БД.
+
+    Args:
+        name: название способа.
+        func: функция построения списка ролей.
+        rounds: количество вызовов.
+    """
+    queries = 0
+
+    def on_cursor_execute(*args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, 'before_cursor_execute', on_cursor_execute)
+    latencies = []
+    try:
+        for _ in range(rounds):
+            start = perf_counter()
+            func()
+            latencies.append((perf_counter() - start) * 1000)
+            db_session.remove()
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_cursor_execute)
+
+    print(build_latency_report(name, latencies))
+    print(f'{name}: queries per call: {queries / rounds:.1f}')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--rounds', type=int, default=5)
+    arg_parser.add_argument('--cleanup', action='store_true')
+    args = arg_parser.parse_args()
+
+    if args.seed:
+        with engine.begin() as connection:
+            connection.execute(NO_STATEMENT_TIMEOUT_QUERY)
+            connection.execute(SEED_USERS_QUERY, {'count': args.seed})
+            connection.execute(SEED_USER_ROLES_QUERY, {'role': SEED_ROLE})
+
+    with engine.connect() as connection:
+        user_roles = connection.execute(text('SELECT count(*) FROM auth.user_role')).scalar()
+    print(f'user roles: {user_roles}')
+
+    try:
+        measure('subquery', get_role_list_with_users, args.rounds)
+        measure('explicit', get_role_list, args.rounds)
+    finally:
+        if args.cleanup:
+            with engine.begin() as connection:
+                connection.execute(NO_STATEMENT_TIMEOUT_QUERY)
+                connection.execute(CLEANUP_USER_ROLES_QUERY)
+                connection.execute(CLEANUP_USERS_QUERY)
+
+
+if __name__ == '__main__':
+    main()
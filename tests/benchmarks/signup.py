@@ -0,0 +1,88 @@
+"""
+Бенчмарк регистрации пользователей: количество регистраций в секунду.
+
+Пользователь с ролью `user` создается двумя способами:
+ - separate: прежний порядок - проверка занятости логина и email, вставка пользователя, коммит,
+   поиск роли по имени и вставка роли пользователя, коммит;
+ - single: create_user_with_roles - один запрос с `ON CONFLICT DO NOTHING` и вставкой роли через CTE.
+Хэширование пароля выполняется один раз до замера, чтобы сравнивалась только работа с БД.
+После замера созданные пользователи (логины с префиксом `bench_signup_`) удаляются.
+
+Запуск (нужны Postgres сервиса с созданными ролями и Redis, настройки берутся из .env):
+    PYTHONPATH=src python -m tests.benchmarks.signup --users 2000
+"""
+import argparse
+import uuid
+from time import perf_counter
+
+from sqlalchemy import delete
+
+from db import db_session
+from db_models import User
+from services.passwords.utils import get_hash_password
+from services.permissions.config import RoleName
+from services.user.utils import add_roles_to_user, create_user, create_user_with_roles, is_user_exists
+
+LOGIN_PREFIX = 'bench_signup_'
+
+
+def sign_up_separate(user: User):
+    """Регистрирует пользователя прежним способом: проверка, вставка и добавление роли отдельными запросами."""
+    is_email_exists, is_login_exists = is_user_exists(email=user.email, login=user.login)
+    if is_email_exists or is_login_exists:
+        raise RuntimeError(f'Пользователь {user.login} уже существует.')
+
+    user.id = uuid.uuid4()
+    create_user(user)
+    db_session.commit()
+
+    add_roles_to_user(user.id, [RoleName.USER.value])
+    db_session.commit()
+
+
+def sign_up_single(user: User):
+    """Регистрирует пользователя одним запросом."""
+    if not create_user_with_roles(user, [RoleName.USER.value]):
+        raise RuntimeError(f'Пользователь {user.login} уже существует.')
+
+    db_session.commit()
+
+
+def measure(name: str, func, users: int, password: str):
+    """
+    Регистрирует заданное количество пользователей и выводит количество регистраций в секунду.
+
+    Args:
+        name: название способа.
+        func: функция регистрации.
+        users: количество пользователей.
+        password: хэш пароля пользователей.
+    """
+    start = perf_counter()
+    for number in range(users):
+        login = f'{LOGIN_PREFIX}{name}_{number}'
+        func(User(login=login, email=f'{login}@example.com', password=password))
+    elapsed = perf_counter() - start
+
+    print(f'{name}: users={users} elapsed={elapsed:.3f}s signups/sec={users / elapsed:.1f}')
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--users', type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    password = get_hash_password('bench_password')
+
+    try:
+        measure('separate', sign_up_separate, args.users, password)
+        measure('single', sign_up_single, args.users, password)
+    finally:
+        db_session.rollback()
+        db_session.execute(delete(User).where(User.login.startswith(LOGIN_PREFIX)))
+        db_session.commit()
+        db_session.remove()
+
+
+if __name__ == '__main__':
+    main()
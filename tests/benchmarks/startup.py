@@ -0,0 +1,140 @@
+"""
+Бенчмарк запуска сервиса: время импорта модулей и время до первого ответа.
+
+ - import: --runs раз в новом процессе выполняется `python -X importtime -c "import app"`, выводятся
+   задержки импорта приложения и --top модулей с наибольшим суммарным временем импорта (по последнему запуску);
+ - first_request: --runs раз запускается `python app.py` и замеряется время от старта процесса до первого
+   HTTP ответа на --path (подойдет любой статус, например 404), после чего процесс останавливается.
+
+Импорт приложения не обращается к БД и Redis, поэтому первый замер не требует запущенных хранилищ.
+
+Запуск (для first_request нужны Postgres и Redis сервиса, настройки берутся из .env):
+    PYTHONPATH=src python -m tests.benchmarks.startup --runs 5 --top 15
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter, sleep
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from core.config import APP_SETTINGS
+from tests.benchmarks.utils import build_latency_report
+
+SRC_DIR = Path(__file__).resolve().parents[2] / 'src'
+POLL_INTERVAL = 0.01
+
+
+def parse_importtime(output: str) -> list[tuple[str, float]]:
+    """
+    Разбирает вывод `-X importtime`.
+
+    Args:
+        output: stderr процесса.
+
+    Returns:
+        list[tuple[str, float]]: модули и суммарное время их импорта в миллисекундах.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line.removeprefix('import time:').split('|')
+        modules.append((module.strip(), int(cumulative) / 1000))
+
+    return modules
+
+
+def measure_import(runs: int, top: int):
+    """
+    Замеряет время импорта приложения в новом процессе и выводит самые медленные модули.
+
+    Args:
+        runs: количество запусков.
+        top: сколько самых медленных модулей вывести.
+    """
+    latencies = []
+    modules = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import app'],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True,
+        )
+        modules = parse_importtime(result.stderr)
+        latencies.append(dict(modules)['app'])
+
+    print(build_latency_report('import app', latencies))
+    for module, cumulative in sorted(modules, key=lambda item: item[1], reverse=True)[:top]:
+        print(f'  {cumulative:10.3f}ms {module}')
+
+
+def wait_first_response(url: str, process: subprocess.Popen, timeout: float):
+    """
+    Ждет первого HTTP ответа сервиса.
+
+    Args:
+        url: адрес запроса.
+        process: процесс сервиса.
+        timeout: сколько секунд ждать.
+
+    Raises:
+        RuntimeError: сервис завершился или не ответил за отведенное время.
+    """
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Сервис завершился с кодом {process.returncode}')
+        try:
+            urlopen(url, timeout=1).close()
+            return
+        except HTTPError:
+            return
+        except (URLError, ConnectionError):
+            sleep(POLL_INTERVAL)
+
+    raise RuntimeError(f'Сервис не ответил за {timeout} с')
+
+
+def measure_first_request(runs: int, path: str, timeout: float):
+    """
+    Замеряет время от запуска процесса сервиса до первого ответа.
+
+    Args:
+        runs: количество запусков.
+        path: путь запроса.
+        timeout: сколько секунд ждать ответа.
+    """
+    url = f'http://127.0.0.1:{APP_SETTINGS.port}{path}'
+    latencies = []
+    for _ in range(runs):
+        start = perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, 'app.py'], cwd=SRC_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_first_response(url, process, timeout)
+            latencies.append((perf_counter() - start) * 1000)
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(build_latency_report('first_request', latencies))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--runs', type=int, default=5)
+    arg_parser.add_argument('--top', type=int, default=15)
+    arg_parser.add_argument('--path', default='/')
+    arg_parser.add_argument('--timeout', type=float, default=60)
+    arg_parser.add_argument('--skip-first-request', action='store_true')
+    args = arg_parser.parse_args()
+
+    measure_import(args.runs, args.top)
+    if not args.skip_first_request:
+        measure_first_request(args.runs, args.path, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
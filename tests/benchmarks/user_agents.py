@@ -0,0 +1,117 @@
+"""
+Бенчмарк определения устройства по user agent: стоимость на один вход без кэша и с кэшем.
+
+Входы генерируются из корпуса реальных строк user agent браузеров, мобильных приложений и ботов.
+Частоты строк распределены по закону Ципфа (несколько популярных браузеров дают большую часть входов),
+а доля --unique-share входов приходит с уникальной строкой (версии сборок, встроенные браузеры приложений),
+которая всегда дает промах кэша. Выводятся задержки на вход и доля попаданий в кэш.
+
+Запуск (сервис и БД не нужны):
+    PYTHONPATH=src python -m tests.benchmarks.user_agents --logins 100000 --unique-share 0.05
+"""
+import argparse
+import random
+from datetime import timedelta
+from time import perf_counter
+
+from services.user_history.devices import UserAgentClassifier, classify_user_agent
+from tests.benchmarks.utils import build_latency_report
+
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.1 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.1 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 YaBrowser/23.11.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0',
+    'Mozilla/5.0 (Linux; Android 13; SM-A536B) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/119.0.6045.163 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPad; CPU OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.1 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 12; M2101K6G) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/119.0.0.0 YaBrowser/23.9.1.91.00 SA/3 Mobile Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0',
+    'Mozilla/5.0 (Linux; Android 11; SM-T505) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 9; SHIELD Android TV) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.0.0 Safari/537.36 OPR/105.0.0.0',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Mobile/15E148 [FBAN/FBIOS;FBAV/441.0.0.33.114]',
+    'Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/120.0.6099.43 Mobile Safari/537.36',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)',
+    'okhttp/4.11.0',
+    'python-requests/2.31.0',
+    'curl/8.4.0',
+    'unknown',
+)
+
+
+def generate_logins(logins: int, unique_share: float, seed: int) -> list[str]:
+    """
+    Генерирует строки user agent для заданного количества входов.
+
+    Args:
+        logins: количество входов.
+        unique_share: доля входов с уникальной строкой user agent.
+        seed: зерно генератора случайных чисел.
+    """
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(USER_AGENTS) + 1)]
+
+    user_agents = rng.choices(USER_AGENTS, weights=weights, k=logins)
+    for index in range(logins):
+        if rng.random() < unique_share:
+            user_agents[index] = f'{user_agents[index]} Build/{index}'
+
+    return user_agents
+
+
+def measure(name: str, func, user_agents: list[str]):
+    """
+    Определяет устройство для каждого входа и выводит задержки.
+
+    Args:
+        name: название способа.
+        func: функция определения устройства.
+        user_agents: строки user agent входов.
+    """
+    latencies = []
+    for user_agent in user_agents:
+        start = perf_counter()
+        func(user_agent)
+        latencies.append((perf_counter() - start) * 1000)
+
+    print(build_latency_report(name, latencies))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--logins', type=int, default=100_000)
+    arg_parser.add_argument('--unique-share', type=float, default=0.05)
+    arg_parser.add_argument('--cache-size', type=int, default=10_000)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    user_agents = generate_logins(args.logins, args.unique_share, args.seed)
+    classifier = UserAgentClassifier(args.cache_size, timedelta(days=1))
+
+    measure('parse', classify_user_agent, user_agents)
+    measure('cached', classifier.classify, user_agents)
+
+    print(f'logins: {args.logins}, cache: {classifier.stats()}')
+
+
+if __name__ == '__main__':
+    main()
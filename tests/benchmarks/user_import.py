@@ -0,0 +1,71 @@
+"""
+Бенчмарк массового импорта пользователей: количество импортированных пользователей в минуту.
+
+Генерируется заданное количество записей NDJSON с готовым хэшем пароля (хэширование в замер не входит,
+его стоимость определяется политикой паролей, см. бенчмарк password_cost), часть записей дублирует логины,
+чтобы в замер попала обработка конфликтов. Записи импортируются UserImporter пачками заданного размера.
+После замера созданные пользователи (логины с префиксом `bench_import_`) удаляются.
+
+Запуск (нужен Postgres сервиса с созданными ролями, настройки берутся из .env):
+    PYTHONPATH=src python -m tests.benchmarks.user_import --users 100000 --batch-size 10000
+"""
+import argparse
+import json
+from time import perf_counter
+
+import bcrypt
+from sqlalchemy import delete
+
+from db import db_session
+from db_models import User
+from services.user.provisioning import NDJSON_FORMAT, UserImporter, read_records
+
+LOGIN_PREFIX = 'bench_import_'
+DUPLICATES_EVERY = 100
+
+
+def generate_lines(users: int, password_hash: str):
+    """
+    Генерирует строки NDJSON с пользователями, каждая DUPLICATES_EVERY-я строка повторяет логин предыдущей.
+
+    Args:
+        users: количество строк.
+        password_hash: хэш пароля пользователей.
+    """
+    for number in range(users):
+        login_number = number - 1 if number and number % DUPLICATES_EVERY == 0 else number
+        yield json.dumps({
+            'login': f'{LOGIN_PREFIX}{login_number}',
+            'email': f'{LOGIN_PREFIX}{number}@example.com',
+            'password_hash': password_hash,
+        }) + '\n'
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--users', type=int, default=100_000)
+    arg_parser.add_argument('--batch-size', type=int, default=10_000)
+    args = arg_parser.parse_args()
+
+    password_hash = bcrypt.hashpw(b'bench_password', bcrypt.gensalt(10)).decode('utf-8')
+
+    try:
+        start = perf_counter()
+        result = UserImporter(args.batch_size).run(
+            read_records(generate_lines(args.users, password_hash), NDJSON_FORMAT)
+        )
+        elapsed = perf_counter() - start
+
+        print(
+            f'users={args.users} created={result["created"]} errors={len(result["errors"])} '
+            f'elapsed={elapsed:.3f}s users/min={args.users / elapsed * 60:.0f}'
+        )
+    finally:
+        db_session.rollback()
+        db_session.execute(delete(User).where(User.login.startswith(LOGIN_PREFIX)))
+        db_session.commit()
+        db_session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Модуль содержит вспомогательные функции для подсчета и вывода результатов бенчмарков."""
+from dataclasses import dataclass
+from statistics import mean
+
+
+@dataclass
+class LatencyReport:
+    """Сводка по задержкам в миллисекундах."""
+
+    name: str
+    count: int
+    mean: float
+    p50: float
+    p99: float
+    max: float
+
+    def __str__(self):
+        return (
+            f'{self.name}: count={self.count} mean={self.mean:.3f}ms '
+            f'p50={self.p50:.3f}ms p99={self.p99:.3f}ms max={self.max:.3f}ms'
+        )
+
+
+def percentile(values: list[float], rank: float) -> float:
+    """
+    Функция вычисляет перцентиль по методу ближайшего ранга.
+
+    Args:
+        values: значения.
+        rank: перцентиль в диапазоне [0:100].
+
+    Returns:
+        float: значение перцентиля.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(rank / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def build_latency_report(name: str, latencies_ms: list[float]) -> LatencyReport:
+    """
+    Функция строит сводку по списку задержек.
+
+    Args:
+        name: название замера.
+        latencies_ms: задержки в миллисекундах.
+
+    Returns:
+        LatencyReport
+    """
+    return LatencyReport(
+        name=name,
+        count=len(latencies_ms),
+        mean=mean(latencies_ms) if latencies_ms else 0.0,
+        p50=percentile(latencies_ms, 50),
+        p99=percentile(latencies_ms, 99),
+        max=max(latencies_ms) if latencies_ms else 0.0,
+    )
@@ -0,0 +1,39 @@
+"""Модуль содержит тесты ручки метрик сервиса."""
+from http import HTTPStatus
+
+import pytest
+
+from tests.functional.utils.api import api_get_request
+from tests.functional.testdata.roles import get_test_user_data_denied
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'user, expected_status',
+    get_test_user_data_denied(),
+)
+async def test_get_metrics(
+    prepare_tokens,
+    api_session,
+    user,
+    expected_status
+):
+    """Тест получения метрик сервиса."""
+
+    body, headers, status = await api_get_request(
+        api_session,
+        'GET',
+        '/auth/api/v1/metrics/',
+        token=prepare_tokens.get(user).get('access_token')
+    )
+
+    assert status == expected_status
+    if status == HTTPStatus.OK:
+        assert 'revocation' in body
+        assert 'redis_pools' in body
+        assert 'db_pool' in body
+        assert 'roles_cache' in body
+        assert 'permission_matrix' in body
+        assert 'auth_history' in body
+        assert 'user_agents' in body
+        assert 'history_partitions' in body
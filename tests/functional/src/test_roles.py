@@ -1,7 +1,9 @@
 """Модкуль содержащий тесты ручек для ролей."""
+from http import HTTPStatus
 from uuid import uuid4
 import pytest
 
+from tests.functional.settings import DB_SETTINGS
 from tests.functional.utils.api import api_get_request
 from tests.functional.testdata.roles import (
     get_test_user_data_denied,
@@ -236,3 +238,21 @@ async def test_delete_incorrect_role(
     )
 
     assert status == expected_status
+
+
+@pytest.mark.asyncio
+async def test_roles_single_query(
+    db_connection,
+    prepare_tokens,
+    api_session,
+):
+    """Тест проверяет, что получение роли и списка ролей не подгружает пользователей ролей лишними запросами."""
+
+    role_id = await db_connection.fetchval("SELECT id FROM auth.role WHERE name = 'admin';")
+    token = prepare_tokens.get(DB_SETTINGS.admin).get('access_token')
+
+    for url in (f'/auth/api/v1/role/{role_id}', '/auth/api/v1/roles'):
+        _, headers, status = await api_get_request(api_session, 'GET', url, token=token)
+
+        assert status == HTTPStatus.OK
+        assert int(headers['X-DB-Query-Count']) == 1
@@ -1,11 +1,18 @@
 """Модуль тестирования аутентификации пользователя."""
 
+import asyncio
+from datetime import datetime
 from http import HTTPStatus
 
+import jwt
 import pytest
 
 from tests.functional.utils.api import api_get_request
 
+HISTORY_WAIT_ATTEMPTS = 10
+HISTORY_WAIT_DELAY = 0.5
+NULL_UUID = '00000000-0000-0000-0000-000000000000'
+
 
 @pytest.mark.asyncio
 async def test_login_exists_user(
@@ -168,3 +175,271 @@ async def test_logout(
     )
 
     assert status == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_logout_from_all_devices(
+        api_session
+):
+    """Тест проверяет, что после логаута со всех устройств рефреш токен сессии больше не действует."""
+    datas = {
+        'login': 'user3',
+        'email': 'user3',
+        'password': 'user3'
+    }
+    await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/signup',
+        json=datas
+    )
+    del datas['email']
+
+    body, _, _ = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/login',
+        json=datas
+    )
+
+    _, _, status = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/logout-from-devices/',
+        json={'user_agents_for_logout': ['all']},
+        token=body.get('access_token')
+    )
+
+    assert status == HTTPStatus.OK
+
+    _, _, status = await api_get_request(
+        api_session,
+        'GET',
+        '/auth/api/v1/account/refresh',
+        token=body.get('refresh_token')
+    )
+
+    assert status == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_signup_assigns_user_role(
+        api_session
+):
+    """Тест проверяет, что зарегистрированный пользователь получает роль `user`, а занятые логин и email различаются."""
+    datas = {
+        'login': 'user_signup',
+        'email': 'user_signup',
+        'password': 'user_signup'
+    }
+    _, _, status = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/signup',
+        json=datas
+    )
+    assert status == HTTPStatus.OK
+
+    body, _, _ = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/login',
+        json={'login': datas['login'], 'password': datas['password']}
+    )
+    identity = jwt.decode(body.get('access_token'), options={'verify_signature': False}).get('sub')
+    assert identity.get('user_roles') == ['user']
+
+    for conflict, field in (({'login': 'user_signup_other'}, 'email'), ({'email': 'user_signup_other'}, 'login')):
+        body, _, status = await api_get_request(
+            api_session,
+            'POST',
+            '/auth/api/v1/account/signup',
+            json=datas | conflict
+        )
+        assert status == HTTPStatus.CONFLICT
+        assert f'user.{field}=' in body.get('msg')
+
+
+@pytest.mark.asyncio
+async def test_history_written_after_login(
+        api_session
+):
+    """Тест проверяет, что вход попадает в историю после фоновой записи."""
+    datas = {
+        'login': 'user_history',
+        'email': 'user_history',
+        'password': 'user_history'
+    }
+    await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/signup',
+        json=datas
+    )
+    del datas['email']
+
+    for _ in range(2):
+        body, _, _ = await api_get_request(
+            api_session,
+            'POST',
+            '/auth/api/v1/account/login',
+            json=datas
+        )
+
+    history = []
+    for _ in range(HISTORY_WAIT_ATTEMPTS):
+        history, _, _ = await api_get_request(
+            api_session,
+            'GET',
+            '/auth/api/v1/account/history-auth',
+            params={'limit': 10},
+            token=body.get('access_token')
+        )
+        history = history.get('result')
+        if len(history) == 2:
+            break
+        await asyncio.sleep(HISTORY_WAIT_DELAY)
+
+    assert len(history) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('device_type', ['pc', 'mobile', 'other'])
+async def test_history_month_partition_exists(
+        db_connection,
+        device_type
+):
+    """Тест проверяет, что у партиции устройства есть партиция текущего месяца."""
+    partition = f'user_auth_history_{device_type}_p{datetime.utcnow():%Y%m}'
+
+    parent = await db_connection.fetchval("""
+        SELECT parent.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        WHERE pg_inherits.inhrelid = to_regclass($1)
+    """, f'auth.{partition}')
+
+    assert parent == f'user_auth_history_{device_type}'
+
+
+@pytest.mark.asyncio
+async def test_history_cursor_with_equal_timestamps(
+        db_connection,
+        api_session
+):
+    """Тест проверяет, что постраничная выдача истории по курсору не теряет входы с одинаковым временем."""
+    datas = {
+        'login': 'user_history_cursor',
+        'email': 'user_history_cursor',
+        'password': 'user_history_cursor'
+    }
+    await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/signup',
+        json=datas
+    )
+    del datas['email']
+    body, _, _ = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/login',
+        json=datas
+    )
+    token = body.get('access_token')
+    user_id = jwt.decode(token, options={'verify_signature': False}).get('sub').get('user_id')
+
+    rows = await db_connection.fetch(f"""
+        INSERT INTO auth.user_auth_history (id, user_id, user_agent, device_type, created_at)
+        SELECT gen_random_uuid(), '{user_id}', 'cursor_test', 'pc', now() - interval '1 day'
+        FROM generate_series(1, 5)
+        RETURNING id
+    """)
+
+    history_ids = []
+    cursor = None
+    for _ in range(10):
+        params = {'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        body, _, status = await api_get_request(
+            api_session,
+            'GET',
+            '/auth/api/v1/account/history-auth',
+            params=params,
+            token=token
+        )
+        assert status == HTTPStatus.OK
+        history_ids.extend(record.get('id') for record in body.get('result'))
+        cursor = body.get('outcome').get('next_cursor')
+        if not cursor:
+            break
+
+    assert len(history_ids) == len(set(history_ids))
+    assert {str(row['id']) for row in rows} <= set(history_ids)
+
+
+@pytest.mark.asyncio
+async def test_history_page_index_only_scan(
+        db_connection
+):
+    """Тест проверяет, что ключи страницы истории выбираются только по покрывающему индексу."""
+    async with db_connection.transaction():
+        await db_connection.execute('SET LOCAL enable_seqscan = off')
+        await db_connection.execute('SET LOCAL enable_bitmapscan = off')
+        plan = await db_connection.fetchval(f"""
+            EXPLAIN (FORMAT JSON)
+            SELECT created_at, id, device_type
+            FROM auth.user_auth_history
+            WHERE user_id = '{NULL_UUID}' AND (created_at, id) < (now(), '{NULL_UUID}')
+            ORDER BY created_at DESC, id DESC
+            LIMIT 11
+        """)
+
+    assert '"Index Only Scan"' in plan
+    assert '"Seq Scan"' not in plan
+    assert '"Index Scan"' not in plan
+
+
+@pytest.mark.asyncio
+async def test_devices_rollup_after_login(
+        api_session
+):
+    """Тест проверяет, что входы с одного устройства сводятся в одну запись об устройстве."""
+    datas = {
+        'login': 'user_devices',
+        'email': 'user_devices',
+        'password': 'user_devices'
+    }
+    await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/signup',
+        json=datas
+    )
+    del datas['email']
+
+    for _ in range(2):
+        body, _, _ = await api_get_request(
+            api_session,
+            'POST',
+            '/auth/api/v1/account/login',
+            json=datas
+        )
+
+    devices = []
+    for _ in range(HISTORY_WAIT_ATTEMPTS):
+        devices, _, status = await api_get_request(
+            api_session,
+            'GET',
+            '/auth/api/v1/account/devices/',
+            token=body.get('access_token')
+        )
+        assert status == HTTPStatus.OK
+        if devices and devices[0].get('logins') == 2:
+            break
+        await asyncio.sleep(HISTORY_WAIT_DELAY)
+
+    assert len(devices) == 1
+    assert devices[0].get('logins') == 2
+    assert devices[0].get('first_seen') <= devices[0].get('last_seen')
@@ -0,0 +1,60 @@
+"""Модуль содержит тесты массового импорта пользователей."""
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.functional.testdata.roles import get_test_user_data_denied
+from tests.functional.utils.api import api_get_request
+
+IMPORT_PASSWORD = 'import_pwd'
+IMPORT_PASSWORD_HASH = '$2b$10$dF5ndvVdmyCoHg2HM98ppeidWfIvuXsdeMgyO6rxFibaDSvDsbXby'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'user, expected_status',
+    get_test_user_data_denied(),
+)
+async def test_import_users(
+    prepare_tokens,
+    api_session,
+    user,
+    expected_status,
+):
+    """Тест импорта пользователей из NDJSON с отчетом об ошибках по строкам."""
+
+    records = [
+        {'login': f'imported_{user}', 'email': f'imported_{user}@example.com', 'password_hash': IMPORT_PASSWORD_HASH},
+        {'login': 'test_user', 'email': f'imported_dup_{user}@example.com', 'password_hash': IMPORT_PASSWORD_HASH},
+        {'login': f'imported_plain_{user}', 'email': f'imported_plain_{user}@example.com', 'password': 'pwd'},
+        {'login': f'imported_role_{user}', 'email': f'imported_role_{user}@example.com',
+         'password_hash': IMPORT_PASSWORD_HASH, 'roles': ['unknown_role']},
+    ]
+
+    async with api_session.post(
+        '/auth/api/v1/users/import',
+        data=''.join(json.dumps(record) + '\n' for record in records),
+        headers={
+            'Authorization': f'Bearer {prepare_tokens.get(user).get("access_token")}',
+            'Content-Type': 'application/x-ndjson',
+        },
+    ) as response:
+        status = response.status
+        body = await response.json()
+
+    assert status == expected_status
+    if status != HTTPStatus.OK:
+        return
+
+    assert body.get('created') == 1
+    assert [error.get('line') for error in body.get('errors')] == [2, 3, 4]
+
+    body, _, status = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/account/login',
+        json={'login': f'imported_{user}', 'password': IMPORT_PASSWORD},
+    )
+
+    assert status == HTTPStatus.OK
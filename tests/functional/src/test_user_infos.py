@@ -0,0 +1,97 @@
+"""Модуль содержит тесты ручек персональной информации о пользователях."""
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.functional.settings import DB_SETTINGS
+from tests.functional.utils.api import api_get_request
+
+
+@pytest.mark.asyncio
+async def test_user_infos_cursor_pagination(
+    prepare_tokens,
+    api_session,
+):
+    """Тест проверяет, что постраничная выдача по курсору возвращает тех же пользователей, что и по номеру страницы."""
+
+    token = prepare_tokens.get(DB_SETTINGS.admin).get('access_token')
+
+    by_pages = []
+    page_number = 1
+    while page_number:
+        body, _, status = await api_get_request(
+            api_session,
+            'GET',
+            '/auth/api/v1/users/user-infos',
+            params={'page_number': page_number, 'limit': 2},
+            token=token,
+        )
+        assert status == HTTPStatus.OK
+        by_pages.extend(user['id'] for user in body['result'])
+        page_number = body['outcome'][0]['next_page']
+
+    by_cursor = []
+    cursor = None
+    while True:
+        body, _, status = await api_get_request(
+            api_session,
+            'GET',
+            '/auth/api/v1/users/user-infos',
+            params={'cursor': cursor, 'limit': 2},
+            token=token,
+        )
+        assert status == HTTPStatus.OK
+        by_cursor.extend(user['id'] for user in body['result'])
+        cursor = body['outcome'][0]['next_cursor']
+        if not cursor:
+            break
+
+    assert by_cursor == by_pages
+    assert len(set(by_cursor)) == len(by_cursor)
+
+
+@pytest.mark.asyncio
+async def test_user_infos_invalid_cursor(
+    prepare_tokens,
+    api_session,
+):
+    """Тест проверяет ответ на поврежденный курсор."""
+
+    _, _, status = await api_get_request(
+        api_session,
+        'GET',
+        '/auth/api/v1/users/user-infos',
+        params={'cursor': 'not-a-cursor', 'limit': 2},
+        token=prepare_tokens.get(DB_SETTINGS.admin).get('access_token'),
+    )
+
+    assert status == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_user_infos_export(
+    prepare_tokens,
+    api_session,
+):
+    """Тест проверяет, что выгрузка в NDJSON содержит всех пользователей в порядке постраничной выдачи."""
+
+    token = prepare_tokens.get(DB_SETTINGS.admin).get('access_token')
+
+    body, _, _ = await api_get_request(
+        api_session,
+        'GET',
+        '/auth/api/v1/users/user-infos',
+        params={'page_number': 1, 'limit': 50},
+        token=token,
+    )
+
+    async with api_session.get(
+        '/auth/api/v1/users/user-infos/export',
+        headers={'Authorization': f'Bearer {token}'},
+    ) as response:
+        assert response.status == HTTPStatus.OK
+        assert response.headers['Content-Type'].startswith('application/x-ndjson')
+        exported = [json.loads(line) for line in (await response.text()).splitlines()]
+
+    assert [user['id'] for user in exported[:50]] == [user['id'] for user in body['result']]
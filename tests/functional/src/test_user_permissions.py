@@ -0,0 +1,144 @@
+"""Модуль содержит тесты разрешений пользователя."""
+from base64 import urlsafe_b64decode
+from http import HTTPStatus
+
+import jwt
+import pytest
+
+from tests.functional.settings import DB_SETTINGS
+from tests.functional.testdata.roles import get_test_user_data_denied
+from tests.functional.utils.api import api_get_request
+
+ACCESS_TOKEN_MAX_BYTES = 2048
+SCOPES = ('films', 'film_details', 'persons', 'person_details', 'genres', 'protected')
+
+
+def unpack_permissions(value: str) -> dict[str, dict]:
+    """Функция распаковывает разрешения из токена в формате ответа `/user-permissions`."""
+    version, _, encoded = value.partition('.')
+    assert version == '1'
+
+    packed = int.from_bytes(urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)), 'big')
+    permissions = {}
+    for position, scope in enumerate(SCOPES):
+        access_level = ((packed >> (position * 3)) & 0b111) << 1
+        permissions[scope] = {
+            'admin': bool(access_level & 8),
+            'write': bool(access_level & 4),
+            'read': bool(access_level & 2),
+        }
+
+    return permissions
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [DB_SETTINGS.admin, 'test_user'])
+async def test_access_token_permissions(
+    prepare_tokens,
+    api_session,
+    user,
+):
+    """Тест сверяет разрешения в access токене с ответом `/user-permissions` и проверяет размер токена."""
+
+    access_token = prepare_tokens.get(user).get('access_token')
+    assert len(access_token) <= ACCESS_TOKEN_MAX_BYTES
+
+    identity = jwt.decode(access_token, options={'verify_signature': False}).get('sub')
+    if 'permissions' not in identity:
+        pytest.skip('Профиль токена с разрешениями выключен (JWT_EMBED_PERMISSIONS).')
+
+    token_permissions = unpack_permissions(identity.get('permissions'))
+
+    for scope in SCOPES:
+        body, _, status = await api_get_request(
+            api_session,
+            'GET',
+            '/auth/api/v1/user-permissions/',
+            params={'scope': scope},
+            token=access_token,
+        )
+
+        assert status == HTTPStatus.OK
+        assert token_permissions[scope] == body
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('user', [DB_SETTINGS.admin, 'test_user', None])
+async def test_batch_permissions(
+    prepare_tokens,
+    api_session,
+    user,
+):
+    """Тест сверяет пакетный ответ разрешений с ответами `/user-permissions` по каждой области."""
+
+    access_token = prepare_tokens.get(user).get('access_token') if user else None
+    if access_token is None:
+        # Сессия общая для всех тестов, и токен предыдущего запроса остается в ее заголовках.
+        api_session.headers.pop('Authorization', None)
+
+    body, _, status = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/user-permissions/batch',
+        json={'scopes': list(SCOPES)},
+        token=access_token,
+    )
+
+    assert status == HTTPStatus.OK
+    if access_token is None:
+        assert list(body.get('result')) == ['incognito']
+    [batch_permissions] = body.get('result').values()
+
+    for scope in SCOPES:
+        body, _, status = await api_get_request(
+            api_session,
+            'GET',
+            '/auth/api/v1/user-permissions/',
+            params={'scope': scope},
+            token=access_token,
+        )
+
+        assert batch_permissions[scope] == body
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'user, expected_status',
+    get_test_user_data_denied(),
+)
+async def test_batch_permissions_for_users(
+    prepare_tokens,
+    api_session,
+    user,
+    expected_status,
+):
+    """Тест пакетного запроса разрешений нескольких пользователей (только для администратора)."""
+
+    admin_token = prepare_tokens.get(DB_SETTINGS.admin).get('access_token')
+    user_ids = [
+        jwt.decode(prepare_tokens.get(name).get('access_token'), options={'verify_signature': False})['sub']['user_id']
+        for name in (DB_SETTINGS.admin, 'test_user')
+    ]
+
+    body, _, status = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/user-permissions/batch',
+        json={'scopes': ['films', 'protected'], 'user_ids': user_ids},
+        token=prepare_tokens.get(user).get('access_token'),
+    )
+
+    assert status == expected_status
+    if status == HTTPStatus.OK:
+        assert set(body.get('result')) == set(user_ids)
+        assert all(set(permissions) == {'films', 'protected'} for permissions in body['result'].values())
+
+    body, _, status = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/user-permissions/batch',
+        json={'scopes': ['unknown_scope']},
+        token=admin_token,
+    )
+
+    assert status == HTTPStatus.BAD_REQUEST
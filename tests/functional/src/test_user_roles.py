@@ -1,8 +1,10 @@
 """Модкуль содержащий тесты ручек для ролей пользователей."""
 
+from http import HTTPStatus
 from uuid import uuid4
 import pytest
 
+from tests.functional.settings import DB_SETTINGS
 from tests.functional.utils.api import api_get_request
 from tests.functional.testdata.roles import (
     get_test_user_data_denied,
@@ -112,6 +114,50 @@ async def test_get_user_roles(
     assert status == expected_status
 
 
+@pytest.mark.asyncio
+async def test_user_roles_cache_invalidation(
+    db_connection,
+    prepare_tokens,
+    api_session,
+):
+    """Тест сброса закэшированных ролей пользователя при добавлении и удалении ролей."""
+
+    token = prepare_tokens.get(DB_SETTINGS.admin).get('access_token')
+    role_id = str(uuid4())
+    role_name = 'test_roles_cache_invalidation'
+    await db_connection.execute(f"""
+        INSERT INTO auth.role
+        (id, name, description)
+        VALUES
+        ('{role_id}', '{role_name}', 'test_roles_cache_invalidation');
+    """)
+    user_id = str(uuid4())
+    await db_connection.execute(f"""
+         INSERT INTO auth.user
+         (id, login, email, password)
+         VALUES
+         ('{user_id}', 'test_roles_cache_invalidation', 'test_roles_cache_invalidation', 'test_roles_cache');
+     """)
+    url = f'/auth/api/v1/users/{user_id}/roles/create'
+
+    body, headers, status = await api_get_request(api_session, 'GET', url, token=token)
+    assert status == HTTPStatus.NOT_FOUND
+
+    body, headers, status = await api_get_request(
+        api_session, 'POST', f'/auth/api/v1/users/{user_id}/roles/', json={'roles': [role_name]}, token=token
+    )
+    assert status == HTTPStatus.OK
+    body, headers, status = await api_get_request(api_session, 'GET', url, token=token)
+    assert body == [{'id': role_id, 'name': role_name}]
+
+    body, headers, status = await api_get_request(
+        api_session, 'DELETE', f'/auth/api/v1/users/{user_id}/roles/delete', params={'roles': [role_name]}, token=token
+    )
+    assert status == HTTPStatus.OK
+    body, headers, status = await api_get_request(api_session, 'GET', url, token=token)
+    assert status == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     'user, expected_status',
@@ -0,0 +1,53 @@
+"""Модуль содержит тесты ручки отзыва сессий пользователей."""
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+
+from tests.functional.settings import DB_SETTINGS
+from tests.functional.utils.api import api_get_request
+from tests.functional.testdata.roles import get_test_user_data_denied
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'user, expected_status',
+    get_test_user_data_denied(),
+)
+async def test_revoke_users_sessions(
+    prepare_tokens,
+    api_session,
+    user,
+    expected_status
+):
+    """Тест отзыва сессий пользователей без активных сессий."""
+
+    body, headers, status = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/users/sessions/revoke',
+        json={'user_ids': [str(uuid4()), str(uuid4())]},
+        token=prepare_tokens.get(user).get('access_token')
+    )
+
+    assert status == expected_status
+    if status == HTTPStatus.OK:
+        assert body.get('revoked') == 0
+
+
+@pytest.mark.asyncio
+async def test_revoke_incorrect_users_sessions(
+    prepare_tokens,
+    api_session
+):
+    """Тест отзыва сессий с некорректным идентификатором пользователя."""
+
+    _, _, status = await api_get_request(
+        api_session,
+        'POST',
+        '/auth/api/v1/users/sessions/revoke',
+        json={'user_ids': ['incorrect_user_id']},
+        token=prepare_tokens.get(DB_SETTINGS.admin).get('access_token')
+    )
+
+    assert status == HTTPStatus.BAD_REQUEST